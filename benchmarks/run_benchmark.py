@@ -0,0 +1,328 @@
+"""
+Benchmark of backtest main loop.
+
+Run backtests on synthetic data of uniswap, aave, squeeth and deribit option market, with different days and position count.
+For every case, throughput(bars per second), peak RSS and time spent in each phase are reported, and saved to a json file.
+Phase time is measured by profiler of Actuator, loading data and calculating metrics are measured by a Profiler too.
+
+It can be run from the root of repository, or from benchmarks folder. e.g.
+
+.. code-block:: bash
+
+    python benchmarks/run_benchmark.py --markets uniswap aave --days 1 30 --positions 1 10 --output result.json
+    # compare with result of last release
+    python benchmarks/run_benchmark.py --days 1 --output new.json --baseline result.json
+
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+# make demeter importable without installing it or setting PYTHONPATH
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import synthetic
+from demeter import (
+    Actuator,
+    ChainType,
+    MarketInfo,
+    MarketTypeEnum,
+    PeriodTrigger,
+    RowData,
+    Strategy,
+    TokenInfo,
+)
+from demeter.aave import AaveV3Market
+from demeter.core import Profiler
+from demeter.deribit import DeribitOptionMarket
+from demeter.result import performance_metrics
+from demeter.squeeth import SqueethMarket
+from demeter.uniswap import UniLpMarket, UniV3Pool
+
+MARKETS = ["uniswap", "aave", "squeeth", "deribit"]
+START_DATE = date(2024, 1, 1)
+RISK_PARAMETER_PATH = os.path.join(os.path.dirname(__file__), "..", "tests", "aave_risk_parameters", "polygon.csv")
+
+usdc = TokenInfo(name="usdc", decimal=6)
+eth = TokenInfo(name="eth", decimal=18)
+weth = TokenInfo(name="weth", decimal=18, address=synthetic.AAVE_TOKENS["WETH"])
+aave_usdc = TokenInfo(name="usdc", decimal=6, address=synthetic.AAVE_TOKENS["USDC"])
+osqth = TokenInfo(name="osqth", decimal=18)
+
+uni_key = MarketInfo("uni", MarketTypeEnum.uniswap_v3)
+aave_key = MarketInfo("aave", MarketTypeEnum.aave_v3)
+squeeth_key = MarketInfo("squeeth", MarketTypeEnum.squeeth)
+deribit_key = MarketInfo("deribit", MarketTypeEnum.deribit_option)
+
+
+class BenchmarkStrategy(Strategy):
+    """
+    Add positions at the beginning, then adjust them periodically.
+    """
+
+    def __init__(self, days: int, positions: int, period: timedelta = timedelta(days=1)):
+        super().__init__()
+        self.days = days
+        self.positions = positions
+        self.period = period
+
+    def initialize(self):
+        self.triggers.append(PeriodTrigger(self.period, self.adjust, trigger_immediately=True))
+
+    def adjust(self, row_data: RowData):
+        pass
+
+
+class UniStrategy(BenchmarkStrategy):
+    def adjust(self, row_data: RowData):
+        market: UniLpMarket = self.broker.markets[uni_key]
+        market.remove_all_liquidity()
+        price = row_data.market_status[uni_key].price
+        usdc_amount = self.broker.get_token_balance(usdc) / self.positions
+        eth_amount = self.broker.get_token_balance(eth) / self.positions
+        for i in range(self.positions):
+            width = Decimal("0.01") * (i + 1)
+            market.add_liquidity(price * (1 - width), price * (1 + width), usdc_amount, eth_amount)
+
+    def on_bar(self, row_data: RowData):
+        _ = row_data.market_status[uni_key].price
+
+
+class AaveStrategy(BenchmarkStrategy):
+    def adjust(self, row_data: RowData):
+        market: AaveV3Market = self.broker.markets[aave_key]
+        if len(market.supplies) == 0:
+            market.supply(weth, 10, True)
+            market.borrow(aave_usdc, 5000)
+
+    def on_bar(self, row_data: RowData):
+        _ = self.broker.markets[aave_key].health_factor
+
+
+class SqueethStrategy(BenchmarkStrategy):
+    def adjust(self, row_data: RowData):
+        market: SqueethMarket = self.broker.markets[squeeth_key]
+        if len(market.vault) == 0:
+            for i in range(self.positions):
+                market.open_deposit_mint_by_collat_rate(1, 2)
+
+    def on_bar(self, row_data: RowData):
+        _ = row_data.market_status[squeeth_key]["norm_factor"]
+
+
+class DeribitStrategy(BenchmarkStrategy):
+    def adjust(self, row_data: RowData):
+        market: DeribitOptionMarket = self.broker.markets[deribit_key]
+        if len(market.positions) == 0:
+            end = START_DATE + timedelta(days=self.days - 1)
+            for name in synthetic.deribit_instruments(end, self.positions):
+                market.buy(name, 1)
+
+    def on_bar(self, row_data: RowData):
+        _ = row_data.prices[DeribitOptionMarket.ETH.name]
+
+
+def _get_actuator(market: str, data_path: str, days: int, positions: int, profiler: Profiler) -> Actuator:
+    """
+    Generate data and build actuator, loading data is timed as load phase
+    """
+    end = START_DATE + timedelta(days=days - 1)
+    actuator = Actuator(profile=True)
+    actuator.logger.setLevel(logging.WARNING)
+    broker = actuator.broker
+    if market == "uniswap":
+        synthetic.generate_uni_files(data_path, START_DATE, end)
+        uni_market = UniLpMarket(uni_key, UniV3Pool(usdc, eth, 0.05, usdc), data_path=data_path)
+        with profiler.measure("load"):
+            uni_market.load_data(synthetic.UNI_CHAIN, synthetic.UNI_POOL, START_DATE, end)
+            actuator.set_price(uni_market.get_price_from_data())
+        broker.add_market(uni_market)
+        broker.set_balance(usdc, 100000)
+        broker.set_balance(eth, 50)
+        actuator.strategy = UniStrategy(days, positions)
+    elif market == "aave":
+        synthetic.generate_aave_files(data_path, START_DATE, end)
+        aave_market = AaveV3Market(aave_key, RISK_PARAMETER_PATH, tokens=[weth, aave_usdc], data_path=data_path)
+        with profiler.measure("load"):
+            aave_market.load_data(ChainType.polygon, [weth, aave_usdc], START_DATE, end)
+            eth_price = synthetic.eth_price_series(START_DATE, end)
+            actuator.set_price(pd.DataFrame({weth.name: eth_price, aave_usdc.name: 1.0}, index=eth_price.index))
+        broker.add_market(aave_market)
+        broker.set_balance(weth, 10)
+        actuator.strategy = AaveStrategy(days, positions)
+    elif market == "squeeth":
+        synthetic.generate_squeeth_files(data_path, START_DATE, end)
+        uni_market = UniLpMarket(uni_key, UniV3Pool(weth, osqth, 0.3, weth), data_path=data_path)
+        squeeth_market = SqueethMarket(squeeth_key, uni_market, data_path=data_path)
+        with profiler.measure("load"):
+            uni_market.load_data("ethereum", synthetic.OSQTH_POOL, START_DATE, end)
+            squeeth_market.load_data(START_DATE, end)
+            actuator.set_price(squeeth_market.get_price_from_data())
+        broker.add_market(uni_market)
+        broker.add_market(squeeth_market)
+        broker.set_balance(weth, positions + 1)
+        actuator.strategy = SqueethStrategy(days, positions)
+    elif market == "deribit":
+        instrument_count = max(positions, 2)
+        data_path = os.path.join(data_path, f"instruments-{instrument_count}")
+        os.makedirs(data_path, exist_ok=True)
+        synthetic.generate_deribit_files(data_path, START_DATE, end, instrument_count)
+        deribit_market = DeribitOptionMarket(deribit_key, DeribitOptionMarket.ETH, data_path=data_path)
+        with profiler.measure("load"):
+            deribit_market.load_data(START_DATE, end)
+            actuator.set_price(deribit_market.get_price_from_data())
+        broker.add_market(deribit_market)
+        broker.set_balance(DeribitOptionMarket.ETH, positions + 1)
+        deribit_market.deposit(positions + 1)
+        actuator.strategy = DeribitStrategy(days, positions)
+    else:
+        raise ValueError(f"unknown market {market}")
+    return actuator
+
+
+def _get_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on linux, and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 1024 / 1024
+
+
+def run_case(market: str, days: int, positions: int, data_root: str) -> Dict[str, Any]:
+    """
+    Run a backtest case, and return timings.
+
+    :param market: market name, uniswap, aave, squeeth or deribit
+    :type market: str
+    :param days: days of backtest
+    :type days: int
+    :param positions: position count
+    :type positions: int
+    :param data_root: folder to keep synthetic data
+    :type data_root: str
+    :return: result of this case
+    :rtype: Dict[str, Any]
+    """
+    # phases outside of Actuator.run, phases in backtest are profiled by actuator
+    profiler = Profiler()
+    data_path = os.path.join(data_root, f"{market}-{days}d")
+    os.makedirs(data_path, exist_ok=True)
+    actuator = _get_actuator(market, data_path, days, positions, profiler)
+    start_rss = _get_rss_mb()
+
+    start = time.perf_counter()
+    actuator.run(print_result=False)
+    run_seconds = time.perf_counter() - start
+
+    with profiler.measure("metrics"):
+        performance_metrics(actuator.account_status_df["net_value"])
+
+    # sum phases of all markets
+    profile = pd.concat([profiler.to_dataframe(), actuator.profile_result]).groupby("phase")[["seconds", "calls"]].sum()
+    bars = len(actuator.account_status)
+    return {
+        "market": market,
+        "days": days,
+        "positions": positions,
+        "bars": bars,
+        "run_seconds": run_seconds,
+        "bars_per_second": bars / run_seconds,
+        "start_rss_mb": start_rss,
+        "peak_rss_mb": _get_rss_mb(),
+        "phases": {k: float(v) for k, v in profile["seconds"].items()},
+        "calls": {k: int(v) for k, v in profile["calls"].items()},
+    }
+
+
+def _run_case_in_process(args) -> Dict[str, Any]:
+    return run_case(*args)
+
+
+def get_environment() -> Dict[str, Any]:
+    from importlib.metadata import version, PackageNotFoundError
+
+    try:
+        demeter_version = version("zelos-demeter")
+    except PackageNotFoundError:
+        demeter_version = None
+    return {
+        "time": datetime.now().isoformat(),
+        "demeter": demeter_version,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float) -> List[str]:
+    """
+    Compare throughput with baseline, return cases which are slower than threshold.
+    """
+    base = {(r["market"], r["days"], r["positions"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        key = (r["market"], r["days"], r["positions"])
+        if key not in base:
+            continue
+        ratio = r["bars_per_second"] / base[key]["bars_per_second"]
+        line = f"{key}: {base[key]['bars_per_second']:.1f} -> {r['bars_per_second']:.1f} bars/s ({ratio - 1:+.1%})"
+        print(line)
+        if ratio < 1 - threshold:
+            regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark of demeter backtest")
+    parser.add_argument("--markets", nargs="+", choices=MARKETS, default=MARKETS)
+    parser.add_argument("--days", nargs="+", type=int, default=[1, 30, 365])
+    parser.add_argument("--positions", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--data-path", default=os.path.join(os.path.dirname(__file__), "data"))
+    parser.add_argument("--output", default="benchmark_result.json")
+    parser.add_argument("--baseline", default=None, help="result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed throughput drop compared with baseline")
+    args = parser.parse_args()
+
+    cases = [(m, d, p, args.data_path) for m in args.markets for d in args.days for p in args.positions]
+    results = []
+    # every case runs in a new process, so peak RSS is not affected by other cases
+    mp_context = multiprocessing.get_context("spawn")
+    for case in cases:
+        with mp_context.Pool(1) as pool:
+            result = pool.apply(_run_case_in_process, (case,))
+        print(
+            f"{result['market']:>8} {result['days']:>4}d {result['positions']:>4} positions: "
+            f"{result['bars_per_second']:>10.1f} bars/s, peak rss {result['peak_rss_mb'] or 0:.1f} MB"
+        )
+        results.append(result)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": get_environment(), "results": results}, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+        if len(regressions) > 0:
+            print("Regression found:\n" + "\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
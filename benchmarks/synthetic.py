@@ -0,0 +1,224 @@
+"""
+Generate synthetic minutely data files for benchmark.
+
+Files follow the name rule and format of files downloaded by demeter-fetch,
+so they are loaded by load_data() of each market, the same as real data.
+Data is generated by a seeded random walk, so files are always the same for the same date range.
+Files of different date ranges should be kept in different folders, as price walks from the start day.
+"""
+
+import json
+import os
+import zlib
+from datetime import date, datetime, timedelta
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+MINUTES_IN_DAY = 1440
+
+UNI_CHAIN = "polygon"
+UNI_POOL = "0x45dda9cb7c25131df268515131f647d726f50608"
+OSQTH_POOL = "0x82c427adfdf2d245ec51d8046b41c4ee87f0d29c"
+AAVE_TOKENS = {
+    "WETH": "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619",
+    "USDC": "0x2791bca1f2de4661ed88a30c99a7a9449aa84174",
+}
+ETH_PRICE = 1840.0
+OSQTH_PRICE = 0.0536
+# upper bound of swap amounts, so they fit in int64 and can be negated as net amounts
+MAX_SWAP_AMOUNT = 2**60
+
+
+def _rng(seed: str, day: date) -> np.random.Generator:
+    return np.random.default_rng(zlib.crc32(f"{seed}-{day.toordinal()}".encode()))
+
+
+def _day_index(day: date) -> pd.DatetimeIndex:
+    return pd.date_range(datetime.combine(day, datetime.min.time()), periods=MINUTES_IN_DAY, freq="1min")
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def eth_price_series(start: date, end: date) -> pd.Series:
+    """
+    Minutely eth price in usd, it's consistent with generated uniswap pool and squeeth data.
+    """
+    index = pd.date_range(start, datetime.combine(end, datetime.min.time()) + timedelta(days=1), freq="1min")[:-1]
+    # random walk with seed of start day, so price is the same in all markets
+    steps = np.random.default_rng(start.toordinal()).normal(0, 0.0005, len(index))
+    return pd.Series(ETH_PRICE * np.exp(np.cumsum(steps)), index=index)
+
+
+def _swap_amount(rng: np.random.Generator, mean: float, has_swap: np.ndarray) -> np.ndarray:
+    """
+    Lognormal swap amounts, clipped before casting, as the tail of lognormal can be larger than int64.
+    """
+    amount = rng.lognormal(mean, 2, MINUTES_IN_DAY) * has_swap
+    return np.minimum(amount, MAX_SWAP_AMOUNT).astype(np.int64)
+
+
+def _uni_day(day: date, seed: str, start_tick: int, liquidity: int, prices: np.ndarray | None) -> pd.DataFrame:
+    rng = _rng(seed, day)
+    if prices is not None:
+        # tick of usdc/eth pool, token0 is usdc(6), token1 is eth(18)
+        close_tick = np.round(np.log(1 / prices * 10 ** (18 - 6)) / np.log(1.0001)).astype(int)
+    else:
+        close_tick = start_tick + np.cumsum(rng.choice([-1, 0, 0, 0, 1], MINUTES_IN_DAY))
+    open_tick = np.concatenate([[close_tick[0]], close_tick[:-1]])
+    # about half of minutes have swaps
+    has_swap = rng.random(MINUTES_IN_DAY) < 0.5
+    zero_for_one = rng.random(MINUTES_IN_DAY) < 0.5
+    amount0 = _swap_amount(rng, 22, has_swap)
+    amount1 = _swap_amount(rng, 36, has_swap)
+    in_amount0 = np.where(zero_for_one, amount0, 0)
+    in_amount1 = np.where(zero_for_one, 0, amount1)
+    return pd.DataFrame(
+        {
+            "timestamp": _day_index(day),
+            "netAmount0": np.where(zero_for_one, amount0, -amount0),
+            "netAmount1": np.where(zero_for_one, -amount1, amount1),
+            "closeTick": close_tick,
+            "openTick": open_tick,
+            "lowestTick": np.minimum(open_tick, close_tick),
+            "highestTick": np.maximum(open_tick, close_tick),
+            "inAmount0": in_amount0,
+            "inAmount1": in_amount1,
+            "currentLiquidity": liquidity,
+        }
+    )
+
+
+def generate_uni_files(data_path: str, start: date, end: date):
+    """
+    Generate files of usdc/eth pool, price follows eth_price_series
+    """
+    eth_price = eth_price_series(start, end)
+    for day in _days(start, end):
+        path = os.path.join(data_path, f"{UNI_CHAIN}-{UNI_POOL}-{day.strftime('%Y-%m-%d')}.minute.csv")
+        if os.path.exists(path):
+            continue
+        prices = eth_price[_day_index(day)].to_numpy()
+        _uni_day(day, UNI_POOL, 0, 2402545990706448841, prices).to_csv(path, index=False)
+
+
+def generate_squeeth_files(data_path: str, start: date, end: date):
+    """
+    Generate files of osqth/weth pool and squeeth controller
+    """
+    eth_price = eth_price_series(start, end)
+    start_tick = int(np.log(1 / OSQTH_PRICE) / np.log(1.0001))
+    for day in _days(start, end):
+        uni_path = os.path.join(data_path, f"ethereum-{OSQTH_POOL}-{day.strftime('%Y-%m-%d')}.minute.csv")
+        if not os.path.exists(uni_path):
+            _uni_day(day, OSQTH_POOL, start_tick, 3457417610809793205050, None).to_csv(uni_path, index=False)
+        path = os.path.join(data_path, f"ethereum-squeeth-controller-{day.strftime('%Y-%m-%d')}.minute.csv")
+        if os.path.exists(path):
+            continue
+        osqth_tick = pd.read_csv(uni_path)["closeTick"].to_numpy()
+        df = pd.DataFrame(
+            {
+                "block_timestamp": _day_index(day),
+                "norm_factor": 0.2895 * (1 - 0.0002 * (day - start).days),
+                "WETH": eth_price[_day_index(day)].to_numpy(),
+                "OSQTH": 1 / np.power(1.0001, osqth_tick),
+            }
+        )
+        df.to_csv(path, index=False)
+
+
+def generate_aave_files(data_path: str, start: date, end: date):
+    """
+    Generate files of weth and usdc reserve in aave v3 on polygon
+    """
+    for name, address in AAVE_TOKENS.items():
+        for day in _days(start, end):
+            path = os.path.join(data_path, f"polygon-aave_v3-{address}-{day.strftime('%Y-%m-%d')}.minute.csv")
+            if os.path.exists(path):
+                continue
+            rng = _rng(address, day)
+            minutes = (day - start).days * MINUTES_IN_DAY + np.arange(MINUTES_IN_DAY)
+            variable_rate = 0.02 + 0.002 * rng.random(MINUTES_IN_DAY)
+            liquidity_rate = variable_rate * 0.2
+            df = pd.DataFrame(
+                {
+                    "block_timestamp": _day_index(day),
+                    "liquidity_rate": liquidity_rate,
+                    "stable_borrow_rate": variable_rate * 4,
+                    "variable_borrow_rate": variable_rate,
+                    # index grows by rate every minute
+                    "liquidity_index": 1.005 * np.power(1 + 0.004 / 525600, minutes),
+                    "variable_borrow_index": 1.025 * np.power(1 + 0.021 / 525600, minutes),
+                }
+            )
+            df.to_csv(path, index=False, float_format="%.27f")
+
+
+def deribit_instruments(end: date, count: int) -> List[str]:
+    """
+    Names of instruments in generated deribit data, they expire after backtest finishes.
+    """
+    expiry = (end + timedelta(days=7)).strftime("%d%b%y").upper()
+    strikes = [int(ETH_PRICE) + 100 * (i // 2 - count // 4) for i in range(count)]
+    return [f"ETH-{expiry}-{strike}-{'C' if i % 2 == 0 else 'P'}" for i, strike in enumerate(strikes)]
+
+
+def generate_deribit_files(data_path: str, start: date, end: date, instrument_count: int):
+    """
+    Generate hourly option book of eth, every hour has instrument_count instruments.
+    """
+    eth_price = eth_price_series(start, end)
+    instruments = deribit_instruments(end, instrument_count)
+    expiry_time = datetime.combine(end + timedelta(days=7), datetime.min.time()) + timedelta(hours=8)
+    for day in _days(start, end):
+        path = os.path.join(data_path, f"Deribit-option-book-ETH-{day.strftime('%Y%m%d')}.csv")
+        if os.path.exists(path):
+            continue
+        rng = _rng("deribit", day)
+        rows = []
+        for hour in pd.date_range(datetime.combine(day, datetime.min.time()), periods=24, freq="1h"):
+            underlying = float(eth_price[hour])
+            t = (expiry_time - hour).total_seconds() / 86400 / 365
+            for name in instruments:
+                strike = int(name.split("-")[2])
+                is_call = name.endswith("C")
+                intrinsic = max(underlying - strike, 0) if is_call else max(strike - underlying, 0)
+                mark = round((intrinsic + underlying * 0.6 * np.sqrt(t) * 0.4) / underlying, 4)
+                spread = round(mark * 0.02, 4)
+                rows.append(
+                    {
+                        "time": hour,
+                        "instrument_name": name,
+                        "state": "open",
+                        "type": "CALL" if is_call else "PUT",
+                        "strike_price": strike,
+                        "t": t,
+                        "expiry_time": expiry_time,
+                        "actual_time": hour,
+                        "min_price": round(mark * 0.5, 4),
+                        "max_price": round(mark * 2, 4),
+                        "vega": rng.random(),
+                        "theta": -rng.random(),
+                        "rho": rng.random(),
+                        "gamma": rng.random() * 0.001,
+                        "delta": 0.5 if is_call else -0.5,
+                        "underlying_price": underlying,
+                        "settlement_price": mark,
+                        "mark_price": mark,
+                        "mark_iv": 60.0,
+                        "last_price": mark,
+                        "interest_rate": 0.0,
+                        "bid_iv": 58.0,
+                        "best_bid_price": mark - spread,
+                        "best_bid_amount": 100.0,
+                        "ask_iv": 62.0,
+                        "best_ask_price": mark + spread,
+                        "best_ask_amount": 100.0,
+                        "asks": json.dumps([[mark + spread * (i + 1), 100.0] for i in range(5)]),
+                        "bids": json.dumps([[mark - spread * (i + 1), 100.0] for i in range(5)]),
+                    }
+                )
+        pd.DataFrame(rows).to_csv(path, index=False)
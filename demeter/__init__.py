@@ -22,12 +22,13 @@ from .broker import (
     AssetDict,
     AccountStatus,
     MarketTypeEnum,
+    NumericEnum,
     BaseAction,
     RowData,
     ActionTypeEnum,
 )
 
-from .core import Actuator
+from .core import Actuator, sweep
 from .indicator import simple_moving_average, exponential_moving_average, realized_volatility
 from .strategy import (
     Strategy,
@@ -25,4 +25,7 @@ from ._typing import (
     AaveDescription,
 )
 from .core import AaveV3CoreLib
+from .helper import get_health_factor_series, get_first_liquidation_time
+from .valuation import AaveValuation
 from .market import AaveV3Market
+from .stress import AaveStressResult, shock_price, stress_test, stress_result_to_dataframe
@@ -1,11 +1,14 @@
 import os
 from _decimal import Decimal
+from datetime import datetime
 from typing import Dict
 
+import numpy as np
 import pandas as pd
 
 from demeter import DemeterError
-from demeter.aave._typing import RiskParameter
+from demeter.aave._typing import RiskParameter, SupplyKey, SupplyInfo, BorrowKey, BorrowInfo
+from demeter.aave.core import AaveV3CoreLib
 
 MIN_TOKEN_VALUE = (1e-18) - (1e-27)
 
@@ -64,3 +67,81 @@ def load_risk_parameter(token_setting_path:str) -> pd.DataFrame | Dict[str, Risk
     rp["liqThereshold"] = rp["liqThereshold"].str.rstrip("%").apply(lambda x: Decimal(x)) / 100
     rp = rp.set_index("symbol")
     return rp
+
+
+def _to_amounts(amount) -> np.ndarray:
+    return np.asarray(amount, dtype=float)
+
+
+def get_health_factor_series(
+    data: pd.DataFrame,
+    prices: pd.DataFrame,
+    risk_parameters: pd.DataFrame,
+    supplies: Dict[SupplyKey, SupplyInfo],
+    borrows: Dict[BorrowKey, BorrowInfo],
+) -> pd.Series | pd.DataFrame:
+    """
+    | Calculate health factor of static positions at every timestamp of data, without running back test.
+    | Value of a position is base_amount * index * price, so health factor is
+    | sum(supply_value * liqThereshold) / sum(borrow_value), it's calculated by float arrays over all timestamps.
+    | To screen many configurations at once, base_amount can be an array, each element is a configuration.
+    | Then a DataFrame will be returned, each column is health factor of a configuration.
+    | If there is no borrow, health factor is inf.
+
+    :param data: aave market data, such as AaveV3Market.data
+    :type data: DataFrame
+    :param prices: price of tokens, columns are token names, it will be aligned to index of data
+    :type prices: DataFrame
+    :param risk_parameters: risk parameters, such as AaveV3Market.risk_parameters
+    :type risk_parameters: DataFrame
+    :param supplies: supply positions, supplies whose collateral is False will be ignored.
+    :type supplies: Dict[SupplyKey, SupplyInfo]
+    :param borrows: borrow positions
+    :type borrows: Dict[BorrowKey, BorrowInfo]
+    :return: health factor series, or DataFrame if base amounts are array
+    :rtype: Series | DataFrame
+    """
+    prices = prices.reindex(data.index)
+    shape = np.broadcast_shapes(
+        *[_to_amounts(s.base_amount).shape for s in supplies.values()],
+        *[_to_amounts(b.base_amount).shape for b in borrows.values()],
+    )
+    if len(shape) > 1:
+        raise DemeterError("base amount should be a number or 1-d array")
+    threshold_value = np.zeros((len(data.index),) + shape)
+    borrow_value = np.zeros((len(data.index),) + shape)
+    for key, supply in supplies.items():
+        if not supply.collateral:
+            continue
+        name = key.token.name
+        token_value = data[(name, "liquidity_index")].to_numpy(dtype=float) * prices[name].to_numpy(dtype=float)
+        token_value *= float(risk_parameters.loc[name].liqThereshold)
+        threshold_value += np.multiply.outer(token_value, _to_amounts(supply.base_amount))
+    for key, borrow in borrows.items():
+        name = key.token.name
+        token_value = data[(name, "variable_borrow_index")].to_numpy(dtype=float) * prices[name].to_numpy(dtype=float)
+        borrow_value += np.multiply.outer(token_value, _to_amounts(borrow.base_amount))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        health_factor = np.where(borrow_value != 0, threshold_value / borrow_value, np.inf)
+    if len(shape) == 0:
+        return pd.Series(health_factor, index=data.index, name="health_factor")
+    return pd.DataFrame(health_factor, index=data.index)
+
+
+def get_first_liquidation_time(health_factor: pd.Series | pd.DataFrame) -> datetime | None | pd.Series:
+    """
+    | Find the first time when health factor is below liquidation threshold, that's when market will liquidate.
+    | Just like AaveV3Market, health factor equal to 0 means there is no collateral, so it will not be liquidated.
+
+    :param health_factor: health factor series, or DataFrame of configurations, such as get_health_factor_series()
+    :type health_factor: Series | DataFrame
+    :return: first liquidation time, or None if never liquidated.
+        If health_factor is DataFrame, return a Series, and NaT means never liquidated.
+    :rtype: datetime | None | Series
+    """
+    threshold = float(AaveV3CoreLib.HEALTH_FACTOR_LIQUIDATION_THRESHOLD)
+    liquidated = (health_factor > 0) & (health_factor < threshold)
+    if isinstance(liquidated, pd.DataFrame):
+        first = liquidated.idxmax()
+        return first.where(liquidated.any())
+    return liquidated.idxmax() if liquidated.any() else None
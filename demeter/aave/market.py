@@ -1,10 +1,11 @@
+import copy
 import json
 import os
 import token
 from _decimal import Decimal
 from datetime import date, timedelta
 from orjson import orjson
-from typing import Dict, List, Set
+from typing import Dict, List, Set, Tuple
 
 import pandas as pd
 
@@ -26,16 +27,18 @@ from ._typing import (
     BorrowAction,
     RepayAction,
     LiquidationAction,
-    DictCache,
     AaveDescription,
     AaveMarketStatus,
+    AaveTokenStatus,
 )
 from .core import AaveV3CoreLib
+from .valuation import AaveValuation
 from .. import DemeterError, TokenInfo
 from .._typing import DECIMAL_0, UnitDecimal, ChainType
 from ..broker import Market, MarketInfo, write_func
 from ..utils import get_formatted_predefined, STYLE, get_formatted_from_dict, console_text
 from ..utils.application import require, float_param_formatter, to_decimal
+from ..utils.file_cache import read_files, read_combined_with_cache
 
 DEFAULT_DATA_PATH = "./data"
 
@@ -74,17 +77,20 @@ class AaveV3Market(Market):
             risk_parameters_path
         )
 
-        # caches, since amounts and values are calculated by base_amount, and they are commonly used, cache is introduced to speed up back test.
-        # when base amount or price has changed, they must be reset.
-        # Maybe I'm just bring trouble on oneself
-        self._collaterals_amount_cache = DictCache()
-        self._supplies_amount_cache = DictCache()
-        self._supplies_cache = DictCache()
-        self._borrows_amount_cache = DictCache()
-        self._borrows_cache = DictCache()
+        # values of positions, health factor and apy are kept by valuation, and updated when position,
+        # index or price of a token has changed.
+        self._valuation = AaveValuation(self._supplies, self._borrows, self._risk_parameters)
+        # caches of Supply and Borrow, they must be reset when position or market status has changed.
 
         self._market_status: AaveMarketStatus = None
+        # status of each token in current market status, they are read from market status once in every bar,
+        # so reading index and rate is only an attribute access.
+        self._token_status: Dict[str, AaveTokenStatus] = {}
+        # index of market status data, and positions of REQUIRED_DATA_COLUMN of each token in it
+        self._token_status_slots: Tuple[pd.Index, Dict[str, Tuple[int, ...]]] | None = None
         self._tokens: Set[TokenInfo] = set()
+        # prices of tokens in last set_market_status
+        self._last_token_prices: Tuple | None = None
         self.add_token(tokens)
 
     REQUIRED_DATA_COLUMN = [
@@ -182,9 +188,20 @@ class AaveV3Market(Market):
         else:
             raise ValueError()
 
-    def load_data(self, chain: ChainType, token_info_list: List[TokenInfo], start_date: date, end_date: date):
+    def load_data(
+        self,
+        chain: ChainType,
+        token_info_list: List[TokenInfo],
+        start_date: date,
+        end_date: date,
+        processes: int = 1,
+        cache_path: str | None = None,
+    ):
         """
-        Load data from folder set in data_path. Those data file should be downloaded by demeter, and meet name rule. [chain]-aave_v3-[token_contract_address]-[date].minute.csv
+        | Load data from folder set in data_path. Those data file should be downloaded by demeter, and meet name rule. [chain]-aave_v3-[token_contract_address]-[date].minute.csv
+        | Files of all tokens can be parsed in a process pool, then they are joined into a multiple column index dataframe at once.
+        | If cache_path is set, the joined dataframe is saved as one binary file keyed by chain, tokens and date range,
+        | and it will be loaded directly in the next time.
 
         :param chain: chain type
         :type chain: ChainType
@@ -194,13 +211,20 @@ class AaveV3Market(Market):
         :type start_date: date
         :param end_date: end day, the end day will be included
         :type end_date: date
+        :param processes: how many processes are used to parse csv files, default is 1
+        :type processes: int
+        :param cache_path: folder to keep parsed files, csv parsing will be skipped if cache exists. default is None(no cache)
+        :type cache_path: str
         """
         self.logger.info(f"start load files from {start_date} to {end_date}...")
+        token_paths: Dict[str, List[str]] = {}
         for token_info in token_info_list:
-            day = start_date
-            df = pd.DataFrame()
             if token_info.address == "":
                 raise DemeterError(f"address of {token_info.name} not set")
+            if (self._data is not None and token_info.name in self._data) or token_info.name in token_paths:
+                raise DemeterError(f"{token_info.name} has already set to data")
+            day = start_date
+            paths = []
             while day <= end_date:
                 path = os.path.join(
                     self.data_path,
@@ -210,17 +234,29 @@ class AaveV3Market(Market):
                     raise IOError(
                         f"resource file {path} not found, please download with demeter-fetch: https://github.com/zelos-alpha/demeter-fetch"
                     )
-                csv_converters = {n: to_decimal for n in AaveV3Market.REQUIRED_DATA_COLUMN}
-                day_df = pd.read_csv(
-                    path,
-                    converters=csv_converters,
-                    index_col=0,
-                    parse_dates=True,
-                )
-
-                df = pd.concat([df, day_df])
+                paths.append(path)
                 day += timedelta(days=1)
-            self.set_token_data(token_info, df)
+            token_paths[token_info.name] = paths
+
+        all_paths = [p for paths in token_paths.values() for p in paths]
+
+        def build() -> pd.DataFrame:
+            day_dfs = read_files(all_paths, _read_aave_csv, cache_path, processes)
+            token_dfs = {}
+            for name, paths in token_paths.items():
+                token_dfs[name] = pd.concat(day_dfs[: len(paths)])
+                day_dfs = day_dfs[len(paths) :]
+            # keys of dict become the first level of column index
+            return pd.concat(token_dfs, axis="columns")
+
+        tokens_key = "_".join(f"{t.name}" for t in token_info_list)
+        df = read_combined_with_cache(
+            all_paths,
+            build,
+            f"{chain.name.lower()}-aave_v3-{tokens_key}-{start_date.strftime('%Y-%m-%d')}-{end_date.strftime('%Y-%m-%d')}",
+            cache_path,
+        )
+        self._data = df if self._data is None else pd.concat([self._data, df], axis="columns")
         self.logger.info("data has been prepared")
 
     @property
@@ -238,21 +274,14 @@ class AaveV3Market(Market):
         :return: value of all tokens
         :rtype: Dict[SupplyKey, Decimal]
         """
-        if self._supplies_amount_cache.empty:
-            for k, v in self._supplies.items():
-                self._supplies_amount_cache.set(
-                    k,
-                    AaveV3CoreLib.get_amount(v.base_amount, self._market_status.data[k.token.name].liquidity_index)
-                    * self._price_status[k.token.name],
-                )
-        return self._supplies_amount_cache.value
+        return self._valuation.supplies_value
 
     @property
     def total_supply_value(self) -> Decimal:
         """
         Get sum supply value in this pool, unit is usd
         """
-        return Decimal(sum(self.supplies_value.values()))
+        return self._valuation.totals.supply_value
 
     @property
     def collateral_value(self) -> Dict[SupplyKey, Decimal]:
@@ -262,18 +291,14 @@ class AaveV3Market(Market):
         :return: value of all collaterals
         :rtype: Dict[SupplyKey, Decimal]
         """
-        if self._collaterals_amount_cache.empty:
-            for k, v in self._supplies.items():
-                if v.collateral:
-                    self._collaterals_amount_cache.set(k, self.supplies_value[k])
-        return self._collaterals_amount_cache.value
+        return self._valuation.collateral_value
 
     @property
     def total_collateral_value(self) -> Decimal:
         """
         Get sum supply value in this pool, unit is usd
         """
-        return Decimal(sum(self.collateral_value.values()))
+        return self._valuation.totals.collateral_value
 
     @property
     def borrows_value(self) -> Dict[BorrowKey, Decimal]:
@@ -283,23 +308,14 @@ class AaveV3Market(Market):
         :return: value of all borrows
         :rtype: Dict[BorrowKey, Decimal]
         """
-        if self._borrows_amount_cache.empty:
-            for k, v in self._borrows.items():
-                self._borrows_amount_cache.set(
-                    k,
-                    AaveV3CoreLib.get_amount(
-                        v.base_amount, self._market_status.data[k.token.name].variable_borrow_index
-                    )
-                    * self._price_status[k.token.name],
-                )
-        return self._borrows_amount_cache.value
+        return self._valuation.borrows_value
 
     @property
     def total_borrows_value(self) -> Decimal:
         """
         Get sum borrow value in this pool, unit is usd
         """
-        return Decimal(sum(self.borrows_value.values()))
+        return self._valuation.totals.borrow_value
 
     @property
     def supplies(self) -> Dict[SupplyKey, Supply]:
@@ -309,10 +325,7 @@ class AaveV3Market(Market):
         :return: Dict of supply information
         :rtype: Dict[SupplyKey, Supply]
         """
-        if self._supplies_cache.empty:
-            for key in self._supplies.keys():
-                self._supplies_cache.set(key, self.get_supply(supply_key=key))
-        return self._supplies_cache.value
+        return self._valuation.supplies
 
     @property
     def supply_keys(self) -> List[SupplyKey]:
@@ -330,10 +343,7 @@ class AaveV3Market(Market):
         :rtype: Dict[BorrowKey, Borrow]
 
         """
-        if self._borrows_cache.empty:
-            for key in self._borrows.keys():
-                self._borrows_cache.set(key, self.get_borrow(key))
-        return self._borrows_cache.value
+        return self._valuation.borrows
 
     @property
     def borrow_keys(self) -> List[BorrowKey]:
@@ -349,6 +359,15 @@ class AaveV3Market(Market):
         """
         return self._market_status
 
+    def _is_status_changed(self, data: AaveMarketStatus, price: pd.Series) -> bool:
+        # balance depends on index of reserves, and price of tokens
+        if price is None:
+            return True
+        token_prices = tuple(price.get(t.name) for t in self._tokens)
+        price_changed = token_prices != self._last_token_prices
+        self._last_token_prices = token_prices
+        return self._is_row_changed(data.timestamp) or price_changed
+
     def set_market_status(
         self,
         data: AaveMarketStatus,
@@ -367,57 +386,73 @@ class AaveV3Market(Market):
         if data.data is None:
             data.data = self.data.loc[data.timestamp]
         self._market_status = data
-        self._borrows_amount_cache.reset()
-        self._supplies_amount_cache.reset()
-        self._collaterals_amount_cache.reset()
-        self._borrows_cache.reset()
-        self._supplies_cache.reset()
+        self.__set_token_status(data.data)
+        self._valuation.set_market_status(self._token_status, price)
+
+    def __set_token_status(self, data: pd.Series):
+        """
+        Read status of every token from market status data, positions of fields are found only when index has changed.
+        """
+        if self._token_status_slots is None or (
+            data.index is not self._token_status_slots[0] and not data.index.equals(self._token_status_slots[0])
+        ):
+            fields: Dict[str, Dict[str, int]] = {}
+            for i, column in enumerate(data.index):
+                if isinstance(column, tuple) and len(column) == 2:
+                    fields.setdefault(column[0], {})[column[1]] = i
+            slots = {
+                name: tuple(f[c] for c in AaveV3Market.REQUIRED_DATA_COLUMN)
+                for name, f in fields.items()
+                if all(c in f for c in AaveV3Market.REQUIRED_DATA_COLUMN)
+            }
+            self._token_status_slots = (data.index, slots)
+        values = data.to_numpy()
+        # fields of AaveTokenStatus are in the same order with REQUIRED_DATA_COLUMN
+        self._token_status = {
+            name: AaveTokenStatus(*(values[i] for i in slot)) for name, slot in self._token_status_slots[1].items()
+        }
+
+    @property
+    def token_status(self) -> Dict[str, AaveTokenStatus]:
+        """
+        Get status of tokens in current market status, key is token name
+        """
+        return self._token_status
 
     @property
     def liquidation_threshold(self) -> Decimal:
         """
         Get liquidation threshold
         """
-        return AaveV3CoreLib.total_liquidation_threshold(self.collateral_value, self._risk_parameters)
+        return self._valuation.totals.liquidation_threshold
 
     @property
     def current_ltv(self) -> Decimal:
         """
         Get current ltv, it's the max ltv of current user
         """
-        return AaveV3CoreLib.current_ltv(self.collateral_value, self._risk_parameters)
+        return self._valuation.totals.current_ltv
 
     @property
     def health_factor(self) -> Decimal:
         """
         Get health factor
         """
-        return AaveV3CoreLib.health_factor(self.collateral_value, self.borrows_value, self._risk_parameters)
+        return self._valuation.totals.health_factor
 
     @property
     def supply_apy(self) -> Decimal:
         """
         Calculate apy of all supplies
         """
-        rate_dict: Dict[TokenInfo, Decimal] = {}
-        for k in self.supplies.keys():
-            rate_dict[k.token] = self._market_status.data[k.token.name].liquidity_rate
-
-        return AaveV3CoreLib.get_apy(self.supplies_value, rate_dict)
+        return self._valuation.totals.supply_apy
 
     @property
     def borrow_apy(self) -> Decimal:
         """
         Calculate apy of all borrows
         """
-        rate_dict: Dict[TokenInfo, Decimal] = {}
-        for k in self._borrows.keys():
-            if k.interest_rate_mode == InterestRateMode.variable:
-                rate_dict[k.token] = self._market_status.data[k.token.name].variable_borrow_rate
-            else:
-                rate_dict[k.token] = self._market_status.data[k.token.name].stable_borrow_rate
-
-        return AaveV3CoreLib.get_apy(self.borrows_value, rate_dict)
+        return self._valuation.totals.borrow_apy
 
     @property
     def total_apy(self) -> Decimal:
@@ -444,16 +479,7 @@ class AaveV3Market(Market):
         :rtype: Supply
         """
         key, token_info = AaveV3Market.__get_supply_key(supply_key, token_info)
-        supply_info = self._supplies[key]
-        supply_value = Supply(
-            token=token_info,
-            base_amount=supply_info.base_amount,
-            collateral=supply_info.collateral,
-            amount=supply_info.base_amount * self._market_status.data[key.token.name].liquidity_index,
-            apy=AaveV3CoreLib.rate_to_apy(self._market_status.data[key.token.name].liquidity_rate),
-            value=self.supplies_value[key],
-        )
-        return supply_value
+        return self._valuation.get_supply(key)
 
     def get_borrow(self, borrow_key: BorrowKey) -> Borrow:
         """
@@ -464,18 +490,33 @@ class AaveV3Market(Market):
         :return: details of borrow position
         :rtype: Borrow
         """
-        borrow_info = self._borrows[borrow_key]
-        return Borrow(
-            token=borrow_key.token,
-            base_amount=borrow_info.base_amount,
-            interest_rate_mode=borrow_key.interest_rate_mode,
-            amount=borrow_info.base_amount * self._market_status.data[borrow_key.token.name].variable_borrow_index,
-            apy=AaveV3CoreLib.rate_to_apy(
-                self.market_status.data[borrow_key.token.name].variable_borrow_rate
-                if borrow_key.interest_rate_mode == InterestRateMode.variable
-                else self.market_status.data[borrow_key.token.name].stable_borrow_rate
-            ),
-            value=self.borrows_value[borrow_key],
+        return self._valuation.get_borrow(borrow_key)
+
+    def get_health_factor_series(
+        self,
+        price: pd.DataFrame,
+        supplies: Dict[SupplyKey, SupplyInfo] | None = None,
+        borrows: Dict[BorrowKey, BorrowInfo] | None = None,
+    ) -> pd.Series | pd.DataFrame:
+        """
+        | Get health factor of positions at every timestamp of market data, positions are assumed to be static.
+        | It helps to know when positions will be liquidated before running back test.
+
+        :param price: price of tokens, such as prices set to actuator
+        :type price: DataFrame
+        :param supplies: supply positions, default is current supplies of this market
+        :type supplies: Dict[SupplyKey, SupplyInfo]
+        :param borrows: borrow positions, default is current borrows of this market
+        :type borrows: Dict[BorrowKey, BorrowInfo]
+        :return: health factor series, or DataFrame if base amounts are array
+        :rtype: Series | DataFrame
+        """
+        return helper.get_health_factor_series(
+            self.data,
+            price,
+            self._risk_parameters,
+            self._supplies if supplies is None else supplies,
+            self._borrows if borrows is None else borrows,
         )
 
     def add_token(self, token_info: TokenInfo | List[TokenInfo]):
@@ -600,7 +641,7 @@ class AaveV3Market(Market):
         """
         if collateral:
             require(self._risk_parameters.loc[token_info.name].canCollateral, "Can not supplied as collateral")
-        token_status = self._market_status.data[token_info.name]
+        token_status = self._token_status[token_info.name]
         #  calc in pool value
         pool_amount = AaveV3CoreLib.get_base_amount(amount, token_status.liquidity_index)
 
@@ -613,9 +654,7 @@ class AaveV3Market(Market):
             require(self._supplies[key].collateral == collateral, "Collateral different from existing supply")
         self._supplies[key].base_amount += pool_amount
 
-        self._supplies_amount_cache.reset()
-        self._supplies_cache.reset()
-        self._collaterals_amount_cache.reset()
+        self._valuation.update_supply(key)
 
         self._record_action(
             SupplyAction(
@@ -665,12 +704,12 @@ class AaveV3Market(Market):
             return key
 
         self._supplies[key].collateral = collateral
-        self._collaterals_amount_cache.reset()
+        self._valuation.update_collateral(key)
 
         if (not collateral) and self.health_factor < AaveV3CoreLib.HEALTH_FACTOR_LIQUIDATION_THRESHOLD:
             # revert
             self._supplies[SupplyKey(token_info)].collateral = old_collateral
-            self._collaterals_amount_cache.reset()
+            self._valuation.update_collateral(key)
             raise AssertionError("health factor lower than liquidation threshold")
 
         return key
@@ -694,7 +733,7 @@ class AaveV3Market(Market):
         :type token_info: TokenInfo
         """
         key, token_info = AaveV3Market.__get_supply_key(supply_key, token_info)
-        token_status = self._market_status.data[token_info.name]
+        token_status = self._token_status[token_info.name]
         supply = self.get_supply(key)
         if amount is None:
             amount = supply.amount
@@ -705,13 +744,14 @@ class AaveV3Market(Market):
         if self._supplies[key].collateral:
             old_base_amount = self._supplies[key].base_amount
             self._supplies[key].base_amount -= AaveV3CoreLib.get_base_amount(
-                amount, self._market_status.data[key.token.name].liquidity_index
+                amount, self._token_status[key.token.name].liquidity_index
             )
-            self._supplies_amount_cache.reset()
-            self._collaterals_amount_cache.reset()
-            if self.health_factor < AaveV3CoreLib.HEALTH_FACTOR_LIQUIDATION_THRESHOLD:
-                raise AssertionError("health factor lower than liquidation threshold")
+            self._valuation.update_supply(key)
+            health_factor = self.health_factor
             self._supplies[key].base_amount = old_base_amount
+            self._valuation.update_supply(key)
+            if health_factor < AaveV3CoreLib.HEALTH_FACTOR_LIQUIDATION_THRESHOLD:
+                raise AssertionError("health factor lower than liquidation threshold")
 
         final_base_amount = self.__sub_supply_amount(key, amount)
         self.broker.add_to_balance(token_info, amount)
@@ -788,7 +828,7 @@ class AaveV3Market(Market):
         if amount is None:
             amount = self.get_max_borrow_amount(token_info)
         # check
-        token_status = self._market_status.data[token_info.name]
+        token_status = self._token_status[token_info.name]
 
         require(self._risk_parameters.loc[token_info.name, "canBorrow"], f"borrow is not enabled for {token_info.name}")
         collateral_balance = sum(self.collateral_value.values())
@@ -829,8 +869,7 @@ class AaveV3Market(Market):
 
         self.broker.add_to_balance(token_info, amount)
 
-        self._borrows_amount_cache.reset()
-        self._borrows_cache.reset()
+        self._valuation.update_borrow(key)
 
         self._record_action(
             BorrowAction(
@@ -864,7 +903,7 @@ class AaveV3Market(Market):
         """
         (key, _, _) = AaveV3Market.__get_borrow_key(key, token_info, interest_rate_mode)
         return AaveV3CoreLib.get_amount(
-            self._borrows[key].base_amount, self.market_status.data[key.token.name].variable_borrow_index
+            self._borrows[key].base_amount, self._token_status[key.token.name].variable_borrow_index
         )
 
     @staticmethod
@@ -912,7 +951,7 @@ class AaveV3Market(Market):
         """
         (key, borrow_token, interest_rate_mode) = AaveV3Market.__get_borrow_key(key, borrow_token, interest_rate_mode)
         # because liqThereshold<1, so repay will collateral will increase health factor, so there is no need to check health factor
-        token_status = self._market_status.data[borrow_token.name]
+        token_status = self._token_status[borrow_token.name]
         borrow = self.get_borrow(key)
 
         if payback_amount is None:
@@ -968,18 +1007,14 @@ class AaveV3Market(Market):
                 raise DemeterError(f"{key} not exist in supplies")
         self._supplies[key].base_amount = helper.sub_base_amount(
             self._supplies[key].base_amount,
-            AaveV3CoreLib.get_base_amount(amount, self._market_status.data[key.token.name].liquidity_index),
+            AaveV3CoreLib.get_base_amount(amount, self._token_status[key.token.name].liquidity_index),
         )
-        if self._supplies[key].collateral:
-            self._collaterals_amount_cache.reset()
-        self._supplies_amount_cache.reset()
-        self._supplies_cache.reset()
         if self._supplies[key].base_amount == DECIMAL_0:
-            if self._supplies[key].collateral:
-                self._collaterals_amount_cache.reset()
             del self._supplies[key]
+            self._valuation.update_supply(key)
             return DECIMAL_0
         else:
+            self._valuation.update_supply(key)
             return self._supplies[key].base_amount
 
     def __sub_borrow_amount(self, key: BorrowKey, amount: Decimal) -> Decimal:
@@ -990,14 +1025,14 @@ class AaveV3Market(Market):
                 raise DemeterError(f"{key} not exist in borrows")
         self._borrows[key].base_amount = helper.sub_base_amount(
             self._borrows[key].base_amount,
-            AaveV3CoreLib.get_base_amount(amount, self._market_status.data[key.token.name].variable_borrow_index),
+            AaveV3CoreLib.get_base_amount(amount, self._token_status[key.token.name].variable_borrow_index),
         )
-        self._borrows_amount_cache.reset()
-        self._borrows_cache.reset()
         if self._borrows[key].base_amount == DECIMAL_0:
             del self._borrows[key]
+            self._valuation.update_borrow(key)
             return DECIMAL_0
         else:
+            self._valuation.update_borrow(key)
             return self._borrows[key].base_amount
 
     @write_func
@@ -1059,8 +1094,8 @@ class AaveV3Market(Market):
 
         """
         old_health_factor = self.health_factor
-        borrow_index = self._market_status.data[delt_token.name].variable_borrow_index
-        supply_index = self._market_status.data[delt_token.name].liquidity_index
+        borrow_index = self._token_status[delt_token.name].variable_borrow_index
+        supply_index = self._token_status[delt_token.name].liquidity_index
 
         stable_key = BorrowKey(delt_token, InterestRateMode.stable)
         variable_key = BorrowKey(delt_token, InterestRateMode.variable)
@@ -1092,7 +1127,7 @@ class AaveV3Market(Market):
 
         user_collateral_balance = (
             self._supplies[SupplyKey(collateral_token)].base_amount
-            * self._market_status.data[collateral_token.name].liquidity_index
+            * self._token_status[collateral_token.name].liquidity_index
         )
 
         # calculate actual amount
@@ -1132,11 +1167,7 @@ class AaveV3Market(Market):
             vari_debt_remaining_base = self.__sub_borrow_amount(variable_key, variable_delt)
             stable_debt_remaining_base = self.__sub_borrow_amount(stable_key, stable_debt_liquidated)
 
-        self._borrows_amount_cache.reset()
-        self._borrows_cache.reset()
-        self._supplies_amount_cache.reset()
-        self._supplies_cache.reset()
-        self._collaterals_amount_cache.reset()
+        self._valuation.update_supply(collateral_key)
 
         self._record_action(
             LiquidationAction(
@@ -1165,5 +1196,42 @@ class AaveV3Market(Market):
             )
         )
 
+    def _clone(self, price: pd.Series | None = None) -> "AaveV3Market":
+        """
+        | Copy this market with its positions and current market status, e.g. to try liquidation at other prices.
+        | Data and risk parameters are shared with this market, so they should not be changed.
+        | Actions of the copy are not recorded to broker.
+
+        :param price: price of tokens in the copy, default is current price
+        :type price: Series
+        :return: copy of this market
+        :rtype: AaveV3Market
+        """
+        market = copy.copy(self)
+        if price is not None:
+            market._price_status = price
+        market._supplies = {k: SupplyInfo(v.base_amount, v.collateral) for k, v in self._supplies.items()}
+        market._borrows = {k: BorrowInfo(v.base_amount) for k, v in self._borrows.items()}
+        market._valuation = AaveValuation(market._supplies, market._borrows, market._risk_parameters)
+        market._valuation.set_market_status(market._token_status, market._price_status)
+        market._record_action_callback = None
+        return market
+
     def _resample(self, freq: str):
         self._data = self.data.resample(freq).first()
+
+    def _get_columnar_metadata(self) -> Dict:
+        tokens = sorted(self._tokens, key=lambda t: t.name)
+        return {**super()._get_columnar_metadata(), "tokens": [[t.name, t.decimal] for t in tokens]}
+
+
+def _read_aave_csv(path: str) -> pd.DataFrame:
+    """
+    Read a daily csv file of aave token. Keep it in module level, so it can be used in other processes.
+    """
+    return pd.read_csv(
+        path,
+        converters={n: to_decimal for n in AaveV3Market.REQUIRED_DATA_COLUMN},
+        index_col=0,
+        parse_dates=True,
+    )
@@ -0,0 +1,142 @@
+from _decimal import Decimal
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from ._typing import SupplyKey, BorrowKey, Supply, Borrow, LiquidationAction
+from .market import AaveV3Market
+from .. import DemeterError
+from ..utils.pool import map_with_context
+
+
+@dataclass
+class AaveStressResult:
+    """
+    Result of a price shock scenario
+
+    :param health_factor_before: health factor after price shock, before liquidation
+    :type health_factor_before: Decimal
+    :param health_factor_after: health factor after liquidation
+    :type health_factor_after: Decimal
+    :param liquidations: liquidations happened in this scenario
+    :type liquidations: List[LiquidationAction]
+    :param supplies: supplies after liquidation, residual collaterals are supplies whose collateral is True
+    :type supplies: Dict[SupplyKey, Supply]
+    :param borrows: borrows after liquidation
+    :type borrows: Dict[BorrowKey, Borrow]
+    :param net_value: supply value minus borrow value after liquidation, unit is usd
+    :type net_value: Decimal
+    """
+
+    health_factor_before: Decimal
+    health_factor_after: Decimal
+    liquidations: List[LiquidationAction]
+    supplies: Dict[SupplyKey, Supply]
+    borrows: Dict[BorrowKey, Borrow]
+    net_value: Decimal
+
+
+def shock_price(price: pd.Series, token_name: str, changes: List[float | Decimal]) -> Dict[float | Decimal, pd.Series]:
+    """
+    Generate price scenarios by changing price of a token, e.g. changes=[-0.1, -0.2] means price fall 10% and 20%
+
+    :param price: current price of tokens
+    :type price: Series
+    :param token_name: which token to shock
+    :type token_name: str
+    :param changes: change rate of price
+    :type changes: List[float | Decimal]
+    :return: shocked prices, key is change rate
+    :rtype: Dict[float | Decimal, Series]
+    """
+    if token_name not in price.index:
+        raise DemeterError(f"{token_name} not found in price")
+    scenarios = {}
+    for change in changes:
+        new_price = price.copy()
+        new_price[token_name] = price[token_name] * (1 + Decimal(str(change)))
+        scenarios[change] = new_price
+    return scenarios
+
+
+def _run_scenario(origin_market: AaveV3Market, price: pd.Series) -> AaveStressResult:
+    """
+    Apply price to a copy of market, then liquidate just like AaveV3Market.update
+    """
+    market = origin_market._clone(price)
+    liquidations: List[LiquidationAction] = []
+
+    def record(action: LiquidationAction):
+        action.timestamp = market.market_status.timestamp
+        liquidations.append(action)
+
+    market._record_action_callback = record
+    health_factor_before = market.health_factor
+    market._liquidate()
+    return AaveStressResult(
+        health_factor_before=health_factor_before,
+        health_factor_after=market.health_factor,
+        liquidations=liquidations,
+        supplies=market.supplies,
+        borrows=market.borrows,
+        net_value=market.total_supply_value - market.total_borrows_value,
+    )
+
+
+def stress_test(
+    market: AaveV3Market,
+    scenarios: Dict[Any, pd.Series] | List[pd.Series],
+    processes: int = 1,
+    start_method: str | None = None,
+) -> Dict[Any, AaveStressResult]:
+    """
+    | Test how positions in aave market behave under price shocks.
+    | For each price scenario, positions and market status of market are copied, price is replaced,
+    | then liquidation is done just like in backtest. Market itself will not be changed.
+    | Scenarios can run in a process pool, with fork start method, workers share market by copy on write,
+    | otherwise market is pickled to each worker once.
+
+    :param market: market with positions and market status, e.g. aave market after backtest
+    :type market: AaveV3Market
+    :param scenarios: prices of scenarios, key is name of scenario, if it's a list, key will be its position
+    :type scenarios: Dict[Any, Series] | List[Series]
+    :param processes: count of processes, if it's 1, scenarios will run in current process
+    :type processes: int
+    :param start_method: start method of worker process, fork, spawn or forkserver. If None, platform default will be used
+    :type start_method: str
+    :return: result of each scenario
+    :rtype: Dict[Any, AaveStressResult]
+    """
+    if market.market_status is None or market.market_status.data is None:
+        raise DemeterError("market status is not set")
+    if isinstance(scenarios, list):
+        scenarios = dict(enumerate(scenarios))
+    if len(scenarios) == 0:
+        return {}
+    keys = list(scenarios.keys())
+    prices = [scenarios[k] for k in keys]
+    results = map_with_context(_run_scenario, market, prices, processes, start_method)
+    return dict(zip(keys, results))
+
+
+def stress_result_to_dataframe(results: Dict[Any, AaveStressResult]) -> pd.DataFrame:
+    """
+    Convert stress results to a dataframe, each row is a scenario
+
+    :param results: results of stress_test
+    :type results: Dict[Any, AaveStressResult]
+    :return: summary of scenarios
+    :rtype: DataFrame
+    """
+    return pd.DataFrame(
+        {
+            "health_factor_before": [r.health_factor_before for r in results.values()],
+            "health_factor_after": [r.health_factor_after for r in results.values()],
+            "liquidation_count": [len(r.liquidations) for r in results.values()],
+            "collateral_value": [sum(s.value for s in r.supplies.values() if s.collateral) for r in results.values()],
+            "borrow_value": [sum(b.value for b in r.borrows.values()) for r in results.values()],
+            "net_value": [r.net_value for r in results.values()],
+        },
+        index=list(results.keys()),
+    )
@@ -0,0 +1,375 @@
+from _decimal import Decimal
+from dataclasses import dataclass
+from typing import Dict, Set, Tuple
+
+import pandas as pd
+
+from ._typing import SupplyKey, BorrowKey, SupplyInfo, BorrowInfo, InterestRateMode, AaveTokenStatus, Supply, Borrow
+from .core import AaveV3CoreLib
+from .. import DECIMAL_0
+
+
+@dataclass
+class _TokenValuation:
+    """
+    Status of a token used in valuation, they are read from market status once, instead of on every query
+    """
+
+    liquidity_index: Decimal
+    variable_borrow_index: Decimal
+    liquidity_rate: Decimal
+    variable_borrow_rate: Decimal
+    stable_borrow_rate: Decimal
+    price: Decimal
+
+
+@dataclass
+class _Totals:
+    """
+    Aggregated values of all positions
+    """
+
+    supply_value: Decimal
+    collateral_value: Decimal
+    borrow_value: Decimal
+    health_factor: Decimal
+    current_ltv: Decimal
+    liquidation_threshold: Decimal
+    supply_apy: Decimal
+    borrow_apy: Decimal
+
+
+class AaveValuation(object):
+    """
+    | Values of supplies and borrows in aave market, and health factor, ltv, apy based on them.
+    | Value of each position is kept, and it is only re-calculated when index or price of its token changes,
+    | or the position is changed. So a new market status or a write only costs the tokens involved.
+    | Totals are summed in the order of positions when values have changed, then queries are answered from them,
+    | so results are exactly the same as calculating from scratch.
+    | Token status, risk parameters and apy are read or calculated once, then they are kept until they change.
+    | Details of positions(Supply and Borrow) are kept too, and only details of changed positions or tokens are rebuilt.
+
+    :param supplies: supplies of market, shared with market
+    :type supplies: Dict[SupplyKey, SupplyInfo]
+    :param borrows: borrows of market, shared with market
+    :type borrows: Dict[BorrowKey, BorrowInfo]
+    :param risk_parameters: risk parameters of the chain
+    :type risk_parameters: DataFrame
+    """
+
+    def __init__(
+        self,
+        supplies: Dict[SupplyKey, SupplyInfo],
+        borrows: Dict[BorrowKey, BorrowInfo],
+        risk_parameters: pd.DataFrame,
+    ):
+        self._supplies = supplies
+        self._borrows = borrows
+        self._risk_parameters = risk_parameters
+        self._token_data: Dict[str, AaveTokenStatus] = {}
+        self._prices: pd.Series | None = None
+        self._tokens: Dict[str, _TokenValuation] = {}
+        # tokens which should be compared with new market status
+        self._unchecked: Set[str] = set()
+        # token name -> (LTV, liqThereshold)
+        self._token_risks: Dict[str, Tuple[Decimal, Decimal]] = {}
+        # rate -> apy of each token and rate type, apy is expensive to calculate
+        self._apys: Dict[Tuple[str, str], Tuple[Decimal, Decimal]] = {}
+        self._supply_values: Dict[SupplyKey, Decimal] = {}
+        self._borrow_values: Dict[BorrowKey, Decimal] = {}
+        self._supply_details: Dict[SupplyKey, Supply] = {}
+        self._borrow_details: Dict[BorrowKey, Borrow] = {}
+        self._totals: _Totals | None = None
+
+    def set_market_status(self, token_data: Dict[str, AaveTokenStatus], prices: pd.Series):
+        """
+        Set new market status and prices. Tokens of positions will be checked when values are queried,
+        and only positions of changed tokens will be re-calculated.
+
+        :param token_data: status of tokens, key is token name
+        :type token_data: Dict[str, AaveTokenStatus]
+        :param prices: prices of tokens
+        :type prices: Series
+        """
+        self._token_data = token_data
+        self._prices = prices
+        self._unchecked = set(self._tokens.keys())
+
+    def update_supply(self, key: SupplyKey):
+        """
+        Supply position is changed, e.g. supply, withdraw or liquidate.
+        If key is removed from supplies, its value is removed too.
+        """
+        if key in self._supplies:
+            self._supply_values[key] = self.__supply_value(key)
+        else:
+            self._supply_values.pop(key, None)
+        self._supply_details.pop(key, None)
+        self._totals = None
+
+    def update_collateral(self, key: SupplyKey | None = None):
+        """
+        Collateral flag of a supply is changed, if key is None, details of all supplies will be rebuilt
+        """
+        if key is None:
+            self._supply_details.clear()
+        else:
+            self._supply_details.pop(key, None)
+        self._totals = None
+
+    def update_borrow(self, key: BorrowKey):
+        """
+        Borrow position is changed, e.g. borrow, repay or liquidate.
+        If key is removed from borrows, its value is removed too.
+        """
+        if key in self._borrows:
+            self._borrow_values[key] = self.__borrow_value(key)
+        else:
+            self._borrow_values.pop(key, None)
+        self._borrow_details.pop(key, None)
+        self._totals = None
+
+    def get_token(self, name: str) -> _TokenValuation:
+        """
+        Get status of a token, it's read from market status when it's not read or market status has changed.
+        """
+        if name in self._tokens and name not in self._unchecked:
+            return self._tokens[name]
+        status = self._token_data[name]
+        token = _TokenValuation(
+            liquidity_index=status.liquidity_index,
+            variable_borrow_index=status.variable_borrow_index,
+            liquidity_rate=status.liquidity_rate,
+            variable_borrow_rate=status.variable_borrow_rate,
+            stable_borrow_rate=status.stable_borrow_rate,
+            price=self._prices[name],
+        )
+        old_token = self._tokens.get(name)
+        self._tokens[name] = token
+        self._unchecked.discard(name)
+        if old_token is not None and (
+            old_token.liquidity_index != token.liquidity_index
+            or old_token.variable_borrow_index != token.variable_borrow_index
+            or old_token.price != token.price
+        ):
+            self.__revalue_token(name)
+            self.__forget_details(name)
+        elif old_token is not None and (
+            old_token.liquidity_rate != token.liquidity_rate
+            or old_token.variable_borrow_rate != token.variable_borrow_rate
+            or old_token.stable_borrow_rate != token.stable_borrow_rate
+        ):
+            self._totals = None
+            self.__forget_details(name)
+        return token
+
+    def get_apy(self, name: str, rate_type: str) -> Decimal:
+        """
+        Get apy of a token, rate_type is liquidity_rate, variable_borrow_rate or stable_borrow_rate
+        """
+        rate = getattr(self.get_token(name), rate_type)
+        cached = self._apys.get((name, rate_type))
+        if cached is None or cached[0] != rate:
+            cached = (rate, AaveV3CoreLib.rate_to_apy(rate))
+            self._apys[(name, rate_type)] = cached
+        return cached[1]
+
+    def get_token_risk(self, name: str) -> Tuple[Decimal, Decimal]:
+        """
+        Get LTV and liquidation threshold of a token
+        """
+        if name not in self._token_risks:
+            risk = self._risk_parameters.loc[name]
+            self._token_risks[name] = (risk.LTV, risk.liqThereshold)
+        return self._token_risks[name]
+
+    @staticmethod
+    def __borrow_rate_type(key: BorrowKey) -> str:
+        return (
+            "variable_borrow_rate" if key.interest_rate_mode == InterestRateMode.variable else "stable_borrow_rate"
+        )
+
+    def __forget_details(self, name: str):
+        """
+        Remove details of positions of a token, amount or apy of them has changed
+        """
+        if any(k.token.name == name for k in self._supply_details.keys()):
+            self._supply_details = {k: v for k, v in self._supply_details.items() if k.token.name != name}
+        if any(k.token.name == name for k in self._borrow_details.keys()):
+            self._borrow_details = {k: v for k, v in self._borrow_details.items() if k.token.name != name}
+
+    def __revalue_token(self, name: str):
+        for key in self._supply_values.keys():
+            if key.token.name == name:
+                self._supply_values[key] = self.__supply_value(key)
+        for key in self._borrow_values.keys():
+            if key.token.name == name:
+                self._borrow_values[key] = self.__borrow_value(key)
+        self._totals = None
+
+    def __supply_value(self, key: SupplyKey) -> Decimal:
+        token = self.get_token(key.token.name)
+        return AaveV3CoreLib.get_amount(self._supplies[key].base_amount, token.liquidity_index) * token.price
+
+    def __borrow_value(self, key: BorrowKey) -> Decimal:
+        token = self.get_token(key.token.name)
+        return AaveV3CoreLib.get_amount(self._borrows[key].base_amount, token.variable_borrow_index) * token.price
+
+    def __refresh(self):
+        """
+        | Value positions which are not valued, and forget removed positions,
+        | in case positions are added or removed without update_supply or update_borrow.
+        | Then compare tokens of positions with current market status, tokens without position are checked when used.
+        """
+        if self._supply_values.keys() != self._supplies.keys():
+            self._supply_values = {
+                k: self._supply_values[k] if k in self._supply_values else self.__supply_value(k)
+                for k in self._supplies.keys()
+            }
+            self._supply_details = {k: v for k, v in self._supply_details.items() if k in self._supplies}
+            self._totals = None
+        if self._borrow_values.keys() != self._borrows.keys():
+            self._borrow_values = {
+                k: self._borrow_values[k] if k in self._borrow_values else self.__borrow_value(k)
+                for k in self._borrows.keys()
+            }
+            self._borrow_details = {k: v for k, v in self._borrow_details.items() if k in self._borrows}
+            self._totals = None
+        if len(self._unchecked) == 0:
+            return
+        names = {k.token.name for k in self._supply_values.keys()} | {k.token.name for k in self._borrow_values.keys()}
+        for name in names & self._unchecked:
+            self.get_token(name)
+
+    @property
+    def supplies_value(self) -> Dict[SupplyKey, Decimal]:
+        """
+        Value of supplies, in the order of supplies
+        """
+        self.__refresh()
+        return {k: self._supply_values[k] for k in self._supplies.keys()}
+
+    @property
+    def collateral_value(self) -> Dict[SupplyKey, Decimal]:
+        """
+        Value of collaterals, in the order of supplies
+        """
+        self.__refresh()
+        return {k: self._supply_values[k] for k, v in self._supplies.items() if v.collateral}
+
+    @property
+    def borrows_value(self) -> Dict[BorrowKey, Decimal]:
+        """
+        Value of borrows, in the order of borrows
+        """
+        self.__refresh()
+        return {k: self._borrow_values[k] for k in self._borrows.keys()}
+
+    def __get_supply(self, key: SupplyKey) -> Supply:
+        detail = self._supply_details.get(key)
+        if detail is None:
+            info = self._supplies[key]
+            detail = Supply(
+                token=key.token,
+                base_amount=info.base_amount,
+                collateral=info.collateral,
+                amount=info.base_amount * self.get_token(key.token.name).liquidity_index,
+                apy=self.get_apy(key.token.name, "liquidity_rate"),
+                value=self._supply_values[key],
+            )
+            self._supply_details[key] = detail
+        return detail
+
+    def __get_borrow(self, key: BorrowKey) -> Borrow:
+        detail = self._borrow_details.get(key)
+        if detail is None:
+            info = self._borrows[key]
+            detail = Borrow(
+                token=key.token,
+                base_amount=info.base_amount,
+                interest_rate_mode=key.interest_rate_mode,
+                amount=info.base_amount * self.get_token(key.token.name).variable_borrow_index,
+                apy=self.get_apy(key.token.name, AaveValuation.__borrow_rate_type(key)),
+                value=self._borrow_values[key],
+            )
+            self._borrow_details[key] = detail
+        return detail
+
+    def get_supply(self, key: SupplyKey) -> Supply:
+        """
+        Get details of a supply position, it's rebuilt only if the position or its token has changed
+        """
+        self.__refresh()
+        return self.__get_supply(key)
+
+    def get_borrow(self, key: BorrowKey) -> Borrow:
+        """
+        Get details of a borrow position, it's rebuilt only if the position or its token has changed
+        """
+        self.__refresh()
+        return self.__get_borrow(key)
+
+    @property
+    def supplies(self) -> Dict[SupplyKey, Supply]:
+        """
+        Details of supplies, in the order of supplies
+        """
+        self.__refresh()
+        return {k: self.__get_supply(k) for k in self._supplies.keys()}
+
+    @property
+    def borrows(self) -> Dict[BorrowKey, Borrow]:
+        """
+        Details of borrows, in the order of borrows
+        """
+        self.__refresh()
+        return {k: self.__get_borrow(k) for k in self._borrows.keys()}
+
+    @property
+    def totals(self) -> _Totals:
+        """
+        Aggregated values, they are calculated only if positions, prices or indexes have changed
+        """
+        self.__refresh()
+        if self._totals is not None:
+            return self._totals
+        supply_sum = 0
+        collateral_sum = DECIMAL_0
+        collateral_ltv = DECIMAL_0
+        collateral_threshold = DECIMAL_0
+        supply_apy_sum = 0
+        for key, supply in self._supplies.items():
+            value = self._supply_values[key]
+            supply_sum += value
+            supply_apy_sum += value * self.get_apy(key.token.name, "liquidity_rate")
+            if supply.collateral:
+                ltv, threshold = self.get_token_risk(key.token.name)
+                collateral_sum += value
+                collateral_ltv += value * ltv
+                collateral_threshold += value * threshold
+        borrow_sum = 0
+        borrow_apy_sum = 0
+        for key in self._borrows.keys():
+            value = self._borrow_values[key]
+            borrow_sum += value
+            borrow_apy_sum += value * self.get_apy(key.token.name, AaveValuation.__borrow_rate_type(key))
+        supply_sum, borrow_sum = Decimal(supply_sum), Decimal(borrow_sum)
+        self._totals = _Totals(
+            supply_value=supply_sum,
+            collateral_value=collateral_sum,
+            borrow_value=borrow_sum,
+            health_factor=AaveV3CoreLib.safe_div(collateral_threshold, borrow_sum),
+            current_ltv=AaveV3CoreLib.safe_div(collateral_ltv, collateral_sum),
+            liquidation_threshold=AaveV3CoreLib.safe_div(collateral_threshold, collateral_sum),
+            supply_apy=(
+                AaveV3CoreLib.safe_div_zero(Decimal(supply_apy_sum), supply_sum)
+                if len(self._supplies) > 0
+                else DECIMAL_0
+            ),
+            borrow_apy=(
+                AaveV3CoreLib.safe_div_zero(Decimal(borrow_apy_sum), borrow_sum)
+                if len(self._borrows) > 0
+                else DECIMAL_0
+            ),
+        )
+        return self._totals
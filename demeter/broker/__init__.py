@@ -15,8 +15,12 @@ from ._typing import (
     MarketStatus,
     Rule,
     MarketTypeEnum,
+    NumericEnum,
     RowData,
     BASE_FREQ,
 )
 from .broker import Broker
 from .market import Market, write_func
+from .cursor import ColumnarCursor, RowView
+from .data_source import DataSource, DataChunk, DataFrameDataSource, ColumnarDataSource
+from .recorder import AccountStatusRecorder
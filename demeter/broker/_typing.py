@@ -32,6 +32,20 @@ class Rule(NamedTuple):
 #     row_id: int = None
 
 
+class NumericEnum(Enum):
+    """
+    Numeric type used in account valuation and recording
+
+    * decimal: exact, default
+    * float64: net value and account status are calculated and recorded in native float,
+      relative error of recorded values is below 1e-12.
+      Note: markets still simulate in Decimal, so it doesn't make backtest loop faster.
+    """
+
+    decimal = "decimal"
+    float64 = "float64"
+
+
 class MarketTypeEnum(Enum):
     uniswap_v3 = 1
     aave_v3 = 2
@@ -1,9 +1,22 @@
+import copy
+
 import pandas as pd
 from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Callable
-
-from ._typing import Asset, TokenInfo, AccountStatus, MarketDict, AssetDict, BaseAction, MarketTypeEnum
+from typing import Dict, Callable, Hashable, Tuple
+
+from ._typing import (
+    Asset,
+    TokenInfo,
+    AccountStatus,
+    MarketDict,
+    AssetDict,
+    BaseAction,
+    MarketTypeEnum,
+    NumericEnum,
+    MarketInfo,
+    MarketBalance,
+)
 from .market import Market
 from .._typing import DemeterError, UnitDecimal, STABLE_COINS
 from ..utils import get_formatted_from_dict, get_formatted_predefined, STYLE, float_param_formatter
@@ -18,9 +31,19 @@ class Broker:
     :type allow_negative_balance: bool
     :param record_action_callback: A callback function used to notify actions(buy/sell). When new actions is taken, this function will be called, and action instance will be passed as parameter. function should be like: def callback(action:BaseAction)
     :type record_action_callback: Callable[[BaseAction], None]
+    :param numeric: numeric type of account status. If it's float64, net values and balances in account status are float. Default is decimal
+    :type numeric: NumericEnum | str
+    :param reuse_market_balance: reuse market balance of the last bar if market version has not changed. Markets decide version by comparing a data row with the previous row, so only enable it if market status is set row by row, like actuator does. Default is False
+    :type reuse_market_balance: bool
     """
 
-    def __init__(self, allow_negative_balance=False, record_action_callback: Callable[[BaseAction], None] = None):
+    def __init__(
+        self,
+        allow_negative_balance=False,
+        record_action_callback: Callable[[BaseAction], None] = None,
+        numeric: NumericEnum | str = NumericEnum.decimal,
+        reuse_market_balance=False,
+    ):
         """
         init Broker
 
@@ -30,6 +53,12 @@ class Broker:
         self._markets: MarketDict[Market] = MarketDict()
         self._record_action_callback: Callable[[BaseAction], None] = record_action_callback
         self.quote_token = None
+        self.numeric: NumericEnum = NumericEnum(numeric)
+        self.reuse_market_balance: bool = reuse_market_balance
+        # market balances of last bar, with market version, reused if market has not changed
+        self._balance_cache: Dict[MarketInfo, Tuple[Hashable, MarketBalance]] = {}
+        # balances, prices and their value sum of last bar
+        self._asset_sum_cache: Tuple[Tuple, Tuple, Decimal | float] | None = None
 
     # region properties
 
@@ -170,9 +199,50 @@ class Broker:
         """
         return UnitDecimal(self.get_token_balance(token), token.name)
 
+    def clear_balance_cache(self):
+        """
+        Clear market balances and asset value kept from last get_account_status.
+        """
+        self._balance_cache.clear()
+        self._asset_sum_cache = None
+
+    def __get_market_balance(self, market_info: MarketInfo, market: Market, action_count: int, to_float: bool):
+        """
+        Get market balance, if market version and action count are not changed since last call, reuse the last one.
+        Action count of all markets is in the key, as an action may change positions in other market,
+        e.g. deposit uniswap position to squeeth vault.
+        """
+        key = (market.version, action_count, to_float)
+        cached = self._balance_cache.get(market_info)
+        if self.reuse_market_balance and cached is not None and cached[0] == key:
+            return cached[1]
+        ms = market.get_market_balance()
+        if to_float:
+            ms = copy.copy(ms)
+            for field_name, field_value in vars(ms).items():
+                if isinstance(field_value, Decimal):
+                    setattr(ms, field_name, float(field_value))
+        self._balance_cache[market_info] = (key, ms)
+        return ms
+
+    def __get_asset_sum(self, balances: Tuple, prices: Tuple):
+        """
+        Value of assets, only re-calculated if balance or price has changed
+        """
+        if (
+            self._asset_sum_cache is not None
+            and self._asset_sum_cache[0] == balances
+            and self._asset_sum_cache[1] == prices
+        ):
+            return self._asset_sum_cache[2]
+        asset_sum = sum([b * p for b, p in zip(balances, prices)])
+        self._asset_sum_cache = (balances, prices, asset_sum)
+        return asset_sum
+
     def get_account_status(self, prices: pd.Series | Dict[str, Decimal], timestamp=datetime | None) -> AccountStatus:
         """
-        Get account status, including net value, cash balance and balance in all markets
+        | Get account status, including net value, cash balance and balance in all markets.
+        | If reuse_market_balance is True, balance of a market is reused if market version has not changed since the last call.
 
         :param prices: current price, e.g. ('eth', Decimal('1610.553895752868641174609110')) ('usdc', 1)
         :type prices: pd.Series | Dict[str, Decimal]
@@ -182,10 +252,13 @@ class Broker:
         :rtype: AccountStatus
 
         """
+        if self.numeric == NumericEnum.float64:
+            return self.__get_account_status_float(prices, timestamp)
         account_status = AccountStatus(timestamp=timestamp)
+        action_count = sum(v.action_count for v in self.markets.values())
         market_sum = Decimal(0)
         for k, v in self.markets.items():
-            ms = v.get_market_balance()
+            ms = self.__get_market_balance(k, v, action_count, False)
             account_status.market_status[k] = ms
             if v.quote_token == self.quote_token:
                 market_sum += ms.net_value
@@ -193,9 +266,40 @@ class Broker:
                 market_sum += ms.net_value * prices[v.quote_token.name]
         account_status.market_status.set_default_key(self.markets.get_default_key())
 
+        balances, asset_prices = [], []
         for k, v in self.assets.items():
             account_status.asset_balances[k] = v.balance
-        asset_sum = sum([v * prices[k.name] for k, v in account_status.asset_balances.items()])
+            balances.append(v.balance)
+            asset_prices.append(prices[k.name])
+        asset_sum = self.__get_asset_sum(tuple(balances), tuple(asset_prices))
+
+        account_status.net_value = asset_sum + market_sum
+        return account_status
+
+    def __get_account_status_float(self, prices: pd.Series | Dict[str, float], timestamp) -> AccountStatus:
+        """
+        Float version of get_account_status, markets still calculate balance in Decimal,
+        but values in account status are converted to float, and net value is summed in float.
+        """
+        account_status = AccountStatus(timestamp=timestamp)
+        action_count = sum(v.action_count for v in self.markets.values())
+        market_sum = 0.0
+        for k, v in self.markets.items():
+            ms = self.__get_market_balance(k, v, action_count, True)
+            account_status.market_status[k] = ms
+            if v.quote_token == self.quote_token:
+                market_sum += ms.net_value
+            else:
+                market_sum += ms.net_value * float(prices[v.quote_token.name])
+        account_status.market_status.set_default_key(self.markets.get_default_key())
+
+        balances, asset_prices = [], []
+        for k, v in self.assets.items():
+            balance = float(v.balance)
+            account_status.asset_balances[k] = balance
+            balances.append(balance)
+            asset_prices.append(float(prices[k.name]))
+        asset_sum = self.__get_asset_sum(tuple(balances), tuple(asset_prices))
 
         account_status.net_value = asset_sum + market_sum
         return account_status
@@ -0,0 +1,194 @@
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .._typing import DemeterError
+
+
+class ColumnarCursor(object):
+    """
+    | Columnar, array backed view of a minutely dataframe.
+    | Every column is kept as a contiguous numpy array, and rows are addressed by position,
+    | so reading a row during backtest doesn't need a label lookup and a new Series.
+
+    Only dataframe with single level columns and unique index is supported.
+
+    :param data: dataframe to convert
+    :type data: DataFrame
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        if isinstance(data.columns, pd.MultiIndex):
+            raise DemeterError("multi index columns is not supported by cursor")
+        if not data.index.is_unique:
+            raise DemeterError("index of data should be unique")
+        self.columns: pd.Index = data.columns
+        self.index: pd.Index = data.index
+        self._column_ids: Dict[Any, int] = {c: i for i, c in enumerate(data.columns)}
+        self._arrays: List[np.ndarray] = [data.iloc[:, i].to_numpy() for i in range(len(data.columns))]
+        self._positions: Dict[Any, int] = {t: i for i, t in enumerate(data.index)}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, timestamp):
+        return timestamp in self._positions
+
+    def position(self, timestamp) -> int | None:
+        """
+        Get row position of a timestamp
+
+        :param timestamp: timestamp to find
+        :type timestamp: datetime
+        :return: row position, if timestamp is not in index, return None
+        :rtype: int | None
+        """
+        return self._positions.get(timestamp)
+
+    def column(self, name) -> np.ndarray:
+        """
+        Get array of a column
+
+        :param name: column name
+        :type name: str
+        :return: column array
+        :rtype: ndarray
+        """
+        return self._arrays[self._column_ids[name]]
+
+    def value(self, position: int, name):
+        """
+        Get value of a cell
+
+        :param position: row position
+        :type position: int
+        :param name: column name
+        :type name: str
+        """
+        return self._arrays[self._column_ids[name]][position]
+
+    def row(self, position: int) -> "RowView":
+        """
+        Get a row view by position
+
+        :param position: row position
+        :type position: int
+        :return: row view
+        :rtype: RowView
+        """
+        return RowView(self, position)
+
+    def row_at(self, timestamp) -> "RowView | None":
+        """
+        Get a row view by timestamp
+
+        :param timestamp: timestamp of the row
+        :type timestamp: datetime
+        :return: row view, if timestamp is not in index, return None
+        :rtype: RowView | None
+        """
+        position = self._positions.get(timestamp)
+        return None if position is None else RowView(self, position)
+
+
+class RowView(object):
+    """
+    | Lightweight view of a row in ColumnarCursor, it can be used like the Series returned by data.loc[timestamp].
+    | Values can be read by attribute (row.price) or by key (row["price"], row.loc["price"]).
+    | Values assigned to this view are kept in the view only, data in cursor will not be changed.
+
+    :param cursor: cursor this row belongs to
+    :type cursor: ColumnarCursor
+    :param position: row position
+    :type position: int
+    """
+
+    __slots__ = ("_cursor", "_position", "_overrides")
+
+    def __init__(self, cursor: ColumnarCursor, position: int):
+        self._cursor = cursor
+        self._position = position
+        self._overrides: Dict[Any, Any] = {}
+
+    def __getattr__(self, name):
+        # only called when normal attribute lookup failed
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(f"'RowView' object has no attribute '{name}'")
+
+    def __setattr__(self, name, value):
+        if name in RowView.__slots__:
+            object.__setattr__(self, name, value)
+        else:
+            self[name] = value
+
+    def __getitem__(self, key):
+        if key in self._overrides:
+            return self._overrides[key]
+        return self._cursor.value(self._position, key)
+
+    def __setitem__(self, key, value):
+        self._overrides[key] = value
+
+    def __contains__(self, key):
+        return key in self._cursor._column_ids or key in self._overrides
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self[k] for k in self.index)
+
+    def __repr__(self):
+        return repr(self.to_series())
+
+    @property
+    def loc(self) -> "RowView":
+        """
+        Compatible with Series.loc, so row.loc["price"] works
+        """
+        return self
+
+    @property
+    def index(self) -> pd.Index:
+        """
+        Column names of this row, the same as Series.index
+        """
+        if len(self._overrides) == 0:
+            return self._cursor.columns
+        return self._cursor.columns.append(pd.Index([k for k in self._overrides if k not in self._cursor._column_ids]))
+
+    @property
+    def name(self):
+        """
+        Timestamp of this row, the same as Series.name
+        """
+        return self._cursor.index[self._position]
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def keys(self) -> pd.Index:
+        return self.index
+
+    def items(self):
+        return ((k, self[k]) for k in self.index)
+
+    def copy(self) -> "RowView":
+        """
+        Copy this view, values assigned to the copy will not affect this one.
+        """
+        new_view = RowView(self._cursor, self._position)
+        new_view._overrides = dict(self._overrides)
+        return new_view
+
+    def to_series(self) -> pd.Series:
+        """
+        Convert to a pandas Series
+        """
+        index = self.index
+        return pd.Series(data=[self[k] for k in index], index=index, name=self.name, dtype=object)
@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .._typing import DemeterError
+from ..utils.columnar import ColumnarFile
+
+
+@dataclass
+class DataChunk:
+    """
+    A piece of market data, loaded by data source.
+
+    :param start: first timestamp of this chunk
+    :type start: Timestamp
+    :param end: last timestamp of this chunk
+    :type end: Timestamp
+    :param data: market data, it includes lookback rows before start
+    :type data: DataFrame
+    """
+
+    start: pd.Timestamp
+    end: pd.Timestamp
+    data: pd.DataFrame
+
+
+class DataSource(object):
+    """
+    | Source of market data which is loaded piece by piece, instead of loading the whole time range before backtest.
+    | Subclass should provide all timestamps of data, and load data of a timestamp range.
+    | Data of a timestamp can be more than one row, e.g. instruments of deribit option in an hour.
+    """
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        """
+        All timestamps in this source, in ascending order
+        """
+        raise NotImplementedError()
+
+    @property
+    def metadata(self) -> Dict[str, Any] | None:
+        """
+        Information saved with data, such as token decimals. If it's not None, market will check it.
+        """
+        return None
+
+    def load(self, start: int, end: int) -> pd.DataFrame:
+        """
+        Load data of timestamps in [start, end)
+
+        :param start: position of first timestamp
+        :type start: int
+        :param end: position of end timestamp(exclusive)
+        :type end: int
+        :return: market data
+        :rtype: DataFrame
+        """
+        raise NotImplementedError()
+
+    def iter_chunks(
+        self,
+        chunk_size: str = "1D",
+        lookback: int = 0,
+        prefetch: bool = True,
+    ) -> Iterator[DataChunk]:
+        """
+        | Iterate data in chunks. Timestamps are grouped by chunk_size, e.g. a chunk for each day.
+        | If prefetch is enabled, next chunk is loaded by a background thread while current chunk is used.
+        | A chunk is released when the iterator moves on, so only current and next chunk are kept in memory.
+
+        :param chunk_size: time span of a chunk, such as 1D, 12h
+        :type chunk_size: str
+        :param lookback: count of timestamps before a chunk to include, so indicators and twap can be calculated at the start of chunk
+        :type lookback: int
+        :param prefetch: load next chunk in background
+        :type prefetch: bool
+        :return: chunks of data
+        :rtype: Iterator[DataChunk]
+        """
+        timestamps = self.timestamps
+        if len(timestamps) == 0:
+            return
+        groups = timestamps.floor(chunk_size).to_numpy()
+        bounds = np.append(np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]), len(timestamps))
+
+        def load_chunk(i: int) -> DataChunk:
+            start, end = bounds[i], bounds[i + 1]
+            return DataChunk(timestamps[start], timestamps[end - 1], self.load(max(start - lookback, 0), end))
+
+        if not prefetch:
+            for i in range(len(bounds) - 1):
+                yield load_chunk(i)
+            return
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="demeter-prefetch") as executor:
+            future = executor.submit(load_chunk, 0)
+            for i in range(len(bounds) - 1):
+                chunk = future.result()
+                if i + 2 < len(bounds):
+                    future = executor.submit(load_chunk, i + 1)
+                yield chunk
+                del chunk
+
+
+class DataFrameDataSource(DataSource):
+    """
+    Data source of a loaded dataframe, it's useful to test streaming and indicators in chunks.
+
+    :param data: market data, indexed by timestamp, or by multi index whose first level is timestamp
+    :type data: DataFrame
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        self._data = data
+        row_times = data.index.get_level_values(0)
+        if not row_times.is_monotonic_increasing:
+            raise DemeterError("timestamps of data should be sorted")
+        self._timestamps = pd.DatetimeIndex(row_times.unique())
+        self._row_starts = row_times.searchsorted(self._timestamps)
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        return self._timestamps
+
+    def load(self, start: int, end: int) -> pd.DataFrame:
+        row_end = self._row_starts[end] if end < len(self._row_starts) else len(self._data.index)
+        return self._data.iloc[self._row_starts[start] : row_end].copy()
+
+
+class ColumnarDataSource(DataSource):
+    """
+    | Data source of a columnar file saved by Market.save_columnar.
+    | Rows of a chunk are decoded when the chunk is loaded, columns are mapped to memory,
+    | so data larger than memory can be used in backtest.
+
+    :param path: folder of columnar file
+    :type path: str
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._file = ColumnarFile(path)
+        row_times = self._file.index_level(0)
+        if len(row_times) > 1 and np.any(row_times[1:] < row_times[:-1]):
+            raise DemeterError("timestamps of columnar file should be sorted")
+        # rows of a timestamp are continuous, e.g. instruments of deribit in an hour
+        self._row_starts = np.flatnonzero(np.r_[len(row_times) > 0, row_times[1:] != row_times[:-1]])
+        self._timestamps = pd.DatetimeIndex(row_times[self._row_starts])
+
+    @property
+    def path(self) -> str:
+        """
+        Folder of columnar file
+        """
+        return self._path
+
+    @property
+    def timestamps(self) -> pd.DatetimeIndex:
+        return self._timestamps
+
+    @property
+    def metadata(self) -> Dict[str, Any] | None:
+        return self._file.metadata
+
+    def load(self, start: int, end: int) -> pd.DataFrame:
+        row_end = self._row_starts[end] if end < len(self._row_starts) else len(self._file)
+        return self._file.to_dataframe(self._row_starts[start], row_end)
@@ -1,12 +1,16 @@
 import logging
 from decimal import Decimal
 from functools import wraps
-from typing import Dict, Callable
+from typing import Dict, Callable, Hashable, Iterator, List, Tuple
 
+import numpy as np
 import pandas as pd
 
 from ._typing import BaseAction, MarketBalance, MarketStatus, MarketInfo, RowData
+from .cursor import ColumnarCursor
+from .data_source import DataChunk, DataSource, ColumnarDataSource
 from .._typing import DECIMAL_0, DemeterError, TokenInfo, USD
+from ..utils.columnar import ColumnarFile, save_columnar
 
 DEFAULT_DATA_PATH = "./data"
 
@@ -62,6 +66,19 @@ class Market:
         # or it will be false until timestamp is on its interval
         self.is_open: bool = True
         self.quote_token: TokenInfo = USD
+        # columnar view of data, only available in fast cursor mode of actuator
+        self._cursor: ColumnarCursor | None = None
+        # increase when market status or positions might have changed, so broker can reuse balance of last bar
+        self._status_version: int = 0
+        self._action_count: int = 0
+        # data, index and eventful mask of data, built when first used
+        self._changed_rows: Tuple[pd.DataFrame, pd.Index, np.ndarray] | None = None
+        # streamed data, see set_data_source
+        self._data_source: DataSource | None = None
+        self._stream_params: Tuple[str, int, bool] = ("1D", 0, True)
+        self._chunks: Iterator[DataChunk] | None = None
+        self._chunk: DataChunk | None = None
+        self._window_columns: List[Tuple[Hashable, Callable[[pd.DataFrame], pd.Series], int]] = []
 
     def __str__(self):
         return f"{self._market_info.name}:{type(self).__name__}"
@@ -93,10 +110,69 @@ class Market:
         """
         if isinstance(value, pd.DataFrame):
             self._data = value
+            self._status_version += 1
         else:
             raise ValueError()
 
+    @property
+    def version(self) -> Hashable:
+        """
+        | Version of market status, it will change when market balance might change,
+        | e.g. data row or price has changed, or an action has been taken in this market.
+        | If version is not changed, broker will reuse market balance of the last bar.
+
+        :return: version of this market
+        :rtype: Hashable
+        """
+        return self._status_version, self._action_count
+
+    @property
+    def action_count(self) -> int:
+        """
+        Count of actions taken in this market
+        """
+        return self._action_count
+
+    def mark_dirty(self):
+        """
+        Notify broker that market balance has changed, and should be re-calculated.
+        """
+        self._status_version += 1
+
+    def _is_status_changed(self, data: MarketStatus, price: pd.Series) -> bool:
+        """
+        | If market balance might be changed by new market status and price, called in set_market_status.
+        | By default, it's always true, subclass can override it so balance of unchanged bars can be reused.
+
+        :param data: new market status
+        :type data: MarketStatus
+        :param price: new price
+        :type price: Series
+        :return: true if market balance should be re-calculated
+        :rtype: bool
+        """
+        return True
+
+    def _is_row_changed(self, timestamp) -> bool:
+        """
+        If data row at timestamp is different from the previous row, according to get_eventful_rows.
+        If timestamp is not in data, return true.
+        """
+        if self._data is None:
+            return True
+        if self._changed_rows is None or self._changed_rows[0] is not self._data:
+            index = self._data.index
+            if isinstance(index, pd.MultiIndex):
+                index = index.get_level_values(0).unique()
+            self._changed_rows = (self._data, index, self.get_eventful_rows(index))
+        _, index, mask = self._changed_rows
+        try:
+            return bool(mask[index.get_loc(timestamp)])
+        except KeyError:
+            return True
+
     def _record_action(self, action: BaseAction):
+        self._action_count += 1
         if self._record_action_callback is not None:
             self._record_action_callback(action)
 
@@ -139,10 +215,61 @@ class Market:
 
         """
         # self._market_status = data
+        if self._is_status_changed(data, price):
+            self._status_version += 1
         self._price_status = price
-        self.is_open = True if self._data is None or data.timestamp in self._data.index else False
+        if self._data is None:
+            self.is_open = True
+        elif self._cursor is not None:
+            self.is_open = data.timestamp in self._cursor
+        else:
+            self.is_open = data.timestamp in self._data.index
         self.has_update = False
 
+    def build_cursor(self) -> ColumnarCursor | None:
+        """
+        | Build a columnar cursor over market data, so status of each row can be read without label lookup.
+        | If data can not be represented by a cursor(e.g. multi index), return None, and market will keep using data.loc.
+
+        :return: cursor of market data
+        :rtype: ColumnarCursor | None
+        """
+        if (
+            not isinstance(self._data, pd.DataFrame)
+            or not isinstance(self._data.index, pd.DatetimeIndex)
+            or isinstance(self._data.columns, pd.MultiIndex)
+            or not self._data.index.is_unique
+        ):
+            return None
+        return ColumnarCursor(self._data)
+
+    @property
+    def cursor(self) -> ColumnarCursor | None:
+        """
+        Columnar cursor of market data, it's None if fast cursor mode is not enabled.
+        """
+        return self._cursor
+
+    @cursor.setter
+    def cursor(self, value: ColumnarCursor | None):
+        self._cursor = value
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        | Get rows where market status might change, used in sparse mode of actuator.
+        | In other rows, balance of this market should be the same as the previous row.
+        | By default, a row is eventful if any column is different from the previous row.
+
+        :param index: timestamps of backtest
+        :type index: DatetimeIndex
+        :return: a bool array with the same length of index, true means eventful
+        :rtype: ndarray
+        """
+        if self._data is None or not isinstance(self._data.index, pd.DatetimeIndex):
+            return np.full(len(index), True)
+        changed = self._data.ne(self._data.shift()).any(axis=1)
+        return changed.reindex(index, fill_value=True).to_numpy(dtype=bool)
+
     def get_market_balance(self) -> MarketBalance:
         """
         Get market asset balance, such as current positions, net values
@@ -164,4 +291,160 @@ class Market:
         """
         pass
 
+    def _get_columnar_metadata(self) -> Dict:
+        """
+        Information about data saved in columnar file, it should be the same when loading.
+        Subclass can add token decimals, pool info, etc.
+        """
+        return {"market": type(self).__name__}
+
+    def save_columnar(self, path: str):
+        """
+        | Save market data to a columnar file, it's a folder with one npy file for each column.
+        | It can be loaded by load_columnar quickly, and processes loading the same file share memory.
+
+        :param path: folder to save
+        :type path: str
+        """
+        if self._data is None:
+            raise DemeterError("data is empty")
+        save_columnar(self._data, path, self._get_columnar_metadata())
+
+    def load_columnar(self, path: str, chunk_size: str | None = None):
+        """
+        | Load market data from a columnar file saved by save_columnar.
+        | If chunk_size is None, the whole file is loaded into data. Native columns(e.g. float, int) are mapped to memory,
+        | so processes loading the same file share page cache. But Decimal and text columns are decoded to python objects,
+        | they are kept in private memory of each process, e.g. most columns of uniswap. So it only saves parse time.
+        | To share memory, set chunk_size, then market will stream data from the file by ColumnarDataSource,
+        | mapped arrays are kept as storage, and only rows of current chunk are decoded.
+
+        :param path: folder of columnar file
+        :type path: str
+        :param chunk_size: time span of a chunk to decode, such as 1D, 12h. If None, decode the whole file.
+        :type chunk_size: str
+        """
+        if chunk_size is not None:
+            self.set_data_source(ColumnarDataSource(path), chunk_size)
+            return
+        columnar_file = ColumnarFile(path)
+        expected = self._get_columnar_metadata()
+        if columnar_file.metadata != expected:
+            raise DemeterError(f"columnar file is saved by {columnar_file.metadata}, but current market is {expected}")
+        self.logger.info(f"start load columnar file {path}")
+        self._data = columnar_file.to_dataframe()
+        self.logger.info("data has been prepared")
+
+    @property
+    def data_source(self) -> DataSource | None:
+        """
+        Source of streamed market data, it's None if data is loaded as a whole.
+        """
+        return self._data_source
+
+    @property
+    def stream_lookback(self) -> int:
+        """
+        | Count of timestamps before a chunk which this market needs, e.g. twap of squeeth needs prices of last few minutes.
+        | Subclass should override it if data before current timestamp is read.
+        """
+        return 0
+
+    def set_data_source(self, source: DataSource, chunk_size: str = "1D", lookback: int = 0, prefetch: bool = True):
+        """
+        | Stream market data from a source instead of loading the whole time range.
+        | During backtest, data is a chunk of the source(e.g. a day), with lookback timestamps before the chunk.
+        | Next chunk is loaded in background, and old chunks are released.
+        | Indicators should be added by add_window_column, so they are calculated on every chunk.
+
+        :param source: data source, such as ColumnarDataSource
+        :type source: DataSource
+        :param chunk_size: time span of a chunk, such as 1D, 12h
+        :type chunk_size: str
+        :param lookback: count of timestamps before a chunk to keep, it should be larger than lookback of window columns
+        :type lookback: int
+        :param prefetch: load next chunk in background
+        :type prefetch: bool
+        """
+        expected = self._get_columnar_metadata()
+        if source.metadata is not None and source.metadata != expected:
+            raise DemeterError(f"data source is saved by {source.metadata}, but current market is {expected}")
+        self.stop_stream()
+        self._data_source = source
+        self._stream_params = (chunk_size, max(lookback, self.stream_lookback), prefetch)
+        self._window_columns = []
+        self._chunk = None
+        self._data = None
+
+    def start_stream(self):
+        """
+        Start iterating chunks of data source, and load the first chunk. It's called by actuator before backtest.
+        """
+        if self._data_source is None:
+            raise DemeterError("data source is not set")
+        self.stop_stream()
+        chunk_size, lookback, prefetch = self._stream_params
+        self._chunks = self._data_source.iter_chunks(chunk_size, lookback, prefetch)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            raise DemeterError("data source is empty")
+        self.__set_chunk(chunk)
+
+    def advance_stream(self, timestamp: pd.Timestamp) -> bool:
+        """
+        Move to the chunk which contains timestamp, previous chunks are released.
+
+        :param timestamp: current timestamp
+        :type timestamp: Timestamp
+        :return: True if data has changed to another chunk
+        :rtype: bool
+        """
+        changed = False
+        while self._chunks is not None and timestamp > self._chunk.end:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self.__set_chunk(chunk)
+            changed = True
+        return changed
+
+    def stop_stream(self):
+        """
+        Stop iterating chunks, background loading will be stopped. Current chunk is kept in data.
+        """
+        if self._chunks is not None:
+            self._chunks.close()
+            self._chunks = None
+
+    def __set_chunk(self, chunk: DataChunk):
+        self._chunk = chunk
+        data = chunk.data
+        for name, func, _ in self._window_columns:
+            data[name] = func(data)
+        self._data = data
+        self._status_version += 1
+
+    def add_window_column(self, name: Hashable, func: Callable[[pd.DataFrame], pd.Series], lookback: int = 0):
+        """
+        | Add a column which is calculated from data, such as moving average.
+        | If data is streamed, func will be called on every chunk, chunk has lookback timestamps before it,
+        | so rolling indicators whose window is not larger than lookback are the same as being calculated on whole data.
+        | If data is not streamed, func is called on data once.
+
+        :param name: column name
+        :type name: Hashable
+        :param func: function to calculate column, parameter is market data(or a chunk of it)
+        :type func: Callable[[DataFrame], Series]
+        :param lookback: count of timestamps before current timestamp which func needs
+        :type lookback: int
+        """
+        if self._data_source is not None:
+            if lookback > self._stream_params[1]:
+                raise DemeterError(
+                    f"lookback of column {name} is {lookback}, but data source only keeps {self._stream_params[1]}"
+                )
+            self._window_columns.append((name, func, lookback))
+        if self._data is not None:
+            self._data[name] = func(self._data)
+
     # endregion
@@ -0,0 +1,271 @@
+import copy
+import os
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ._typing import AccountStatus, AssetDict, MarketDict, MarketInfo
+from .._typing import DemeterError, TokenInfo
+from ..utils.columnar import join_decimal, split_decimal
+
+DEFAULT_CHUNK_SIZE = 1440 * 30
+# Decimal is kept in 128 bit mantissa(high and low part) and exponent, the same as decimal128 in columnar file
+DECIMAL_DTYPE = np.dtype([("high", np.int64), ("low", np.uint64), ("exp", np.int8)])
+_INT128_LIMIT = 2**127
+_LOW_MASK = 2**64 - 1
+
+
+def _to_decimal_record(value) -> Tuple[int, int, int] | None:
+    """
+    Convert Decimal to a record of DECIMAL_DTYPE, return None if it's not a Decimal or can not be kept in the record,
+    such as NaN or too many digits.
+    """
+    if not isinstance(value, Decimal):
+        return None
+    split = split_decimal(value)
+    if split is None or abs(split[0]) >= _INT128_LIMIT or not -128 <= split[1] <= 127:
+        return None
+    return split[0] >> 64, split[0] & _LOW_MASK, split[1]
+
+
+class AccountStatusRecorder(object):
+    """
+    | Record account status in preallocated columns, instead of keeping a list of AccountStatus.
+    | Values of each bar are written into column buffers directly, so there is no object graph for every bar,
+    | and dataframe can be built from buffers without conversion.
+    | Decimal values are kept in typed buffers of mantissa and exponent, and decoded to Decimal when they are read.
+    | If a Decimal can not be kept in 128 bit mantissa, e.g. NaN, or type of a column changes, the column falls back
+    | to an object buffer.
+    | It can be used like a list of AccountStatus, e.g. recorder[-1], len(recorder).
+    | If spill_path is set, buffers will be saved to files every chunk_size rows, to keep memory usage low.
+    | Spilled files are merged back and removed by merge_spilled after backtest, or removed by clear.
+
+    :param length: rows to preallocate, usually it's the length of backtest
+    :type length: int
+    :param spill_path: folder to save full chunks, if None, all rows are kept in memory
+    :type spill_path: str
+    :param chunk_size: row count of a chunk, only used when spill_path is set
+    :type chunk_size: int
+    """
+
+    def __init__(self, length: int, spill_path: str | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._length = length
+        self._spill_path = spill_path
+        self._capacity = min(length, chunk_size) if spill_path is not None else length
+        self._capacity = max(self._capacity, 1)
+        self._columns: List[Tuple[str, str]] = []
+        self._buffers: List[np.ndarray] = []
+        self._timestamps: np.ndarray | None = None
+        self._size = 0  # rows in memory
+        self._spilled_files: List[str] = []
+        self._spilled_rows = 0
+        # last spilled chunk read by __getitem__, (chunk id, dataframe)
+        self._loaded_chunk: Tuple[int, pd.DataFrame] | None = None
+        # used to rebuild AccountStatus
+        self._assets: List[TokenInfo] = []
+        self._markets: List[Tuple[MarketInfo, Any, List[str]]] = []
+        self._default_market: MarketInfo | None = None
+
+    def __len__(self):
+        return self._spilled_rows + self._size
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, item: int | slice) -> AccountStatus | List[AccountStatus]:
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("account status index out of range")
+        if item >= self._spilled_rows:
+            row = item - self._spilled_rows
+            return self.__to_status(
+                self._timestamps[row], [AccountStatusRecorder.__decode_value(b, row) for b in self._buffers]
+            )
+        chunk_id = item // self._capacity
+        if self._loaded_chunk is None or self._loaded_chunk[0] != chunk_id:
+            self._loaded_chunk = chunk_id, pd.read_pickle(self._spilled_files[chunk_id])
+        chunk = self._loaded_chunk[1]
+        row = chunk.iloc[item % self._capacity]
+        return self.__to_status(chunk.index[item % self._capacity], list(row))
+
+    def __init_columns(self, status: AccountStatus):
+        self._columns.append(("net_value", ""))
+        values = [status.net_value]
+        for token, balance in status.asset_balances.items():
+            self._assets.append(token)
+            self._columns.append(("tokens", token.name))
+            values.append(balance)
+        for market_info, market_balance in status.market_status.items():
+            field_names = list(vars(market_balance).keys())
+            self._markets.append((market_info, market_balance, field_names))
+            for field_name in field_names:
+                self._columns.append((market_info.name, field_name))
+                values.append(getattr(market_balance, field_name))
+        self._default_market = status.market_status.get_default_key()
+        self._buffers = [np.empty(self._capacity, dtype=AccountStatusRecorder.__get_dtype(v)) for v in values]
+        self._timestamps = np.empty(self._capacity, dtype="datetime64[ns]")
+
+    @staticmethod
+    def __get_dtype(value) -> Any:
+        if isinstance(value, (bool, np.bool_)):
+            return object
+        if isinstance(value, (int, np.integer)) and not isinstance(value, Decimal):
+            return np.int64
+        if isinstance(value, (float, np.floating)):
+            return np.float64
+        if _to_decimal_record(value) is not None:
+            return DECIMAL_DTYPE
+        return object
+
+    @staticmethod
+    def __decode_value(buffer: np.ndarray, row: int) -> Any:
+        if buffer.dtype != DECIMAL_DTYPE:
+            return buffer[row]
+        high, low, exp = buffer[row].item()
+        return join_decimal((high << 64) | low, exp)
+
+    @staticmethod
+    def __decode(buffer: np.ndarray, size: int) -> np.ndarray:
+        """
+        Get first size values of a buffer, decimal buffer is decoded to Decimal, others are not copied.
+        """
+        if buffer.dtype != DECIMAL_DTYPE:
+            return buffer[:size]
+        result = np.empty(size, dtype=object)
+        highs, lows, exps = (buffer[field][:size].tolist() for field in ("high", "low", "exp"))
+        result[:] = [join_decimal((h << 64) | low, e) for h, low, e in zip(highs, lows, exps)]
+        return result
+
+    @staticmethod
+    def __encode(values: np.ndarray) -> np.ndarray:
+        """
+        Convert Decimal values to a decimal buffer if possible
+        """
+        if values.dtype != object or len(values) == 0:
+            return values
+        records = [_to_decimal_record(v) for v in values]
+        if any(r is None for r in records):
+            return values
+        return np.array(records, dtype=DECIMAL_DTYPE)
+
+    def __to_status(self, timestamp, values: List) -> AccountStatus:
+        status = AccountStatus(timestamp=pd.Timestamp(timestamp).to_pydatetime(), net_value=values[0])
+        status.asset_balances = AssetDict()
+        status.market_status = MarketDict()
+        i = 1
+        for token in self._assets:
+            status.asset_balances[token] = values[i]
+            i += 1
+        for market_info, template, field_names in self._markets:
+            balance = copy.copy(template)
+            for field_name in field_names:
+                setattr(balance, field_name, values[i])
+                i += 1
+            status.market_status[market_info] = balance
+        status.market_status.set_default_key(self._default_market)
+        return status
+
+    def append(self, status: AccountStatus):
+        """
+        Write account status of a bar into buffers
+
+        :param status: account status
+        :type status: AccountStatus
+        """
+        if len(self._columns) == 0:
+            self.__init_columns(status)
+        if self._size >= self._capacity:
+            if self._spill_path is not None:
+                self.__spill()
+            else:
+                self.__grow()
+        row = self._size
+        self._timestamps[row] = np.datetime64(status.timestamp, "ns")
+        values = [status.net_value]
+        values.extend(status.asset_balances.data.values())
+        for market_balance in status.market_status.data.values():
+            values.extend(vars(market_balance).values())
+        if len(values) != len(self._buffers):
+            raise DemeterError("column count of account status has changed")
+        for i, value in enumerate(values):
+            buffer = self._buffers[i]
+            if buffer.dtype == DECIMAL_DTYPE:
+                record = _to_decimal_record(value)
+                if record is not None:
+                    buffer[row] = record
+                    continue
+                # fallback to object, so no precision is lost
+                decoded = AccountStatusRecorder.__decode(buffer, row)
+                buffer = self._buffers[i] = np.empty(self._capacity, dtype=object)
+                buffer[:row] = decoded
+            elif buffer.dtype != object and AccountStatusRecorder.__get_dtype(value) != buffer.dtype:
+                # type of this column has changed, e.g. from int to Decimal, fallback to object, so no precision is lost
+                buffer = self._buffers[i] = buffer.astype(object)
+            buffer[row] = value
+        self._size += 1
+
+    def __grow(self):
+        self._capacity = self._capacity * 2
+        self._buffers = [np.resize(b, self._capacity) for b in self._buffers]
+        self._timestamps = np.resize(self._timestamps, self._capacity)
+
+    def __spill(self):
+        os.makedirs(self._spill_path, exist_ok=True)
+        file_name = os.path.join(self._spill_path, f"account_status_{id(self)}_{len(self._spilled_files)}.pkl")
+        self.__buffer_to_dataframe().copy().to_pickle(file_name)
+        self._spilled_files.append(file_name)
+        self._spilled_rows += self._size
+        self._size = 0
+
+    def __buffer_to_dataframe(self) -> pd.DataFrame:
+        data: Dict[Tuple[str, str], np.ndarray] = {
+            c: AccountStatusRecorder.__decode(b, self._size) for c, b in zip(self._columns, self._buffers)
+        }
+        df = pd.DataFrame(data, index=pd.DatetimeIndex(self._timestamps[: self._size]), copy=False)
+        df.columns = pd.MultiIndex.from_tuples(self._columns, names=["l1", "l2"])
+        return df
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Get account status in dataframe, column format is the same as AccountStatus.to_dataframe.
+        Numeric columns in memory are wrapped without copy, Decimal columns are decoded.
+
+        :return: account status dataframe
+        :rtype: DataFrame
+        """
+        if len(self) == 0:
+            return pd.DataFrame()
+        df = self.__buffer_to_dataframe()
+        if len(self._spilled_files) == 0:
+            return df
+        return pd.concat([pd.read_pickle(f) for f in self._spilled_files] + [df])
+
+    def merge_spilled(self):
+        """
+        | Load spilled files and rows in memory into buffers, then remove spilled files.
+        | It's called after backtest, when all rows will be kept in account_status_df anyway.
+        """
+        if len(self._spilled_files) == 0:
+            return
+        df = self.to_dataframe()
+        self._buffers = [AccountStatusRecorder.__encode(df.iloc[:, i].to_numpy()) for i in range(len(self._columns))]
+        self._timestamps = df.index.to_numpy()
+        self._size = self._capacity = len(df.index)
+        self._spilled_rows = 0
+        self.clear()
+
+    def clear(self):
+        """
+        Remove spilled files
+        """
+        for f in self._spilled_files:
+            if os.path.exists(f):
+                os.remove(f)
+        self._spilled_files = []
+        self._loaded_chunk = None
@@ -3,3 +3,5 @@ Core module of demeter, includes actuator and evaluating indicator
 """
 
 from .actuator import Actuator
+from .profiler import Profiler
+from .sweep import sweep
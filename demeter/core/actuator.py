@@ -1,3 +1,4 @@
+import dataclasses
 import logging
 import os
 import pickle
@@ -5,8 +6,9 @@ import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Union, Tuple
+from typing import List, Set, Union, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas import Timestamp
 from tqdm import tqdm  # process bar
@@ -20,9 +22,21 @@ from .._typing import (
     USD,
     DemeterLog,
 )
-from ..broker import BaseAction, AccountStatus, MarketInfo, MarketDict, MarketStatus, RowData
+from .profiler import Profiler, measure
+from ..broker import (
+    BaseAction,
+    AccountStatus,
+    MarketInfo,
+    MarketDict,
+    MarketStatus,
+    RowData,
+    ColumnarCursor,
+    NumericEnum,
+    AccountStatusRecorder,
+    Market,
+)
 from ..result import BackTestDescription
-from ..strategy import Strategy
+from ..strategy import Strategy, TriggerScheduler
 from ..uniswap import PositionInfo
 from ..utils import console_text
 from ..utils import get_formatted_predefined, STYLE, to_decimal, to_multi_index_df
@@ -41,9 +55,30 @@ class Actuator(object):
 
     :param allow_negative_balance: Allow cash balance of broker can be negative value or not. Default is False
     :type allow_negative_balance: bool
+    :param fast_cursor: Convert market data and prices to columnar arrays before main loop, and read rows by position instead of data.loc. Row data will be a RowView instead of Series. Default is False
+    :type fast_cursor: bool
+    :param numeric: Numeric type of account valuation. If it's float64, net value and account status are calculated and recorded in float, so account_status_df and analysis on it work on native float. Markets still simulate in Decimal, so backtest loop is not faster, set batch_fee of uniswap markets for faster fee calculation. Default is decimal
+    :type numeric: NumericEnum | str
+    :param profile: Record wall time and call count of each phase in backtest, e.g. on_bar, update of every market. Result can be found in profile_result after backtest. Default is False
+    :type profile: bool
+    :param status_recorder: Record account status in preallocated columns instead of a list of AccountStatus, it saves memory and time. account_status will be an AccountStatusRecorder. Default is False
+    :type status_recorder: bool
+    :param status_spill_path: If set, status recorder will save account status to files in this folder every 30 days, files are merged and removed after backtest. Only works with status_recorder. Default is None
+    :type status_spill_path: str
+    :param reuse_market_balance: Reuse market balance of the last bar in account status, if market data row, price and positions have not changed. Default is False
+    :type reuse_market_balance: bool
     """
 
-    def __init__(self, allow_negative_balance=False):
+    def __init__(
+        self,
+        allow_negative_balance=False,
+        fast_cursor=False,
+        numeric: NumericEnum | str = NumericEnum.decimal,
+        profile=False,
+        status_recorder=False,
+        status_spill_path: str | None = None,
+        reuse_market_balance=False,
+    ):
         """
         init Actuator
         """
@@ -52,14 +87,30 @@ class Actuator(object):
         self._logs: List[DemeterLog] = []
         self._currents = Currents()
         # broker status in every bar, use array for performance
-        self._account_status_list: List[AccountStatus] = []
+        self._account_status_list: List[AccountStatus] | AccountStatusRecorder = []
         self._account_status_df: pd.DataFrame | None = None
+        # record account status in preallocated columns instead of a list of AccountStatus, it saves memory and time
+        self.status_recorder: bool = status_recorder
+        # if set, status recorder will save account status to this folder every 30 days, only works with status_recorder
+        self.status_spill_path: str | None = status_spill_path
 
         # broker
-        self._broker: Broker = Broker(allow_negative_balance, self._record_action_list)
+        self.numeric: NumericEnum = NumericEnum(numeric)
+        self._broker: Broker = Broker(
+            allow_negative_balance, self._record_action_list, self.numeric, reuse_market_balance
+        )
         # strategy
         self._strategy: Strategy = Strategy()
         self._token_prices: pd.DataFrame | None = None
+        # read rows from columnar arrays in main loop, instead of DataFrame.loc
+        self.fast_cursor: bool = fast_cursor
+        self._price_cursor: ColumnarCursor | None = None
+        # prices used in account valuation, only available in float64 mode
+        self._valuation_prices: pd.DataFrame | None = None
+        # measure time of each phase in backtest
+        self.profile: bool = profile
+        self._profiler: Profiler | None = None
+        self._profile_result: pd.DataFrame | None = None
         # logging
         logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
         self.logger = logging.getLogger(__name__)
@@ -72,6 +123,10 @@ class Actuator(object):
         self.init_account_status = None
         # set backtest with other freq to make it faster, freq should be larger than 1 minute
         self.interval: str = "1min"
+        # only process rows where market data, token price or trigger might change something.
+        # In other rows, account status is copied from the previous row, and strategy.on_bar() will not be called.
+        # strategy should set sparse_compatible to True to allow it.
+        self.sparse: bool = False
 
     def _record_action_list(self, action: BaseAction):
         """
@@ -88,7 +143,7 @@ class Actuator(object):
 
     # region property
     @property
-    def account_status(self) -> List[AccountStatus]:
+    def account_status(self) -> List[AccountStatus] | AccountStatusRecorder:
         """
         | Get account status list.
         | Account status includes balances, net values and positions.
@@ -139,10 +194,31 @@ class Actuator(object):
 
         self._action_list = []
         self._currents = Currents()
+        if isinstance(self._account_status_list, AccountStatusRecorder):
+            # remove files left by an interrupted backtest
+            self._account_status_list.clear()
         self._account_status_list = []
         self.__backtest_finished = False
 
         self._account_status_df: pd.DataFrame | None = None
+        self._broker.clear_balance_cache()
+        self._profiler = Profiler() if self.profile else None
+        self._profile_result = None
+
+    @property
+    def profile_result(self) -> pd.DataFrame | None:
+        """
+        | Time spent in each phase of backtest, only available if profile is enabled.
+        | Columns are phase, market, calls, seconds, mean_seconds and ratio, ratio is the share of total backtest time.
+        | Phases in main loop are get_price, set_market_status, row_data, triggers, open, on_bar, update, after_bar,
+        | get_account_status, notify, copy_status (skipped rows in sparse mode), advance_stream (streamed markets),
+        | and other for the rest. set_market_status, open, update and advance_stream are recorded for every market.
+        | Phases out of main loop are check_backtest, init_strategy, to_dataframe and finalize.
+
+        :return: profile result, None if profile is disabled
+        :rtype: DataFrame | None
+        """
+        return self._profile_result
 
     @property
     def actions(self) -> List[BaseAction]:
@@ -203,7 +279,7 @@ class Actuator(object):
                 )
             self.__runnning_count.get_account_status_df += 1
 
-            self._account_status_df = AccountStatus.to_dataframe(self._account_status_list)
+            self._account_status_df = self.__account_status_to_dataframe()
         return self._account_status_df
 
     @account_status_df.setter
@@ -236,10 +312,41 @@ class Actuator(object):
         for asset in assets:
             self._broker.set_balance(asset.token_info, asset.balance)
 
+    @staticmethod
+    def prepare_price(
+        prices: Union[pd.DataFrame, pd.Series, Tuple[pd.DataFrame, TokenInfo]],
+        quote_token: TokenInfo = None,
+    ) -> Tuple[pd.DataFrame, TokenInfo]:
+        """
+        | Convert price to the format kept by actuator, values are converted to Decimal, and USD column is added.
+        | Conversion is expensive for long price, if price is used by several actuators, e.g. in sweep,
+        | prepare it once, then pass result to set_price with prepared=True. Prepared price should be treated as read only.
+
+        :param prices: dataframe or series contains prices, same as set_price
+        :type prices: Union[pd.DataFrame, pd.Series, Tuple[pd.DataFrame, TokenInfo]]
+        :param quote_token: quote token of price
+        :type quote_token: TokenInfo
+        :return: converted price and quote token
+        :rtype: Tuple[pd.DataFrame, TokenInfo]
+        """
+        if isinstance(prices, pd.DataFrame):
+            quote_token = quote_token if quote_token is not None else USD
+        elif isinstance(prices, Tuple):  # Got from uniswap market
+            quote_token = prices[1]
+            prices = prices[0]
+        else:
+            quote_token = quote_token if quote_token is not None else USD
+            prices = pd.DataFrame(data=prices, index=prices.index)
+
+        prices = prices.map(lambda y: to_decimal(y))
+        prices[USD.name] = 1
+        return prices, quote_token
+
     def set_price(
         self,
         prices: Union[pd.DataFrame, pd.Series, Tuple[pd.DataFrame, TokenInfo]],
         quote_token: TokenInfo = None,
+        prepared: bool = False,
     ):
         """
         | Set price to actuator. param price can be dataframe(price of several tokens) or series(price of one token).
@@ -258,18 +365,16 @@ class Actuator(object):
         :type prices: Union[pd.DataFrame, pd.Series, Tuple[pd.DataFrame, TokenInfo]]
         :param quote_token: quote token of price
         :type quote_token: TokenInfo
-        """
-        if isinstance(prices, pd.DataFrame):
-            quote_token = quote_token if quote_token is not None else USD
-        elif isinstance(prices, Tuple):  # Got from uniswap market
-            quote_token = prices[1]
-            prices = prices[0]
+        :param prepared: prices is returned by prepare_price, it's used without conversion. Default is False
+        :type prepared: bool
+        """
+        if prepared:
+            if isinstance(prices, Tuple):
+                prices, quote_token = prices
+            elif quote_token is None:
+                quote_token = USD
         else:
-            quote_token = quote_token if quote_token is not None else USD
-            prices = pd.DataFrame(data=prices, index=prices.index)
-
-        prices = prices.map(lambda y: to_decimal(y))
-        prices[USD.name] = 1
+            prices, quote_token = Actuator.prepare_price(prices, quote_token)
         if self._token_prices is None:
             self._token_prices = prices
         else:
@@ -313,20 +418,24 @@ class Actuator(object):
         if self._token_prices is None:
             # if price is not set and market is uni_lp_market, get price from market automatically
             for market in self.broker.markets.values():
-                if hasattr(market, "get_price_from_data"):
+                # streamed market only has a chunk of data, price should be set by set_price
+                if hasattr(market, "get_price_from_data") and market.data_source is None:
                     self.set_price(market.get_price_from_data())
             if self._token_prices is None:
                 raise DemeterError("token prices is not set")
 
-        default_market_data = self.broker.markets.default.data
-        if (
-            self._token_prices.index[0]
-            > default_market_data.head(1).index.get_level_values(0).unique()[0]
-            or self._token_prices.index[-1]
-            < default_market_data.tail(1).index.get_level_values(0).unique()[0]
-        ):
+        default_timestamps = Actuator.__get_market_timestamps(self.broker.markets.default)
+        if self._token_prices.index[0] > default_timestamps[0] or self._token_prices.index[-1] < default_timestamps[-1]:
             raise DemeterError("Time range of price doesn't cover market data")
 
+        if self.sparse and any(m.data_source is not None for m in self.broker.markets.values()):
+            raise DemeterError("sparse mode is not supported when market data is streamed")
+        if self.sparse and not getattr(self._strategy, "sparse_compatible", False):
+            raise DemeterError(
+                "sparse mode skips on_bar and after_bar in most rows, "
+                "set sparse_compatible of strategy to True to allow it"
+            )
+
         # check match quote token is in price
         for market in self.broker.markets.values():
             if market.quote_token.name not in self._token_prices.columns:
@@ -334,6 +443,11 @@ class Actuator(object):
                     f"Price dataframe doesn't have {market.quote_token}, it's the quote token of {market.market_info.name}"
                 )
 
+    def __account_status_to_dataframe(self) -> pd.DataFrame:
+        if isinstance(self._account_status_list, AccountStatusRecorder):
+            return self._account_status_list.to_dataframe()
+        return AccountStatus.to_dataframe(self._account_status_list)
+
     def _log(self, timestamp: datetime, message: str, level: int = logging.INFO):
         self._logs.append(DemeterLog(timestamp, message, level))
 
@@ -352,30 +466,98 @@ class Actuator(object):
         :return:
         """
 
-        for market_key in self.broker.markets.keys():
-            if (not update) or (update and self._broker.markets[market_key].has_update):
-                ms = MarketStatus(timestamp, None)
-                self._broker.markets[market_key].set_market_status(
-                    ms, self._token_prices.loc[timestamp]
-                )
+        for market_info, market in self._broker.markets.items():
+            if (not update) or (update and market.has_update):
+                with measure(self._profiler, "set_market_status", market_info):
+                    ms = MarketStatus(timestamp, None if market.cursor is None else market.cursor.row_at(timestamp))
+                    market.set_market_status(ms, self.__get_price(timestamp))
+
+    def __get_price(self, timestamp: Timestamp) -> pd.Series:
+        if self._price_cursor is not None:
+            price = self._price_cursor.row_at(timestamp)
+            if price is not None:
+                return price
+        return self._token_prices.loc[timestamp]
+
+    def __prepare_numeric(self):
+        self.numeric = NumericEnum(self.numeric)
+        self._broker.numeric = self.numeric
+        if self.numeric == NumericEnum.float64:
+            # used in price columns of account_status_df, prices of each bar are converted by broker
+            self._valuation_prices = self._token_prices.astype(float)
+        else:
+            self._valuation_prices = None
+
+    def __build_cursors(self):
+        """
+        Convert price and market data to columnar cursors, markets that not support cursor will keep using data.loc
+        """
+        self._price_cursor = ColumnarCursor(self._token_prices)
+        for market in self._broker.markets.values():
+            market.cursor = market.build_cursor()
+
+    def __release_cursors(self):
+        self._price_cursor = None
+        for market in self._broker.markets.values():
+            market.cursor = None
+
+    def __get_eventful_rows(self, index_array: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Rows which should be processed in sparse mode,
+        including rows where market data or token prices change, and rows where triggers might be met.
+        """
+        mask = np.full(len(index_array), False)
+        for market in self._broker.markets.values():
+            mask |= market.get_eventful_rows(index_array)
+        prices = self._token_prices.reindex(index_array)
+        mask |= prices.ne(prices.shift()).any(axis=1).to_numpy(dtype=bool)
+        for trigger in self._strategy.triggers:
+            mask |= trigger.get_eventful_rows(index_array)
+        # first row is always processed, so strategy and triggers can initialize
+        mask[0] = True
+        return mask
+
+    def __add_eventful_rows(self, mask: np.ndarray, index_array: pd.DatetimeIndex, row_id: int, known: Set[int]):
+        """
+        | Triggers added during backtest, e.g. in on_bar or a trigger callback, are added to rows after current row.
+        | Rows are got from the state of trigger, e.g. a period trigger checked in this row starts its period here,
+        | and a trigger which is not checked yet will be checked in the next row.
+        | Removed triggers are not cleared from mask, those rows are processed as usual.
+        """
+        for trigger in self._strategy.triggers:
+            if id(trigger) not in known:
+                known.add(id(trigger))
+                mask[row_id + 1 :] |= trigger.get_eventful_rows(index_array[row_id + 1 :])
+
+    @staticmethod
+    def __get_market_timestamps(market: Market) -> pd.Index:
+        """
+        Timestamps of market data, if data is streamed, get from data source.
+        """
+        if market.data_source is not None:
+            return market.data_source.timestamps
+        return market.data.index.get_level_values(0).unique()
 
     def get_test_range(self):
-        longest_data = max(
-            map(
-                lambda m: len(m.data.index.get_level_values(0).unique()),
-                self._broker.markets.values(),
-            )
-        )
-        largest_market = list(
-            filter(
-                lambda m: len(m.data.index.get_level_values(0).unique()) == longest_data,
-                self._broker.markets.values(),
-            )
-        )[0]
+        market_timestamps = [Actuator.__get_market_timestamps(m) for m in self._broker.markets.values()]
+        longest_data = max(map(len, market_timestamps))
         # start = largest_market.data.head(1).index.get_level_values(0).unique()
         # end = largest_market.data.tail(1).index.get_level_values(0).unique()
 
-        return largest_market.data.index.get_level_values(0).unique()
+        return list(filter(lambda t: len(t) == longest_data, market_timestamps))[0]
+
+    def __advance_streams(self, markets: List[Market], timestamp: Timestamp):
+        """
+        Move streamed markets to chunk of timestamp, and refresh data used by strategy and cursors.
+        """
+        for market in markets:
+            with measure(self._profiler, "advance_stream", market.market_info):
+                if market.advance_stream(timestamp):
+                    if self.interval != "1min":
+                        market._resample(self.interval)
+                    self._strategy.data[market.market_info] = market.data
+                    if self.fast_cursor:
+                        market.cursor = market.build_cursor()
 
     def switch_interval(self, index_array: pd.DatetimeIndex) -> pd.DatetimeIndex:
         for mk, market in self.broker.markets.items():
@@ -405,54 +587,84 @@ class Actuator(object):
         """
         self.__start_time = time.time()  # 1681718968.267463
         self.reset()
+        streamed_markets = [m for m in self._broker.markets.values() if m.data_source is not None]
+        for market in streamed_markets:
+            market.start_stream()
 
-        self._check_backtest()
+        with measure(self._profiler, "check_backtest"):
+            self._check_backtest()
         index_array: pd.DatetimeIndex = (
             self.get_test_range()
         )  # list(self._broker.markets.values())[0].data.index.get_level_values(0).unique()
         if self.interval != "1min":
             self.logger.info(f"Interval is {self.interval}, resampling data...")
             index_array = self.switch_interval(index_array)
+        if self.status_recorder:
+            self._account_status_list = AccountStatusRecorder(len(index_array), self.status_spill_path)
         self.logger.info(f"Quote token is {self.broker.quote_token}")  # what does Qute mean
         self.logger.info("init strategy...")
+        self.__prepare_numeric()
 
         # set initial status for strategy, so user can run some calculation in initial function.
         self.__set_market_timestamp(index_array[0], False)
         self._currents.timestamp = index_array[0].to_pydatetime()
         # keep initial balance for evaluating
         self.init_account_status = self._broker.get_account_status(
-            self._token_prices.head(1).iloc[0], index_array[0].to_pydatetime()
+            (self._token_prices if self._valuation_prices is None else self._valuation_prices).head(1).iloc[0],
+            index_array[0].to_pydatetime(),
         )
-        self.init_strategy()
+        with measure(self._profiler, "init_strategy"):
+            self.init_strategy()
+        if self.fast_cursor:
+            # build after strategy initialized, so columns added in initialize() are included
+            self.__build_cursors()
+        eventful_rows = None
+        eventful_triggers: Set[int] = set()
+        if self.sparse:
+            # build after strategy initialized, so triggers added in initialize() are included
+            eventful_rows = self.__get_eventful_rows(index_array)
+            eventful_triggers = {id(t) for t in self._strategy.triggers}
+            self.logger.info(f"Sparse mode, {eventful_rows.sum()} of {len(index_array)} rows will be processed")
+        trigger_scheduler = TriggerScheduler(self._strategy, index_array)
+        last_status: AccountStatus | None = None
         row_id = 0
         rebalanced_rows = []
         data_length = len(index_array)
         self.logger.info("start main loop...")
+        loop_start = time.perf_counter()
         with tqdm(total=data_length, ncols=150) as pbar:
             try:
                 for timestamp_index in index_array:
-                    current_price = self._token_prices.loc[timestamp_index]
+                    if eventful_rows is not None and not eventful_rows[row_id]:
+                        # nothing can change in this row, keep status of previous row
+                        with measure(self._profiler, "copy_status"):
+                            self._currents.timestamp = timestamp_index.to_pydatetime()
+                            last_status = dataclasses.replace(last_status, timestamp=self._currents.timestamp)
+                            self._account_status_list.append(last_status)
+                        pbar.update()
+                        row_id += 1
+                        continue
+                    if streamed_markets:
+                        self.__advance_streams(streamed_markets, timestamp_index)
+                    with measure(self._profiler, "get_price"):
+                        current_price = self.__get_price(timestamp_index)
                     # prepare data of a row
 
                     self.__set_market_timestamp(timestamp_index, False)
                     # execute strategy, and some calculate
                     self._currents.timestamp = timestamp_index.to_pydatetime()
-                    row_data = self.__get_row_data(timestamp_index, row_id, current_price)
-                    if self._strategy.triggers:
-                        for trigger in self._strategy.triggers:
-                            if trigger.when(row_data):
-                                trigger.do(row_data)
-                    # remove outdate triggers
-                    self._strategy.triggers = [
-                        x
-                        for x in self._strategy.triggers
-                        if not x.is_out_date(self._currents.timestamp)
-                    ]
-                    for market in self.broker.markets.values():
+                    with measure(self._profiler, "row_data"):
+                        row_data = self.__get_row_data(timestamp_index, row_id, current_price)
+                    with measure(self._profiler, "triggers"):
+                        # only due triggers are checked, outdated triggers are removed
+                        trigger_scheduler.run(row_data, row_id)
+                    for market_info, market in self.broker.markets.items():
                         if market.is_open and market.open is not None:
-                            market.open(row_data)
+                            with measure(self._profiler, "open", market_info):
+                                market.open(row_data)
 
-                    self._strategy.on_bar(row_data)
+                    with measure(self._profiler, "on_bar"):
+                        self._strategy.on_bar(row_data)
 
                     # important, take uniswap market for example,
                     # if liquidity has changed in the head of this minute,
@@ -461,20 +673,27 @@ class Actuator(object):
 
                     # update broker status, e.g. re-calculate fee
                     # and read the latest status from broker
-                    for market in self._broker.markets.values():
-                        market.update()
-
-                    row_data = self.__get_row_data(timestamp_index, row_id, current_price)
-                    self._strategy.after_bar(row_data)
-
-                    self._account_status_list.append(
-                        self._broker.get_account_status(
-                            current_price, timestamp_index.to_pydatetime()
+                    for market_info, market in self._broker.markets.items():
+                        with measure(self._profiler, "update", market_info):
+                            market.update()
+
+                    with measure(self._profiler, "row_data"):
+                        row_data = self.__get_row_data(timestamp_index, row_id, current_price)
+                    with measure(self._profiler, "after_bar"):
+                        self._strategy.after_bar(row_data)
+
+                    with measure(self._profiler, "get_account_status"):
+                        last_status = self._broker.get_account_status(
+                            current_price,
+                            timestamp_index.to_pydatetime(),
                         )
-                    )
+                        self._account_status_list.append(last_status)
                     # notify actions in current loop
-                    self.notify(self.strategy, self._currents.actions)
+                    with measure(self._profiler, "notify"):
+                        self.notify(self.strategy, self._currents.actions)
                     self._currents.actions = []
+                    if eventful_rows is not None:
+                        self.__add_eventful_rows(eventful_rows, index_array, row_id, eventful_triggers)
                     # move forward for process bar and index
                     pbar.update()
                     row_id += 1
@@ -483,25 +702,42 @@ class Actuator(object):
                 self._generate_account_status_df()
                 self.save_result("./", "backtest-with-error")
                 raise e
+            finally:
+                self.__release_cursors()
+                for market in streamed_markets:
+                    market.stop_stream()
 
+        loop_seconds = time.perf_counter() - loop_start
         self.logger.info("main loop finished")
         self.__backtest_finished = True
         # generate dataframe first so finalize can use it
-        self._generate_account_status_df()
-        self._strategy.finalize()
+        with measure(self._profiler, "to_dataframe"):
+            self._generate_account_status_df()
+        with measure(self._profiler, "finalize"):
+            self._strategy.finalize()
         if print_result:
             self.print_result()
 
         self.__backtest_duration = time.time() - self.__start_time
+        if self._profiler is not None:
+            self.__generate_profile_result(loop_seconds)
         self.logger.info(f"Backtesting finished, execute time {time.time() - self.__start_time}s")
 
+    def __generate_profile_result(self, loop_seconds: float):
+        df = self._profiler.to_dataframe()
+        loop_phases = ~df["phase"].isin(["check_backtest", "init_strategy", "to_dataframe", "finalize"])
+        # time of main loop which is not measured, e.g. process bar
+        self._profiler.add("other", max(loop_seconds - df.loc[loop_phases, "seconds"].sum(), 0))
+        self._profile_result = self._profiler.to_dataframe(self.__backtest_duration)
+
     def _generate_account_status_df(self):
-        self._account_status_df: pd.DataFrame = AccountStatus.to_dataframe(
-            self._account_status_list
-        )
+        if isinstance(self._account_status_list, AccountStatusRecorder):
+            self._account_status_list.merge_spilled()
+        self._account_status_df: pd.DataFrame = self.__account_status_to_dataframe()
 
         tmp_price_df = (
-            self._token_prices.drop(columns=[USD.name])
+            (self._token_prices if self._valuation_prices is None else self._valuation_prices)
+            .drop(columns=[USD.name])
             .loc[self._account_status_df.index[0] : self._account_status_df.index[-1]]
             .reindex(self._account_status_df.index)
         )
@@ -562,6 +798,11 @@ class Actuator(object):
         df_2_save.to_csv(file_name)
         file_list.append(file_name)
 
+        if self._profile_result is not None:
+            file_name = os.path.join(path, file_name_head + ".profile.csv")
+            self._profile_result.to_csv(file_name, index=False)
+            file_list.append(file_name)
+
         # save backtest file
         backtest_result = BackTestDescription(
             strategy_name=type(self._strategy).__name__,
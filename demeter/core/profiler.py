@@ -0,0 +1,108 @@
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from typing import Dict, Tuple
+
+import pandas as pd
+
+from ..broker import MarketInfo
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _Measure(object):
+    """
+    Context to measure wall time of a phase
+    """
+
+    __slots__ = ("_profiler", "_key", "_start")
+
+    def __init__(self, profiler: "Profiler", key: Tuple[str, str]):
+        self._profiler = profiler
+        self._key = key
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._profiler.add(self._key[0], time.perf_counter() - self._start, self._key[1])
+        return False
+
+
+class Profiler(object):
+    """
+    | Accumulate wall time and call count of phases in backtest, such as on_bar, update of a market.
+    | Phases of markets are recorded by market name.
+
+    e.g.
+
+    .. code-block:: python
+
+        with profiler.measure("update", market_info):
+            market.update()
+
+    """
+
+    def __init__(self):
+        self._seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._calls: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def measure(self, phase: str, market: MarketInfo | None = None) -> _Measure:
+        """
+        Get a context to measure a phase
+
+        :param phase: phase name
+        :type phase: str
+        :param market: market of this phase, if it's not specific to a market, keep it None
+        :type market: MarketInfo
+        :return: context to measure time
+        :rtype: _Measure
+        """
+        return _Measure(self, (phase, "" if market is None else market.name))
+
+    def add(self, phase: str, seconds: float, market: str = ""):
+        """
+        Add time to a phase
+
+        :param phase: phase name
+        :type phase: str
+        :param seconds: time spent
+        :type seconds: float
+        :param market: name of market
+        :type market: str
+        """
+        self._seconds[(phase, market)] += seconds
+        self._calls[(phase, market)] += 1
+
+    def reset(self):
+        self._seconds.clear()
+        self._calls.clear()
+
+    def to_dataframe(self, total_seconds: float | None = None) -> pd.DataFrame:
+        """
+        Get profile result, columns are phase, market, calls, seconds, mean_seconds and ratio.
+
+        :param total_seconds: total time, used to calculate ratio of each phase, if it's None, will use sum of all phases
+        :type total_seconds: float
+        :return: profile result
+        :rtype: DataFrame
+        """
+        df = pd.DataFrame(
+            [(k[0], k[1], self._calls[k], v) for k, v in self._seconds.items()],
+            columns=["phase", "market", "calls", "seconds"],
+        )
+        df["mean_seconds"] = df["seconds"] / df["calls"]
+        total_seconds = df["seconds"].sum() if total_seconds is None else total_seconds
+        df["ratio"] = df["seconds"] / total_seconds if total_seconds > 0 else 0.0
+        return df
+
+
+def measure(profiler: Profiler | None, phase: str, market: MarketInfo | None = None):
+    """
+    Measure a phase if profiler is available, or else return a context which does nothing.
+    """
+    if profiler is None:
+        return _NULL_CONTEXT
+    return profiler.measure(phase, market)
@@ -0,0 +1,106 @@
+import itertools
+from typing import Any, Callable, Dict, List, Type
+
+import pandas as pd
+
+from .actuator import Actuator
+from .._typing import DemeterError
+from ..result import performance_metrics
+from ..strategy import Strategy
+from ..utils.pool import map_with_context
+
+
+def expand_param_grid(param_grid: Dict[str, List] | List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Expand parameter grid to a list of parameter sets.
+
+    :param param_grid: a dict of parameter name and candidate values, all combinations will be generated. Or a list of parameter sets.
+    :type param_grid: Dict[str, List] | List[Dict[str, Any]]
+    :return: list of parameter sets
+    :rtype: List[Dict[str, Any]]
+    """
+    if isinstance(param_grid, dict):
+        keys = list(param_grid.keys())
+        return [dict(zip(keys, values)) for values in itertools.product(*[param_grid[k] for k in keys])]
+    return list(param_grid)
+
+
+def _shallow_copy(data: Any) -> Any:
+    """
+    Copy dataframes in shared data without copying their values, so a backtest can not change columns or index
+    of dataframes used by other backtests.
+    """
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return data.copy(deep=False)
+    if isinstance(data, dict):
+        return {k: _shallow_copy(v) for k, v in data.items()}
+    if isinstance(data, (list, tuple)):
+        return type(data)(_shallow_copy(v) for v in data)
+    return data
+
+
+def _run_one(context: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run backtest with a parameter set, and calculate metrics
+    """
+    actuator: Actuator = context["build_actuator"](_shallow_copy(context["shared_data"]))
+    if not isinstance(actuator, Actuator):
+        raise DemeterError("build_actuator should return an Actuator")
+    actuator.strategy = context["strategy_class"](**params)
+    actuator.run(print_result=False)
+    metrics = performance_metrics(
+        actuator.account_status_df["net_value"],
+        annualized_risk_free_rate=context["annualized_risk_free_rate"],
+    )
+    result = dict(params)
+    result.update({str(k): v for k, v in metrics.items()})
+    return result
+
+
+def sweep(
+    strategy_class: Type[Strategy],
+    param_grid: Dict[str, List] | List[Dict[str, Any]],
+    build_actuator: Callable[[Any], Actuator],
+    shared_data: Any = None,
+    processes: int = 1,
+    annualized_risk_free_rate: float = 0.03,
+    start_method: str | None = None,
+) -> pd.DataFrame:
+    """
+    | Run backtests for every parameter set in a process pool, and collect performance metrics.
+    | Market data should be loaded once and passed by shared_data. With fork start method,
+    | workers share it with parent process by copy on write. Or it will be pickled to each worker once.
+    | build_actuator is called for every backtest, it should create a new actuator and set shared data to markets,
+    | e.g. market.data = shared_data["market1"]. Dataframes in shared data(also in dict, list or tuple)
+    | are shallow copied for each backtest, so columns can be added, but values should be treated as read only.
+    | Price should be converted once by Actuator.prepare_price and kept in shared data,
+    | then set by actuator.set_price(shared_data["price"], prepared=True), so it's not converted in every backtest.
+
+    :param strategy_class: strategy class, it will be instantiated with each parameter set, e.g. strategy_class(**params)
+    :type strategy_class: Type[Strategy]
+    :param param_grid: a dict of parameter name and candidate values, or a list of parameter sets
+    :type param_grid: Dict[str, List] | List[Dict[str, Any]]
+    :param build_actuator: function to create actuator with markets, balances and prices, shared_data will be passed to it. It should be a module level function if start method is not fork.
+    :type build_actuator: Callable[[Any], Actuator]
+    :param shared_data: data shared by all backtests, such as market data and price
+    :type shared_data: Any
+    :param processes: count of processes, if it's 1, backtests will run in current process
+    :type processes: int
+    :param annualized_risk_free_rate: annualized risk free rate used in metrics
+    :type annualized_risk_free_rate: float
+    :param start_method: start method of worker process, fork, spawn or forkserver. If None, platform default will be used. fork is not safe on macOS.
+    :type start_method: str
+    :return: one row for each parameter set, columns are parameters and metrics
+    :rtype: DataFrame
+    """
+    param_list = expand_param_grid(param_grid)
+    if len(param_list) == 0:
+        raise DemeterError("param grid is empty")
+    context = {
+        "strategy_class": strategy_class,
+        "build_actuator": build_actuator,
+        "shared_data": shared_data,
+        "annualized_risk_free_rate": annualized_risk_free_rate,
+    }
+    results = map_with_context(_run_one, context, param_list, processes, start_method)
+    return pd.DataFrame(results)
@@ -13,3 +13,4 @@ from ._typing import (
     InsufficientBalanceError,
 )
 from .helper import round_decimal, decode_instrument
+from .order_book import OrderBookStore, deduct_orders
@@ -4,8 +4,8 @@ import os
 from _decimal import Decimal
 from datetime import date, timedelta
 from typing import List, Dict, Tuple
-import copy
 
+import numpy as np
 import pandas as pd
 from orjson import orjson
 
@@ -28,9 +28,10 @@ from ._typing import (
     WithdrawAction,
 )
 from .helper import round_decimal, position_to_df
+from .order_book import OrderBookStore, deduct_orders
 from .. import TokenInfo
 from .._typing import DemeterError
-from ..broker import Market, MarketInfo, write_func, BASE_FREQ
+from ..broker import Market, MarketInfo, write_func, BASE_FREQ, DataSource, ColumnarDataSource
 from ..utils import (
     float_param_formatter,
     get_formatted_predefined,
@@ -38,15 +39,52 @@ from ..utils import (
     get_formatted_from_dict,
     console_text,
 )
+from ..utils.columnar import save_columnar
+from ..utils.file_cache import read_with_cache, get_cache_file
 
 DEFAULT_DATA_PATH = "./data"
 BASIC_INTERVAL = pd.Timedelta("1h")
+ORDER_BOOK_FILE = "order_book.npz"
 
 
 def order_converter(array_str) -> List:
     return json.loads(array_str)
 
 
+def _read_deribit_csv(path: str) -> pd.DataFrame:
+    day_df = pd.read_csv(
+        str(path),
+        parse_dates=["time", "expiry_time"],
+        index_col=["time", "instrument_name"],
+        converters={"asks": order_converter, "bids": order_converter},
+    )
+    day_df.drop(columns=["actual_time", "min_price", "max_price"], inplace=True)
+    return day_df
+
+
+def _read_deribit_csv_with_order_book(path: str, cache_path: str | None) -> Tuple[pd.DataFrame, OrderBookStore]:
+    """
+    Read a day file, asks and bids are moved to an order book store instead of lists in dataframe.
+    If cache_path is set, both of them are cached.
+    """
+    if cache_path is not None:
+        cache_base = os.path.splitext(get_cache_file(path, cache_path))[0]
+        df_file, store_file = f"{cache_base}.status.pkl", f"{cache_base}.orders.npz"
+        if os.path.exists(df_file) and os.path.exists(store_file):
+            return pd.read_pickle(df_file), OrderBookStore.load(store_file)
+    day_df = pd.read_csv(str(path), parse_dates=["time", "expiry_time"], index_col=["time", "instrument_name"])
+    store = OrderBookStore.from_dataframe(day_df)
+    day_df.drop(columns=["actual_time", "min_price", "max_price", "asks", "bids"], inplace=True)
+    if cache_path is not None:
+        os.makedirs(cache_path, exist_ok=True)
+        # write to temp files first, so other process will not read half written files
+        day_df.to_pickle(f"{df_file}.{os.getpid()}.tmp")
+        store.save(f"{store_file}.{os.getpid()}.tmp")
+        os.replace(f"{df_file}.{os.getpid()}.tmp", df_file)
+        os.replace(f"{store_file}.{os.getpid()}.tmp", store_file)
+    return day_df, store
+
+
 class DeribitOptionMarket(Market):
     """
     The Deribit options market can be utilized for options investment or backtesting of Greek hedging strategies.
@@ -77,6 +115,8 @@ class DeribitOptionMarket(Market):
         self.positions: Dict[str, OptionPosition] = {}
         self.decimal = self.token_config.min_fee_decimal
         self._balance_cache = None
+        # asks and bids of all hours, only available when load_data with order_book_store
+        self.order_book: OrderBookStore | None = None
         # In reality, Deribit is an independent account, and you need to deposit funds into Deribit in order to trade.
         self.balance = Decimal(0)
         self.quote_token = token
@@ -120,7 +160,9 @@ class DeribitOptionMarket(Market):
         self._data = pd.read_pickle(path)
         self.logger.info("data has been prepared")
 
-    def load_data(self, start_date: date, end_date: date):
+    def load_data(
+        self, start_date: date, end_date: date, order_book_store: bool = False, cache_path: str | None = None
+    ):
         """
         Load data from folder set in data_path. Those data file should be downloaded by demeter, and meet name rule.
         Deribit-option-book-{token}-{day.strftime('%Y%m%d')}.csv
@@ -130,10 +172,15 @@ class DeribitOptionMarket(Market):
         :type start_date: date
         :param end_date: end day, the end day will be included
         :type end_date: date
+        :param order_book_store: if true, asks and bids are kept in self.order_book instead of data, they are not parsed to lists, and trading will not access dataframe.
+        :type order_book_store: bool
+        :param cache_path: folder to keep parsed files, csv parsing will be skipped if cache exists. default is None(no cache)
+        :type cache_path: str
         """
         self.logger.info(f"start load files from {start_date} to {end_date}...")
         day = start_date
-        df = pd.DataFrame()
+        day_dfs = []
+        stores = []
         from tqdm import tqdm
 
         with tqdm(total=(end_date - start_date).days + 1, ncols=150) as pbar:
@@ -148,18 +195,17 @@ class DeribitOptionMarket(Market):
                     pbar.update()
                     continue
 
-                day_df = pd.read_csv(
-                    str(path),
-                    parse_dates=["time", "expiry_time"],
-                    index_col=["time", "instrument_name"],
-                    converters={"asks": order_converter, "bids": order_converter},
-                )
-                day_df.drop(columns=["actual_time", "min_price", "max_price"], inplace=True)
-                df = pd.concat([df, day_df])
+                if order_book_store:
+                    day_df, store = _read_deribit_csv_with_order_book(path, cache_path)
+                    stores.append(store)
+                else:
+                    day_df = read_with_cache(path, _read_deribit_csv, cache_path)
+                day_dfs.append(day_df)
                 day += timedelta(days=1)
                 pbar.update()
 
-        self._data = df
+        self._data = pd.concat(day_dfs) if len(day_dfs) > 0 else pd.DataFrame()
+        self.order_book = OrderBookStore.concat(stores) if len(stores) > 0 else None
         self.logger.info("data has been prepared")
 
     @float_param_formatter
@@ -342,10 +388,8 @@ class DeribitOptionMarket(Market):
         price_in_token: float | Decimal | None = None,
     ):
         amount = self.__get_trade_amount(amount)
-        row = self.data.loc[(self._market_status.timestamp, instrument_name)]
-        order_list = row.asks if type == "buy" else row.bids
-        order_list = copy.deepcopy(order_list)
-        used_order = self._deduct_order_amount(amount, order_list, price_in_token)
+        prices, amounts, _ = self.__get_orders(instrument_name, type == "buy")
+        used_order = deduct_orders(prices, amounts.copy(), amount, price_in_token)
 
         total_premium = Decimal(sum([Decimal(t.amount) * Decimal(t.price) for t in used_order]))
         fee_amount = self.get_trade_fee(amount, total_premium)
@@ -382,16 +426,8 @@ class DeribitOptionMarket(Market):
             instrument_name, amount, price_in_token, price_in_usd, True, max_mark_price_multiple
         )
 
-        # this actually pass reference of the array, so asks array will be updated in _deduct_order_amount.
-        # so when orders are deducted, asks order number will be changed.
-        if max_mark_price_multiple is not None:
-            asks = list(
-                filter(lambda x: x[0] < max_mark_price_multiple * Decimal(instrument.mark_price), instrument.asks)
-            )
-        else:
-            asks = instrument.asks
-        # deduct bids amount
-        ask_list = self._deduct_order_amount(amount, asks, price_in_token)
+        # asks in order book or market status will be updated, so when orders are deducted, asks order number will be changed.
+        ask_list = self.__take_orders(instrument_name, instrument, True, amount, price_in_token, max_mark_price_multiple)
 
         total_premium = Decimal(sum([Decimal(t.amount) * Decimal(t.price) for t in ask_list]))
         fee_amount = self.get_trade_fee(amount, total_premium)
@@ -437,11 +473,6 @@ class DeribitOptionMarket(Market):
         )
         return ask_list, fee_amount
 
-    @staticmethod
-    def _find_available_orders(price, order_list) -> List:
-        error = Decimal("0.001")
-        return list(filter(lambda x: (1 - error) * price < x[0] < (1 + error) * price, order_list))
-
     @write_func
     @float_param_formatter
     def sell(
@@ -473,18 +504,7 @@ class DeribitOptionMarket(Market):
         )
 
         # deduct  amount
-        if max_mark_price_multiple is not None:
-            bids = list(
-                filter(lambda x: x[0] > max_mark_price_multiple / Decimal(instrument.mark_price), instrument.bids)
-            )
-        else:
-            bids = instrument.bids
-
-        bid_list = self._deduct_order_amount(amount, bids, price_in_token)
-
-        # write positions back
-        # if self.data is not None:
-        #     self.data.loc[(self._market_status.timestamp, instrument_name), "bids"] = bids
+        bid_list = self.__take_orders(instrument_name, instrument, False, amount, price_in_token, max_mark_price_multiple)
 
         total_premium = Decimal(sum([Decimal(t.amount) * Decimal(t.price) for t in bid_list]))
         fee = self.get_trade_fee(amount, total_premium)
@@ -524,28 +544,75 @@ class DeribitOptionMarket(Market):
         )
         return bid_list, fee
 
-    def _deduct_order_amount(self, amount, orders, price_in_token) -> List[Order]:
+    def _deduct_order_amount(self, amount, orders, price_in_token, available: np.ndarray | None = None) -> List[Order]:
         """
         subtract amount from asks/bids. e.g. if bid1 is run out, will deduct bid2. etc.
+        orders is a list of [price, amount], amounts in this list will be updated.
+        """
+        prices = np.array([float(x[0]) for x in orders], dtype=np.float64)
+        amounts = np.array([float(x[1]) for x in orders], dtype=np.float64)
+        before = amounts.copy()
+        order_list = deduct_orders(prices, amounts, amount, price_in_token, available)
+        for i in np.flatnonzero(amounts != before):
+            orders[i][1] = float(amounts[i])
+        return order_list
+
+    def get_orders(self, instrument_name: str, is_ask: bool) -> Tuple[np.ndarray, np.ndarray]:
         """
-        order_list = []
-        if price_in_token is not None:
-            for order in orders:
-                if price_in_token == Decimal(str(order[0])):
-                    order[1] -= amount
-                    order_list.append(Order(price_in_token, amount))
+        Get asks or bids of an instrument in current hour.
+
+        :param instrument_name: instrument name
+        :type instrument_name: str
+        :param is_ask: get asks or bids
+        :type is_ask: bool
+        :return: prices and amounts
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        prices, amounts, _ = self.__get_orders(instrument_name, is_ask)
+        return prices, amounts
+
+    def __get_orders(self, instrument_name: str, is_ask: bool) -> Tuple[np.ndarray, np.ndarray, List | None]:
+        """
+        Get orders in price and amount arrays. If order book store is loaded, arrays are views of the store,
+        or else they are converted from asks/bids in market status, and the list is returned too.
+        """
+        if self.order_book is not None:
+            row = self.order_book.get_row(self._market_status.timestamp.floor(DERIBIT_OPTION_FREQ), instrument_name)
+            if row < 0:
+                return np.empty(0), np.empty(0), None
+            prices, amounts = self.order_book.get_orders(row, is_ask)
+            return prices, amounts, None
+        instrument = self._market_status.data.loc[instrument_name]
+        orders = instrument.asks if is_ask else instrument.bids
+        prices = np.array([float(x[0]) for x in orders], dtype=np.float64)
+        amounts = np.array([float(x[1]) for x in orders], dtype=np.float64)
+        return prices, amounts, orders
+
+    @staticmethod
+    def __get_available_orders(
+        prices: np.ndarray, instrument: InstrumentStatus, is_ask: bool, max_mark_price_multiple
+    ) -> np.ndarray:
+        """
+        Get index of orders which are not beyond max_mark_price_multiple
+        """
+        if max_mark_price_multiple is None:
+            return np.arange(len(prices))
+        if is_ask:
+            return np.flatnonzero(prices < float(max_mark_price_multiple * Decimal(instrument.mark_price)))
         else:
-            amount_to_deduct = amount
-            for order in orders:
-                if order[1] == 0 or order[1] == Decimal(0):
-                    continue
-                should_deduct = min(Decimal(str(order[1])), amount_to_deduct)
-                amount_to_deduct -= should_deduct
-                order[1] -= float(should_deduct)
-                order_list.append(Order(Decimal(str(order[0])), should_deduct))
-                if order[1] > 0 or amount_to_deduct == Decimal(0):
-                    break
-        return order_list
+            return np.flatnonzero(prices > float(max_mark_price_multiple / Decimal(instrument.mark_price)))
+
+    def __take_orders(
+        self, instrument_name, instrument: InstrumentStatus, is_ask, amount, price_in_token, max_mark_price_multiple
+    ) -> List[Order]:
+        """
+        Take orders from order book store or market status.
+        """
+        prices, amounts, orders = self.__get_orders(instrument_name, is_ask)
+        available = DeribitOptionMarket.__get_available_orders(prices, instrument, is_ask, max_mark_price_multiple)
+        if orders is not None:
+            return self._deduct_order_amount(amount, orders, price_in_token, available)
+        return deduct_orders(prices, amounts, amount, price_in_token, available)
 
     def _check_transaction(
         self, instrument_name, amount, price_in_token, price_in_usd, is_buy, max_mark_price_multiple=None
@@ -572,31 +639,23 @@ class DeribitOptionMarket(Market):
         if price_in_usd is not None and price_in_token is None:
             price_in_token = price_in_usd / instrument.underlying_price
 
-        if is_buy:
-            if max_mark_price_multiple is not None:
-                max_price = max_mark_price_multiple * Decimal(instrument.mark_price)
-                available_orders = list(filter(lambda x: x[0] < max_price, instrument.asks))
-            else:
-                available_orders = instrument.asks
-        else:
-            if max_mark_price_multiple is not None:
-                min_price = max_mark_price_multiple / Decimal(instrument.mark_price)
-                available_orders = list(filter(lambda x: x[0] > min_price, instrument.bids))
-            else:
-                available_orders = instrument.bids
+        prices, amounts, _ = self.__get_orders(instrument_name, is_buy)
+        available = DeribitOptionMarket.__get_available_orders(prices, instrument, is_buy, max_mark_price_multiple)
 
         if price_in_token is not None:
             # to prevent error in decimal
-            available_orders = DeribitOptionMarket._find_available_orders(price_in_token, available_orders)
+            error = 0.001
+            price = float(price_in_token)
+            available = available[((1 - error) * price < prices[available]) & (prices[available] < (1 + error) * price)]
 
-            if len(available_orders) < 1:
+            if len(available) < 1:
                 raise DemeterError(
                     f"{instrument_name} doesn't have a order in price {price_in_token} {self.token.name}"
                 )
-            price_in_token = Decimal(str(available_orders[0][0]))
-            available_amount = Decimal(available_orders[0][1])
+            price_in_token = Decimal(str(float(prices[available[0]])))
+            available_amount = Decimal(float(amounts[available[0]]))
         else:
-            available_amount = sum([Decimal(x[1]) for x in available_orders])
+            available_amount = sum([Decimal(float(x)) for x in amounts[available]])
         if amount > available_amount:
             raise DemeterError(
                 f"insufficient order to buy {instrument_name}, required amount is {amount}, "
@@ -734,9 +793,73 @@ class DeribitOptionMarket(Market):
 
     # endregion
 
+    def _is_status_changed(self, data: DeribitMarketStatus, price: pd.Series) -> bool:
+        # balance is only re-calculated when market is open
+        return data.timestamp == data.timestamp.floor(DERIBIT_OPTION_FREQ)
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Deribit data is hourly, and options expire on the hour, so only the first minute of every hour is eventful.
+
+        :param index: timestamps of backtest
+        :type index: DatetimeIndex
+        :return: a bool array with the same length of index, true means eventful
+        :rtype: ndarray
+        """
+        return np.asarray(index == index.floor(DERIBIT_OPTION_FREQ))
+
     def _resample(self, freq: str):
         interval_delta = pd.Timedelta(freq)
         if interval_delta <= BASIC_INTERVAL:
             return
         else:
             self._data = self._data.groupby(level=1).resample(freq, level=0).first().swaplevel(1, 0)
+
+    def _get_columnar_metadata(self) -> Dict:
+        return {**super()._get_columnar_metadata(), "token": self.token.name}
+
+    def save_columnar(self, path: str):
+        """
+        | Save market data to a columnar file, asks and bids are saved in an order book store in the same folder.
+        | So after load_columnar, market will use order book store.
+
+        :param path: folder to save
+        :type path: str
+        """
+        if self._data is None:
+            raise DemeterError("data is empty")
+        data, order_book = self._data, self.order_book
+        if "asks" in data.columns:
+            order_book = OrderBookStore.from_dataframe(data[["asks", "bids"]].map(json.dumps))
+            data = data.drop(columns=["asks", "bids"])
+        save_columnar(data, path, self._get_columnar_metadata())
+        if order_book is not None:
+            order_book.save(os.path.join(path, ORDER_BOOK_FILE))
+
+    def load_columnar(self, path: str, chunk_size: str | None = None):
+        """
+        Load market data from a columnar file saved by save_columnar, order book store will be loaded too.
+
+        :param path: folder of columnar file
+        :type path: str
+        :param chunk_size: time span of a chunk to decode, such as 1D, 12h. If None, decode the whole file.
+        :type chunk_size: str
+        """
+        super().load_columnar(path, chunk_size)
+        if chunk_size is not None:
+            # order book store is loaded by set_data_source
+            return
+        order_book_path = os.path.join(path, ORDER_BOOK_FILE)
+        self.order_book = OrderBookStore.load(order_book_path) if os.path.exists(order_book_path) else None
+
+    def set_data_source(self, source: DataSource, chunk_size: str = "1D", lookback: int = 0, prefetch: bool = True):
+        """
+        Stream market data from a source, if source is a columnar file, order book store saved with it will be loaded.
+        Order book store is kept in flat arrays, so it's loaded as a whole.
+        """
+        super().set_data_source(source, chunk_size, lookback, prefetch)
+        self.order_book = None
+        if isinstance(source, ColumnarDataSource):
+            order_book_path = os.path.join(source.path, ORDER_BOOK_FILE)
+            if os.path.exists(order_book_path):
+                self.order_book = OrderBookStore.load(order_book_path)
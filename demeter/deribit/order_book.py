@@ -0,0 +1,276 @@
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ._typing import Order
+from .._typing import DemeterError
+
+_BRACKETS_AND_SPACES = str.maketrans("", "", "[] ")
+
+
+def _parse_orders(cells: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse order lists in json, e.g. "[[0.05, 145], [0.055, 10]]", into flat price and amount arrays.
+    All cells are joined and converted in one pass instead of json.loads on every cell.
+
+    :return: offsets, prices, amounts. orders of row i are in [offsets[i], offsets[i+1])
+    """
+    cells = cells.fillna("[]").astype(str).tolist()
+    # "[[p1, a1], [p2, a2]]" has 3 "["
+    counts = np.fromiter((max(c.count("[") - 1, 0) for c in cells), dtype=np.int64, count=len(cells))
+    offsets = np.zeros(len(cells) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    joined = ",".join([c for c, n in zip(cells, counts) if n > 0]).translate(_BRACKETS_AND_SPACES)
+    values = np.array(joined.split(","), dtype=np.float64) if joined != "" else np.empty(0, dtype=np.float64)
+    return offsets, values[0::2].copy(), values[1::2].copy()
+
+
+class OrderBookStore(object):
+    """
+    | Order books of all instruments in all hours, kept in flat numpy arrays.
+    | Orders of a row, which is a (hour, instrument) pair, are in [offsets[row], offsets[row+1]) of price and amount arrays.
+    | Row of (hour, instrument) is found by a hour x instrument table, so no dataframe lookup is needed when trading.
+    | Amount arrays are modified when orders are taken, just like asks/bids lists in dataframe.
+
+    :param times: hour of each row
+    :type times: np.ndarray
+    :param instruments: instrument name of each row
+    :type instruments: np.ndarray
+    :param ask_offsets: offsets of asks, length is row count + 1
+    :type ask_offsets: np.ndarray
+    :param ask_prices: prices of all asks
+    :type ask_prices: np.ndarray
+    :param ask_amounts: amounts of all asks
+    :type ask_amounts: np.ndarray
+    :param bid_offsets: offsets of bids, length is row count + 1
+    :type bid_offsets: np.ndarray
+    :param bid_prices: prices of all bids
+    :type bid_prices: np.ndarray
+    :param bid_amounts: amounts of all bids
+    :type bid_amounts: np.ndarray
+    """
+
+    def __init__(
+        self,
+        times: np.ndarray,
+        instruments: np.ndarray,
+        ask_offsets: np.ndarray,
+        ask_prices: np.ndarray,
+        ask_amounts: np.ndarray,
+        bid_offsets: np.ndarray,
+        bid_prices: np.ndarray,
+        bid_amounts: np.ndarray,
+    ):
+        self._times = np.asarray(times, dtype="datetime64[ns]")
+        self._instruments = np.asarray(instruments, dtype=object)
+        self._asks = (np.asarray(ask_offsets), np.asarray(ask_prices), np.asarray(ask_amounts))
+        self._bids = (np.asarray(bid_offsets), np.asarray(bid_prices), np.asarray(bid_amounts))
+        if len(self._asks[0]) != len(self._times) + 1 or len(self._bids[0]) != len(self._times) + 1:
+            raise DemeterError("length of offsets should be row count + 1")
+
+        hours, hour_codes = np.unique(self._times, return_inverse=True)
+        names, name_codes = np.unique(self._instruments.astype(str), return_inverse=True)
+        self._hours = pd.DatetimeIndex(hours)
+        self._instrument_ids: Dict[str, int] = {name: i for i, name in enumerate(names)}
+        self._rows = np.full((len(hours), len(names)), -1, dtype=np.int64)
+        self._rows[hour_codes, name_codes] = np.arange(len(self._times))
+        if np.count_nonzero(self._rows >= 0) != len(self._times):
+            raise DemeterError("order book has duplicated (hour, instrument) rows")
+
+    def __len__(self):
+        return len(self._times)
+
+    @property
+    def instruments(self) -> List[str]:
+        """
+        Names of all instruments, position in this list is instrument id
+        """
+        return list(self._instrument_ids.keys())
+
+    @staticmethod
+    def from_dataframe(df: pd.DataFrame) -> "OrderBookStore":
+        """
+        Build store from a dataframe indexed by (time, instrument_name), asks and bids columns are json strings.
+
+        :param df: order book data
+        :type df: DataFrame
+        :return: order book store
+        :rtype: OrderBookStore
+        """
+        ask_offsets, ask_prices, ask_amounts = _parse_orders(df["asks"])
+        bid_offsets, bid_prices, bid_amounts = _parse_orders(df["bids"])
+        return OrderBookStore(
+            df.index.get_level_values(0).to_numpy(dtype="datetime64[ns]"),
+            df.index.get_level_values(1).to_numpy(),
+            ask_offsets,
+            ask_prices,
+            ask_amounts,
+            bid_offsets,
+            bid_prices,
+            bid_amounts,
+        )
+
+    @staticmethod
+    def concat(stores: List["OrderBookStore"]) -> "OrderBookStore":
+        """
+        Join stores, e.g. stores of each day. Stores should not have the same (hour, instrument) row,
+        or DemeterError will be raised.
+
+        :param stores: stores to join
+        :type stores: List[OrderBookStore]
+        :return: joined store
+        :rtype: OrderBookStore
+        """
+        if len(stores) == 0:
+            raise DemeterError("no order book store to concat")
+
+        def join_offsets(offsets: List[np.ndarray]) -> np.ndarray:
+            result = [np.zeros(1, dtype=np.int64)]
+            start = 0
+            for o in offsets:
+                result.append(o[1:] + start)
+                start += o[-1]
+            return np.concatenate(result)
+
+        return OrderBookStore(
+            np.concatenate([s._times for s in stores]),
+            np.concatenate([s._instruments for s in stores]),
+            join_offsets([s._asks[0] for s in stores]),
+            np.concatenate([s._asks[1] for s in stores]),
+            np.concatenate([s._asks[2] for s in stores]),
+            join_offsets([s._bids[0] for s in stores]),
+            np.concatenate([s._bids[1] for s in stores]),
+            np.concatenate([s._bids[2] for s in stores]),
+        )
+
+    def save(self, path: str):
+        """
+        Save store to a npz file
+
+        :param path: file path
+        :type path: str
+        """
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                times=self._times,
+                instruments=self._instruments.astype(str),
+                ask_offsets=self._asks[0],
+                ask_prices=self._asks[1],
+                ask_amounts=self._asks[2],
+                bid_offsets=self._bids[0],
+                bid_prices=self._bids[1],
+                bid_amounts=self._bids[2],
+            )
+
+    @staticmethod
+    def load(path: str) -> "OrderBookStore":
+        """
+        Load store from a npz file saved by save()
+
+        :param path: file path
+        :type path: str
+        :return: order book store
+        :rtype: OrderBookStore
+        """
+        with np.load(path) as f:
+            return OrderBookStore(
+                f["times"],
+                f["instruments"],
+                f["ask_offsets"],
+                f["ask_prices"],
+                f["ask_amounts"],
+                f["bid_offsets"],
+                f["bid_prices"],
+                f["bid_amounts"],
+            )
+
+    def get_instrument_id(self, instrument_name: str) -> int:
+        """
+        Get id of instrument, if not found, return -1
+        """
+        return self._instrument_ids.get(instrument_name, -1)
+
+    def get_row(self, timestamp: pd.Timestamp, instrument_name: str) -> int:
+        """
+        Get row of an instrument in an hour, if not found, return -1
+
+        :param timestamp: hour of order book
+        :type timestamp: Timestamp
+        :param instrument_name: instrument name
+        :type instrument_name: str
+        :return: row number
+        :rtype: int
+        """
+        instrument_id = self._instrument_ids.get(instrument_name, -1)
+        if instrument_id < 0:
+            return -1
+        hour = self._hours.searchsorted(timestamp)
+        if hour >= len(self._hours) or self._hours[hour] != timestamp:
+            return -1
+        return int(self._rows[hour, instrument_id])
+
+    def get_orders(self, row: int, is_ask: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get orders of a row, arrays are views of the store, so change to amounts will be kept.
+
+        :param row: row number, got by get_row
+        :type row: int
+        :param is_ask: get asks or bids
+        :type is_ask: bool
+        :return: prices and amounts
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        offsets, prices, amounts = self._asks if is_ask else self._bids
+        start, end = offsets[row], offsets[row + 1]
+        return prices[start:end], amounts[start:end]
+
+
+def deduct_orders(
+    prices: np.ndarray,
+    amounts: np.ndarray,
+    amount: Decimal,
+    price_in_token: Decimal | None = None,
+    available: np.ndarray | None = None,
+) -> List[Order]:
+    """
+    | Subtract amount from asks/bids. e.g. if bid1 is run out, will deduct bid2. etc.
+    | Levels to take are located by cumulative sum of amounts, and amounts array is modified in place.
+    | If price_in_token is set, only orders with this price are taken.
+
+    :param prices: prices of orders
+    :type prices: np.ndarray
+    :param amounts: amounts of orders, will be modified
+    :type amounts: np.ndarray
+    :param amount: amount to take
+    :type amount: Decimal
+    :param price_in_token: price of orders to take
+    :type price_in_token: Decimal
+    :param available: index of orders which can be taken, if None, all orders are available
+    :type available: np.ndarray
+    :return: taken orders
+    :rtype: List[Order]
+    """
+    if available is None:
+        available = np.arange(len(prices))
+    order_list = []
+    if price_in_token is not None:
+        for i in available[prices[available] == float(price_in_token)]:
+            amounts[i] -= float(amount)
+            order_list.append(Order(price_in_token, amount))
+        return order_list
+
+    available = available[amounts[available] != 0]
+    levels = np.searchsorted(np.cumsum(amounts[available]), float(amount), side="left")
+    # one more level in case of float error, loop below will stop at the right level
+    amount_to_deduct = amount
+    for i in available[: levels + 2]:
+        should_deduct = min(Decimal(str(float(amounts[i]))), amount_to_deduct)
+        amount_to_deduct -= should_deduct
+        amounts[i] -= float(should_deduct)
+        order_list.append(Order(Decimal(str(float(prices[i]))), should_deduct))
+        if amounts[i] > 0 or amount_to_deduct == Decimal(0):
+            break
+    return order_list
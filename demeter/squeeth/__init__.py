@@ -12,4 +12,4 @@ from ._typing import (
     SqueethDescription,
 )
 from .market import SqueethMarket
-from .helper import calc_twap_price
+from .helper import calc_twap_price, calc_logged_prices, calc_twap_price_from_logged
@@ -2,6 +2,7 @@ import math
 from decimal import Decimal
 from typing import Dict
 
+import numpy as np
 import pandas as pd
 
 from demeter.squeeth import VaultKey, Vault
@@ -17,12 +18,32 @@ def calc_twap_price(prices: pd.Series) -> Decimal:
     :return: TWAP price
     :rtype: Decimal
     """
-    logged = prices.apply(lambda x: math.log(x, 1.0001))
-    logged_sum = logged.sum()
-    power = logged_sum / len(prices)
-    avg_price = math.pow(1.0001, power)
+    return calc_twap_price_from_logged(calc_logged_prices(prices))
 
-    return Decimal(avg_price)
+
+def calc_logged_prices(prices: pd.Series) -> np.ndarray:
+    """
+    Calc logged prices with base 1.0001, which is like tick in uniswap. They can be calculated once and used by every TWAP window.
+
+    :param prices: given price array.
+    :type prices: Series
+    :return: logged prices
+    :rtype: ndarray
+    """
+    return np.fromiter((math.log(x, 1.0001) for x in prices), dtype=np.float64, count=len(prices))
+
+
+def calc_twap_price_from_logged(logged: np.ndarray) -> Decimal:
+    """
+    Calc TWAP from logged prices of a window, the result is the same as calc_twap_price.
+
+    :param logged: logged prices in TWAP window, got by calc_logged_prices
+    :type logged: ndarray
+    :return: TWAP price
+    :rtype: Decimal
+    """
+    power = logged.sum() / len(logged)
+    return Decimal(math.pow(1.0001, power))
 
 
 def vault_to_dataframe(vaults: Dict[VaultKey, Vault]) -> pd.DataFrame:
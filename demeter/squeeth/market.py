@@ -2,7 +2,7 @@ import os
 from datetime import date, timedelta, datetime
 from decimal import Decimal
 from orjson import orjson
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Hashable
 
 import numpy as np
 import pandas as pd
@@ -25,7 +25,7 @@ from ._typing import (
     LiquidationAction,
     SqueethDescription,
 )
-from .helper import calc_twap_price, vault_to_dataframe
+from .helper import calc_logged_prices, calc_twap_price_from_logged, vault_to_dataframe
 from .. import MarketInfo, TokenInfo, DemeterError, MarketStatus, DECIMAL_0, UnitDecimal
 from ..broker import Market
 from ..uniswap import UniLpMarket, PositionInfo
@@ -67,6 +67,11 @@ class SqueethMarket(Market):
         self._squeeth_uni_pool = squeeth_uni_pool
         self.vault: Dict[VaultKey, Vault] = {}
         self._max_vault_id = 0
+        # data and logged price of each token, used to calc twap
+        self._logged_prices: Tuple[pd.DataFrame, Dict[str, np.ndarray]] | None = None
+        # twap price of each token at _twap_time
+        self._twap_time: datetime | None = None
+        self._twap_memo: Dict[str, Decimal] = {}
 
     TWAP_PERIOD = 7  # minutes, which is 420 seconds;
     MIN_DEPOSIT_AMOUNT = Decimal("0.5")  # eth
@@ -472,6 +477,8 @@ class SqueethMarket(Market):
         """
         | Get twap(time weighted average price) price, Just like what uniswap oracle contract did.
         | Depends on price stored in self.data
+        | Logged prices are calculated once for each token, so a twap window only sums up TWAP_PERIOD values,
+        | and twap prices of the latest timestamp are memorized.
 
         :param token: Which token to calculate
         :type token: TokenInfo
@@ -485,12 +492,28 @@ class SqueethMarket(Market):
             return self._market_status.data[token.name]
         if now is None:
             now = self._market_status.timestamp
+        if self._logged_prices is None or self._logged_prices[0] is not self._data:
+            self._logged_prices = (self._data, {})
+            self._twap_time = None
+        if now != self._twap_time:
+            self._twap_time = now
+            self._twap_memo = {}
+        if token.name in self._twap_memo:
+            return self._twap_memo[token.name]
+
+        logged_prices = self._logged_prices[1]
+        if token.name not in logged_prices:
+            logged_prices[token.name] = calc_logged_prices(self._data[token.name])
+        index = self._data.index
         start = now - timedelta(minutes=SqueethMarket.TWAP_PERIOD - 1)
-        if start < self.data.index[0]:
-            start = self.data.index[0].to_pydatetime()
         # remember 1 minute has 1 data point
-        prices: pd.Series = self.data[start:now][token.name]
-        return calc_twap_price(prices)
+        start_row = index.searchsorted(start, side="left")
+        end_row = index.searchsorted(now, side="right")
+        if end_row <= start_row:
+            raise DemeterError(f"no price data of {token.name} in twap window before {now}")
+        price = calc_twap_price_from_logged(logged_prices[token.name][start_row:end_row])
+        self._twap_memo[token.name] = price
+        return price
 
     def _get_fee(
         self, vault: Vault, deposit_eth_amount: Decimal, osqth_mint_amount: Decimal
@@ -857,5 +880,36 @@ class SqueethMarket(Market):
         # Maybe I should calculate this myself, as transactions are too few in a day
         return self._market_status.data["norm_factor"]
 
+    @property
+    def version(self) -> Hashable:
+        # value of deposited uniswap positions and osqth in broker are also in balance
+        return super().version, self._squeeth_uni_pool.version, self.osqth_balance
+
+    def _is_status_changed(self, data: MarketStatus, price: pd.Series | None) -> bool:
+        return self._is_row_changed(data.timestamp)
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Besides rows where data changes, twap price keeps changing in TWAP_PERIOD after price changed,
+        so those rows are eventful too.
+
+        :param index: timestamps of backtest
+        :type index: DatetimeIndex
+        :return: a bool array with the same length of index, true means eventful
+        :rtype: ndarray
+        """
+        changed = pd.Series(super().get_eventful_rows(index), index=index, dtype=float)
+        return changed.rolling(SqueethMarket.TWAP_PERIOD, min_periods=1).max().to_numpy(dtype=bool)
+
+    @property
+    def stream_lookback(self) -> int:
+        """
+        Twap price needs prices in TWAP_PERIOD
+        """
+        return SqueethMarket.TWAP_PERIOD - 1
+
     def _resample(self, freq: str):
         self._data = self.data.resample(freq).first()
+
+    def _get_columnar_metadata(self) -> Dict:
+        return {**super()._get_columnar_metadata(), "chain": self._network.chain.name}
@@ -3,6 +3,7 @@ This package includes modules relate to strategy,
 """
 
 from .strategy import Strategy
+from .scheduler import TriggerScheduler
 from .trigger import (
     Trigger,
     TimeRangesTrigger,
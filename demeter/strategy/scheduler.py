@@ -0,0 +1,148 @@
+import heapq
+from typing import Dict, List, Set, Tuple
+
+import pandas as pd
+
+from .strategy import Strategy
+from .trigger import Trigger
+from .. import RowData
+
+
+class TriggerScheduler(object):
+    """
+    | Decide which triggers should be checked in a row, instead of checking every trigger in every row.
+    | Next row of a trigger is got by trigger.get_next_time, time based triggers are kept in a heap sorted by row,
+    | so only due triggers are popped and checked.
+    | Triggers which should be checked in every row, such as PriceTrigger, are kept in a list.
+    | Due triggers are checked in the order of strategy.triggers.
+    | Strategy.triggers is still the source of triggers, if triggers are added, removed or replaced,
+    | scheduler will sync with it. Triggers added by actions of triggers are checked in the same row,
+    | just like iterating strategy.triggers.
+    | Outdated triggers are removed from strategy.triggers, just like the actuator did.
+
+    :param strategy: strategy whose triggers are scheduled
+    :type strategy: Strategy
+    :param index: timestamps of backtest
+    :type index: DatetimeIndex
+    """
+
+    def __init__(self, strategy: Strategy, index: pd.DatetimeIndex):
+        self._strategy = strategy
+        self._index = index
+        # id of triggers in strategy.triggers when last synced
+        self._trigger_ids: List[int] | None = None
+        # id of trigger -> (position in strategy.triggers, trigger)
+        self._positions: Dict[int, Tuple[int, Trigger]] = {}
+        # id of trigger -> row to check, or -1 if it will not be checked again
+        self._next_rows: Dict[int, int] = {}
+        self._heap: List[Tuple[int, int, int]] = []
+        self._heap_count = 0
+        self._every_row: List[int] = []
+        # triggers which will not be checked again, they are kept in strategy.triggers until they are outdated
+        self._retired: Set[int] = set()
+
+    def __sync(self, row_id: int):
+        """
+        Schedule triggers added to strategy.triggers at current row, and forget removed triggers.
+        """
+        triggers = self._strategy.triggers
+        self._trigger_ids = [id(t) for t in triggers]
+        positions = {id(t): (i, t) for i, t in enumerate(triggers)}
+        for trigger_id in positions.keys() - self._positions.keys():
+            self.__schedule(trigger_id, row_id)
+        for trigger_id in self._positions.keys() - positions.keys():
+            del self._next_rows[trigger_id]
+            self._retired.discard(trigger_id)
+        self._positions = positions
+        self._every_row = [t for t in self._every_row if t in positions]
+
+    def __is_changed(self) -> bool:
+        """
+        If triggers are added, removed or replaced since last sync
+        """
+        return self._trigger_ids is None or [id(t) for t in self._strategy.triggers] != self._trigger_ids
+
+    def __schedule(self, trigger_id: int, row_id: int):
+        self._next_rows[trigger_id] = row_id
+        heapq.heappush(self._heap, (row_id, self._heap_count, trigger_id))
+        self._heap_count += 1
+
+    def __reschedule(self, trigger_id: int, trigger: Trigger, row_id: int):
+        """
+        Find next row to check a trigger after current row
+        """
+        next_row = -1
+        if row_id + 1 < len(self._index):
+            next_timestamp = self._index[row_id + 1]
+            next_time = trigger.get_next_time(next_timestamp)
+            if next_time is not None and next_time <= next_timestamp:
+                self._next_rows[trigger_id] = row_id + 1
+                self._every_row.append(trigger_id)
+                return
+            elif next_time is not None:
+                next_row = int(self._index.searchsorted(next_time))
+        if 0 <= next_row < len(self._index):
+            self.__schedule(trigger_id, next_row)
+        else:
+            self._next_rows[trigger_id] = -1
+            self._retired.add(trigger_id)
+
+    def get_due_triggers(self, row_id: int) -> List[Trigger]:
+        """
+        Get triggers should be checked in this row, in the order of strategy.triggers
+
+        :param row_id: row number in index
+        :type row_id: int
+        :return: triggers to check
+        :rtype: List[Trigger]
+        """
+        if self.__is_changed():
+            self.__sync(row_id)
+        due = self._every_row
+        self._every_row = []
+        while len(self._heap) > 0 and self._heap[0][0] <= row_id:
+            row, _, trigger_id = heapq.heappop(self._heap)
+            # heap item is outdated if trigger is removed or rescheduled
+            if self._next_rows.get(trigger_id, -1) == row:
+                due.append(trigger_id)
+        due = sorted(set(due), key=lambda x: self._positions[x][0])
+        return [self._positions[trigger_id][1] for trigger_id in due]
+
+    def run(self, row_data: RowData, row_id: int):
+        """
+        Check due triggers and do their actions, then schedule them and remove outdated triggers.
+
+        :param row_data: data of this row
+        :type row_data: RowData
+        :param row_id: row number in index
+        :type row_id: int
+        """
+        due = self.get_due_triggers(row_id)
+        checked = []
+        while len(due) > 0:
+            for trigger in due:
+                if id(trigger) not in self._positions:
+                    # removed or replaced by an action in this row
+                    continue
+                checked.append(trigger)
+                if trigger.when(row_data):
+                    trigger.do(row_data)
+                    if self.__is_changed():
+                        self.__sync(row_id)
+            # triggers added by actions are scheduled at this row, so they are checked now
+            due = self.get_due_triggers(row_id)
+        outdated = set()
+        for trigger in checked:
+            trigger_id = id(trigger)
+            if trigger_id not in self._positions:
+                continue
+            if trigger.is_out_date(row_data.timestamp):
+                outdated.add(trigger_id)
+            else:
+                self.__reschedule(trigger_id, trigger, row_id)
+        for trigger_id in self._retired:
+            if self._positions[trigger_id][1].is_out_date(row_data.timestamp):
+                outdated.add(trigger_id)
+        if len(outdated) > 0:
+            self._strategy.triggers = [t for t in self._strategy.triggers if id(t) not in outdated]
+            self.__sync(row_id)
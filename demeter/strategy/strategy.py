@@ -1,4 +1,4 @@
-from typing import List, Callable
+from typing import List, Callable, Hashable
 
 import pandas as pd
 
@@ -25,6 +25,9 @@ class Strategy(object):
         self.assets: AssetDict[Asset] = AssetDict()
         self.actions: List[BaseAction] = []
         self.log: Callable = lambda t, msg, info: msg
+        # set to True if strategy only acts in triggers and notify, so actuator can run in sparse mode,
+        # where on_bar and after_bar are only called in rows where market data, price or triggers might change.
+        self.sparse_compatible: bool = False
 
     def initialize(self):
         """
@@ -80,9 +83,38 @@ class Strategy(object):
         """
         if not isinstance(column_data.index, pd.core.indexes.datetimes.DatetimeIndex):
             raise DemeterError("date index must be datetime")
+        market = self.__get_market(market)
+        if market.data_source is not None:
+            raise DemeterError(f"data of {market.market_info.name} is streamed, use add_window_column instead")
+        market.data[name] = column_data
+
+    def add_window_column(
+        self,
+        market: MarketInfo | Market,
+        name: Hashable,
+        func: Callable[[pd.DataFrame], pd.Series],
+        lookback: int = 0,
+    ):
+        """
+        | Add a column calculated by func, it works whether market data is streamed or not.
+        | If data is streamed, func is called on every chunk, which includes lookback timestamps before the chunk.
+        | e.g. add_window_column(market, "sma", lambda df: simple_moving_average(df.price, timedelta(hours=1)), lookback=60)
+
+        :param market: which market to update
+        :type market:  MarketInfo | Market
+        :param name: column name, like sma
+        :type name: Hashable
+        :param func: function to calculate column from market data
+        :type func: Callable[[DataFrame], Series]
+        :param lookback: count of previous timestamps func needs, e.g. window of moving average
+        :type lookback: int
+        """
+        self.__get_market(market).add_window_column(name, func, lookback)
+
+    def __get_market(self, market: MarketInfo | Market) -> Market:
         if isinstance(market, MarketInfo):
-            self.broker.markets[market].data[name] = column_data
+            return self.broker.markets[market]
         elif isinstance(market, Market):
-            market.data[name] = column_data
+            return market
         else:
             raise DemeterError(f"{market} is not a valid market")
@@ -1,7 +1,9 @@
+import bisect
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Callable, Any, List
 
+import numpy as np
 import pandas as pd
 
 from .. import RowData
@@ -61,6 +63,34 @@ class Trigger:
     def is_out_date(self, t) -> bool:
         return False
 
+    def get_next_time(self, timestamp: datetime) -> datetime | None:
+        """
+        | The earliest time, which is not before timestamp, when this trigger might be met.
+        | It's used by trigger scheduler, so triggers are only checked when they are due.
+        | If trigger will never be met after timestamp, return None.
+        | By default, it returns timestamp, which means trigger should be checked in every row, as condition is unknown.
+
+        :param timestamp: time to start finding
+        :type timestamp: datetime
+        :return: time to check this trigger
+        :rtype: datetime | None
+        """
+        return timestamp
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        | Get rows where this trigger might be met, used in sparse mode of actuator.
+        | Current state of trigger is considered, e.g. next match of period trigger.
+        | If trigger has not been checked, it will be checked at the first row of index.
+        | By default, every row is eventful, as condition is unknown.
+
+        :param index: timestamps of backtest, or timestamps after the current row
+        :type index: DatetimeIndex
+        :return: a bool array with the same length of index, true means trigger should be checked in this row
+        :rtype: ndarray
+        """
+        return np.full(len(index), True)
+
 
 class AtTimeTrigger(Trigger):
     """
@@ -84,6 +114,12 @@ class AtTimeTrigger(Trigger):
     def is_out_date(self, t) -> bool:
         return t >= self._time
 
+    def get_next_time(self, timestamp: datetime) -> datetime | None:
+        return self._time if self._time >= timestamp else None
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        return np.asarray(index == self._time)
+
 
 class AtTimesTrigger(Trigger):
     """
@@ -100,13 +136,23 @@ class AtTimesTrigger(Trigger):
 
     def __init__(self, time: List[datetime], do, **kwargs):
         self._time = [to_minute(t) for t in time]
+        # sorted times to find the next one by bisect
+        self._sorted_time = sorted(set(self._time))
         super().__init__(do, **kwargs)
 
     def when(self, row_data: RowData) -> bool:
-        return self._time in row_data.timestamp
+        i = bisect.bisect_left(self._sorted_time, row_data.timestamp)
+        return i < len(self._sorted_time) and self._sorted_time[i] == row_data.timestamp
 
     def is_out_date(self, t) -> bool:
-        return t >= max(self._time)
+        return t >= self._sorted_time[-1]
+
+    def get_next_time(self, timestamp: datetime) -> datetime | None:
+        i = bisect.bisect_left(self._sorted_time, timestamp)
+        return self._sorted_time[i] if i < len(self._sorted_time) else None
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        return np.asarray(index.isin(self._time))
 
 
 @dataclass
@@ -141,6 +187,12 @@ class TimeRangeTrigger(Trigger):
     def is_out_date(self, t) -> bool:
         return t >= self._time_range.end
 
+    def get_next_time(self, timestamp: datetime) -> datetime | None:
+        return max(timestamp, self._time_range.start) if timestamp < self._time_range.end else None
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        return np.asarray((index >= self._time_range.start) & (index < self._time_range.end))
+
 
 class TimeRangesTrigger(Trigger):
     """
@@ -158,23 +210,61 @@ class TimeRangesTrigger(Trigger):
         self._time_range: [TimeRange] = [
             TimeRange(to_minute(t.start), to_minute(t.end)) for t in time_range
         ]
+        # overlapped ranges are merged, so a time can be located by bisect
+        self._starts: List[datetime] = []
+        self._ends: List[datetime] = []
+        for r in sorted(self._time_range, key=lambda x: x.start):
+            if r.start >= r.end:
+                continue
+            if len(self._ends) > 0 and r.start <= self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], r.end)
+            else:
+                self._starts.append(r.start)
+                self._ends.append(r.end)
         super().__init__(do, **kwargs)
 
     def when(self, row_data: RowData) -> bool:
-        for r in self._time_range:
-            if r.start <= row_data.timestamp < r.end:
-                return True
-        return False
+        i = bisect.bisect_right(self._ends, row_data.timestamp)
+        return i < len(self._ends) and self._starts[i] <= row_data.timestamp
 
     def is_out_date(self, t) -> bool:
         return t >= max([x.end for x in self._time_range])
 
+    def get_next_time(self, timestamp: datetime) -> datetime | None:
+        i = bisect.bisect_right(self._ends, timestamp)
+        return max(timestamp, self._starts[i]) if i < len(self._ends) else None
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        mask = np.full(len(index), False)
+        for r in self._time_range:
+            mask |= np.asarray((index >= r.start) & (index < r.end))
+        return mask
+
 
 def _check_time_delta(delta: timedelta):
     if delta.total_seconds() % 60 != 0:
         raise DemeterError("min time span is 1 minute")
 
 
+def _get_period_rows(
+    index: pd.DatetimeIndex, deltas: List[timedelta], pending: timedelta, next_matches: List[datetime | None]
+) -> np.ndarray:
+    """
+    Rows where period triggers might be met. If trigger has been checked, periods start from its next match.
+    Or period starts when it's first checked, that's the first row of index, so the first row is included.
+    """
+    mask = np.full(len(index), False)
+    if len(index) == 0:
+        return mask
+    for delta, next_match in zip(deltas, next_matches):
+        if next_match is None:
+            mask[0] = True
+            next_match = index[0] + delta + pending
+        offset = (index - next_match) / delta
+        mask |= np.asarray((offset >= 0) & (offset == np.floor(offset)))
+    return mask
+
+
 class PeriodTrigger(Trigger):
     """
     Trigger action periodically
@@ -220,6 +310,15 @@ class PeriodTrigger(Trigger):
 
         return False
 
+    def get_next_time(self, timestamp: datetime) -> datetime | None:
+        if self._next_match is None:
+            return timestamp
+        # if a match is missed, next match will not move forward, so it will never be met
+        return self._next_match if self._next_match >= timestamp else None
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        return _get_period_rows(index, [self._delta], self._pending, [self._next_match])
+
 
 class PeriodsTrigger(Trigger):
     """
@@ -269,6 +368,14 @@ class PeriodsTrigger(Trigger):
 
         return False
 
+    def get_next_time(self, timestamp: datetime) -> datetime | None:
+        if self._next_matches[0] is None:
+            return timestamp
+        return min([t for t in self._next_matches if t >= timestamp], default=None)
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        return _get_period_rows(index, self._deltas, self._pending, self._next_matches)
+
 
 class PriceTrigger(Trigger):
     """
@@ -289,6 +396,10 @@ class PriceTrigger(Trigger):
     def when(self, row_data: RowData) -> bool:
         return self._condition(row_data.prices)
 
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        # rows where price changes are always eventful in actuator
+        return np.full(len(index), False)
+
 
 class CustomizedTrigger(Trigger):
     """
@@ -19,6 +19,7 @@ from ._typing import (
 from .core import V3CoreLib
 from .data import LineTypeEnum, UniLPData
 from .market import UniLpMarket
+from .batch import UniLpBatchSimulator, UniLpBatchStrategy
 from .helper import (
     nearest_usable_tick,
     tick_to_base_unit_price,
@@ -31,4 +32,15 @@ from .helper import (
     base_unit_price_to_sqrt_price_x96,
     get_swap_value,
     get_swap_value_with_part_balance_used,
+    get_delta_gamma_array,
+    get_delta_gamma_sqrt_x96_array,
+    find_tick_range_at_rate,
+    find_tick_ranges_at_rate,
+    TickResult,
+)
+from .liquitidy_math import (
+    precompute_sqrt_ratio,
+    get_sqrt_ratio_cache_info,
+    clear_sqrt_ratio_cache,
+    SqrtRatioCacheInfo,
 )
@@ -0,0 +1,589 @@
+import math
+from datetime import datetime
+from typing import List
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm  # process bar
+
+from .market import UniLpMarket
+from .._typing import DemeterError
+from ..broker import MarketDict
+
+_LOG_SQRT_1P0001 = math.log(math.sqrt(1.0001))
+_MAX_TICK = 887272
+
+
+class UniLpBatchStrategy(object):
+    """
+    | Strategy run by UniLpBatchSimulator. The same logic is applied to all pools,
+    | so actions are taken on many pools at once, and parameters are arrays with one value for each pool.
+    """
+
+    def __init__(self):
+        self.simulator: UniLpBatchSimulator | None = None
+
+    def initialize(self):
+        """
+        Initialize your strategy, this will be called before iteration start
+        """
+        pass
+
+    def on_bar(self, row_id: int):
+        """
+        Called on each iteration, before fee is updated
+
+        :param row_id: row of current timestamp
+        :type row_id: int
+        """
+        pass
+
+    def after_bar(self, row_id: int):
+        """
+        Called on each iteration, after fee is updated
+
+        :param row_id: row of current timestamp
+        :type row_id: int
+        """
+        pass
+
+
+class UniLpBatchSimulator(object):
+    """
+    | Simulate a LP strategy on many uniswap pools at once, pools should have data with the same timestamp index.
+    | Positions and balances of all pools are kept in arrays(one row for each pool, one column for each position slot),
+    | and all pools are moved forward in every bar, fee and token amounts are calculated by numpy for all pools together.
+    | Calculation is in float64, so the result has a tiny error compared to UniLpMarket in an Actuator,
+    | just like batch fee mode of UniLpMarket.
+
+    e.g.
+
+    .. code-block:: python
+
+        class Rebalance(UniLpBatchStrategy):
+            def on_bar(self, row_id):
+                if row_id % 1440 == 0:
+                    self.simulator.remove_all_liquidity()
+                    price = self.simulator.price
+                    self.simulator.add_liquidity(price * 0.99, price * 1.01)
+
+        simulator = UniLpBatchSimulator([market1, market2])
+        simulator.set_balance(1, 2000)
+        simulator.strategy = Rebalance()
+        simulator.run()
+        simulator.account_status_df[market1.market_info]
+
+    :param markets: uniswap markets whose data are loaded, data should have the same index
+    :type markets: List[UniLpMarket]
+    :param max_positions: max count of positions in each pool
+    :type max_positions: int
+    """
+
+    def __init__(self, markets: List[UniLpMarket], max_positions: int = 1):
+        if len(markets) == 0:
+            raise DemeterError("at least one market is required")
+        for market in markets:
+            if market.data is None:
+                raise DemeterError(f"data of {market.market_info.name} has not loaded")
+            if not market.data.index.equals(markets[0].data.index):
+                raise DemeterError(f"index of {market.market_info.name} is different from other markets")
+        self.markets: List[UniLpMarket] = markets
+        self.index: pd.DatetimeIndex = markets[0].data.index
+        self.max_positions: int = max_positions
+        self.strategy: UniLpBatchStrategy | None = None
+
+        pools = [m.pool_info for m in markets]
+        self._decimal0 = np.array([p.token0.decimal for p in pools], dtype=float)
+        self._decimal1 = np.array([p.token1.decimal for p in pools], dtype=float)
+        self._fee_rate = np.array([float(p.fee_rate) for p in pools])
+        self._tick_spacing = np.array([p.tick_spacing for p in pools], dtype=float)
+        self._is_token0_quote = np.array([p.is_token0_quote for p in pools])
+
+        # market data, one row for each bar, one column for each pool
+        def stack(column: str) -> np.ndarray:
+            return np.column_stack([m.data[column].to_numpy(dtype=float) for m in markets])
+
+        self._close_ticks = stack("closeTick")
+        self._current_liquidity = stack("currentLiquidity")
+        self._in_amount0 = np.trunc(stack("inAmount0")) / 10**self._decimal0 * self._fee_rate
+        self._in_amount1 = np.trunc(stack("inAmount1")) / 10**self._decimal1 * self._fee_rate
+        self._prices = stack("price")
+        # tick 0 is regarded as no last tick, the same as V3CoreLib.update_fee
+        last_ticks = np.vstack([self._close_ticks[:1], self._close_ticks[:-1]])
+        self._last_ticks = np.where(last_ticks == 0, np.nan, last_ticks)
+        self.reset()
+
+    def reset(self):
+        """
+        Clear balances, positions and result
+        """
+        count, slots = len(self.markets), self.max_positions
+        self._base_balance = np.zeros(count)
+        self._quote_balance = np.zeros(count)
+        self._lower_ticks = np.zeros((count, slots))
+        self._upper_ticks = np.zeros((count, slots))
+        self._liquidity = np.zeros((count, slots))
+        self._fee0 = np.zeros((count, slots))
+        self._fee1 = np.zeros((count, slots))
+        self._changed = np.full(count, False)
+        self._row_id = 0
+        self._status: np.ndarray | None = None
+        self._account_status_df: MarketDict[pd.DataFrame] | None = None
+
+    # region properties
+
+    @property
+    def row_id(self) -> int:
+        """
+        Row of current bar
+        """
+        return self._row_id
+
+    @property
+    def timestamp(self) -> datetime:
+        """
+        Timestamp of current bar
+        """
+        return self.index[self._row_id].to_pydatetime()
+
+    @property
+    def price(self) -> np.ndarray:
+        """
+        Pool price of each pool in current bar, base token price in quote token
+        """
+        return self._prices[self._row_id]
+
+    @property
+    def close_tick(self) -> np.ndarray:
+        """
+        Tick of each pool in current bar
+        """
+        return self._close_ticks[self._row_id]
+
+    @property
+    def base_balance(self) -> np.ndarray:
+        """
+        Base token balance of each pool
+        """
+        return self._base_balance
+
+    @property
+    def quote_balance(self) -> np.ndarray:
+        """
+        Quote token balance of each pool
+        """
+        return self._quote_balance
+
+    @property
+    def liquidity(self) -> np.ndarray:
+        """
+        Liquidity of positions, shape is (pool count, max positions), empty position slot has 0 liquidity
+        """
+        return self._liquidity
+
+    @property
+    def lower_ticks(self) -> np.ndarray:
+        """
+        Lower tick of positions, shape is (pool count, max positions)
+        """
+        return self._lower_ticks
+
+    @property
+    def upper_ticks(self) -> np.ndarray:
+        """
+        Upper tick of positions, shape is (pool count, max positions)
+        """
+        return self._upper_ticks
+
+    @property
+    def position_count(self) -> np.ndarray:
+        """
+        Count of positions in each pool
+        """
+        return (self._liquidity > 0).sum(axis=1)
+
+    @property
+    def account_status_df(self) -> MarketDict[pd.DataFrame]:
+        """
+        | Account status of each pool, keyed by market info. columns are the same as account_status_df of Actuator.
+        | Only available after run.
+        """
+        if self._status is None:
+            raise DemeterError("please run simulator first")
+        if self._account_status_df is None:
+            self._account_status_df = MarketDict()
+            for i, market in enumerate(self.markets):
+                self._account_status_df[market.market_info] = self.__status_to_dataframe(i)
+        return self._account_status_df
+
+    # endregion
+
+    def __select(self, pools: np.ndarray | List[int] | None) -> np.ndarray:
+        """
+        Convert pool mask or pool ids to pool ids
+        """
+        if pools is None:
+            return np.arange(len(self.markets))
+        pools = np.asarray(pools)
+        return np.flatnonzero(pools) if pools.dtype == bool else pools.astype(int)
+
+    def __broadcast(self, value, pool_ids: np.ndarray, default: np.ndarray | None = None) -> np.ndarray:
+        """
+        Get value of selected pools, value can be a scalar or an array for all pools, None means default
+        """
+        if value is None:
+            return default[pool_ids]
+        value = np.asarray(value, dtype=float)
+        return value[pool_ids] if value.ndim > 0 else np.full(len(pool_ids), float(value))
+
+    @staticmethod
+    def __check_balance(balance: np.ndarray, pool_ids: np.ndarray, amount: np.ndarray, name: str) -> np.ndarray:
+        """
+        | Raise DemeterError if balance of any selected pool is less than amount.
+        | Like Asset.sub, if difference between balance and amount is below 0.001%, it's considered as all the balance,
+        | because float calculation has some error. Return mask of pools whose balance are all used.
+        """
+        old_balance = balance[pool_ids]
+        all_used = np.isclose(old_balance, amount, rtol=1e-5, atol=0)
+        insufficient = (old_balance < amount) & ~all_used
+        if np.any(insufficient):
+            raise DemeterError(
+                f"insufficient {name} balance in pools {pool_ids[insufficient].tolist()}, "
+                f"balance is {old_balance[insufficient].tolist()}, but amount is {amount[insufficient].tolist()}"
+            )
+        return all_used
+
+    @staticmethod
+    def __subtract_balance(balance: np.ndarray, pool_ids: np.ndarray, amount: np.ndarray, name: str):
+        """
+        Subtract amount from balance of selected pools, raise DemeterError if any balance is not enough.
+        """
+        all_used = UniLpBatchSimulator.__check_balance(balance, pool_ids, amount, name)
+        balance[pool_ids] = np.where(all_used, 0, balance[pool_ids] - amount)
+
+    def __sqrt_price(self, pool_ids: np.ndarray) -> np.ndarray:
+        return np.exp(self._close_ticks[self._row_id, pool_ids] * _LOG_SQRT_1P0001)
+
+    def __get_amounts(self, pool_ids: np.ndarray) -> tuple:
+        """
+        Get token0 and token1 amount of positions in selected pools, shape is (len(pool_ids), max positions)
+        """
+        sqrt_price = self.__sqrt_price(pool_ids)[:, None]
+        sqrt_a = np.exp(self._lower_ticks[pool_ids] * _LOG_SQRT_1P0001)
+        sqrt_b = np.exp(self._upper_ticks[pool_ids] * _LOG_SQRT_1P0001)
+        sqrt_price = np.clip(sqrt_price, sqrt_a, sqrt_b)
+        liquidity = self._liquidity[pool_ids]
+        amount0 = liquidity * (sqrt_b - sqrt_price) / (sqrt_price * sqrt_b) / 10 ** self._decimal0[pool_ids, None]
+        amount1 = liquidity * (sqrt_price - sqrt_a) / 10 ** self._decimal1[pool_ids, None]
+        return amount0, amount1
+
+    def __to_base_quote(self, amount0: np.ndarray, amount1: np.ndarray, pool_ids: np.ndarray) -> tuple:
+        is_token0_quote = self._is_token0_quote[pool_ids]
+        if amount0.ndim > 1:
+            is_token0_quote = is_token0_quote[:, None]
+        return np.where(is_token0_quote, amount1, amount0), np.where(is_token0_quote, amount0, amount1)
+
+    def set_balance(self, base_amount, quote_amount, pools: np.ndarray | List[int] | None = None):
+        """
+        Set token balance of pools
+
+        :param base_amount: base token amount, a scalar, or an array with a value for each pool
+        :type base_amount: float | np.ndarray
+        :param quote_amount: quote token amount, a scalar, or an array with a value for each pool
+        :type quote_amount: float | np.ndarray
+        :param pools: pools to set, a bool mask or pool ids, if None, set all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        self._base_balance[pool_ids] = self.__broadcast(base_amount, pool_ids)
+        self._quote_balance[pool_ids] = self.__broadcast(quote_amount, pool_ids)
+
+    def add_liquidity(
+        self,
+        lower_quote_price,
+        upper_quote_price,
+        base_max_amount=None,
+        quote_max_amount=None,
+        pools: np.ndarray | List[int] | None = None,
+    ):
+        """
+        Add liquidity by price range, price will be converted to the nearest usable tick, like UniLpMarket.add_liquidity
+
+        :param lower_quote_price: lower price base on quote token, a scalar or an array for all pools
+        :type lower_quote_price: float | np.ndarray
+        :param upper_quote_price: upper price base on quote token, a scalar or an array for all pools
+        :type upper_quote_price: float | np.ndarray
+        :param base_max_amount: max base token to deposit, if None, will use all the balance
+        :type base_max_amount: float | np.ndarray
+        :param quote_max_amount: max quote token to deposit, if None, will use all the balance
+        :type quote_max_amount: float | np.ndarray
+        :param pools: pools to add liquidity, a bool mask or pool ids, if None, add to all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        ticks = []
+        for price in (lower_quote_price, upper_quote_price):
+            price = self.__broadcast(price, pool_ids)
+            is_token0_quote = self._is_token0_quote[pool_ids]
+            pool_price = np.where(is_token0_quote, 1 / price, price)
+            atomic_unit_price = pool_price / 10 ** (self._decimal0[pool_ids] - self._decimal1[pool_ids])
+            tick = np.trunc(np.log(np.sqrt(atomic_unit_price)) / _LOG_SQRT_1P0001)
+            spacing = self._tick_spacing[pool_ids]
+            rounded = np.round(tick / spacing) * spacing
+            rounded = np.where(rounded < -_MAX_TICK, rounded + spacing, rounded)
+            ticks.append(np.where(rounded > _MAX_TICK, rounded - spacing, rounded))
+        lower_ticks = np.where(self._is_token0_quote[pool_ids], ticks[1], ticks[0])
+        upper_ticks = np.where(self._is_token0_quote[pool_ids], ticks[0], ticks[1])
+        self.__add_liquidity(
+            pool_ids,
+            lower_ticks,
+            upper_ticks,
+            self.__broadcast(base_max_amount, pool_ids, self._base_balance),
+            self.__broadcast(quote_max_amount, pool_ids, self._quote_balance),
+        )
+
+    def add_liquidity_by_tick(
+        self,
+        lower_tick,
+        upper_tick,
+        base_max_amount=None,
+        quote_max_amount=None,
+        pools: np.ndarray | List[int] | None = None,
+    ):
+        """
+        | Add liquidity by tick range. If a pool has a position with the same range, liquidity is added to that position,
+        | or a new position is created in an empty slot.
+
+        :param lower_tick: lower tick, a scalar or an array for all pools
+        :type lower_tick: int | np.ndarray
+        :param upper_tick: upper tick, a scalar or an array for all pools
+        :type upper_tick: int | np.ndarray
+        :param base_max_amount: max base token to deposit, if None, will use all the balance
+        :type base_max_amount: float | np.ndarray
+        :param quote_max_amount: max quote token to deposit, if None, will use all the balance
+        :type quote_max_amount: float | np.ndarray
+        :param pools: pools to add liquidity, a bool mask or pool ids, if None, add to all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        self.__add_liquidity(
+            pool_ids,
+            self.__broadcast(lower_tick, pool_ids),
+            self.__broadcast(upper_tick, pool_ids),
+            self.__broadcast(base_max_amount, pool_ids, self._base_balance),
+            self.__broadcast(quote_max_amount, pool_ids, self._quote_balance),
+        )
+
+    def __add_liquidity(
+        self,
+        pool_ids: np.ndarray,
+        lower_tick: np.ndarray,
+        upper_tick: np.ndarray,
+        base_amount: np.ndarray,
+        quote_amount: np.ndarray,
+    ):
+        spacing = self._tick_spacing[pool_ids]
+        if np.any(lower_tick % spacing != 0) or np.any(upper_tick % spacing != 0):
+            raise DemeterError("tick should match tick space")
+        if np.any(lower_tick > upper_tick):
+            raise DemeterError("lower tick should be less than upper tick")
+        UniLpBatchSimulator.__check_balance(self._base_balance, pool_ids, base_amount, "base")
+        UniLpBatchSimulator.__check_balance(self._quote_balance, pool_ids, quote_amount, "quote")
+
+        active = self._liquidity[pool_ids] > 0
+        same_range = active & (self._lower_ticks[pool_ids] == lower_tick[:, None])
+        same_range &= self._upper_ticks[pool_ids] == upper_tick[:, None]
+        if np.any(~(same_range.any(axis=1) | (~active).any(axis=1))):
+            raise DemeterError(f"no empty position slot, max positions is {self.max_positions}")
+        slots = np.where(same_range.any(axis=1), same_range.argmax(axis=1), (~active).argmax(axis=1))
+
+        is_token0_quote = self._is_token0_quote[pool_ids]
+        amount0 = np.trunc(np.where(is_token0_quote, quote_amount, base_amount) * 10 ** self._decimal0[pool_ids])
+        amount1 = np.trunc(np.where(is_token0_quote, base_amount, quote_amount) * 10 ** self._decimal1[pool_ids])
+
+        sqrt_price = self.__sqrt_price(pool_ids)
+        sqrt_a = np.exp(lower_tick * _LOG_SQRT_1P0001)
+        sqrt_b = np.exp(upper_tick * _LOG_SQRT_1P0001)
+        sqrt_in_range = np.clip(sqrt_price, sqrt_a, sqrt_b)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            liquidity0 = amount0 * sqrt_in_range * sqrt_b / (sqrt_b - sqrt_in_range)
+            liquidity1 = amount1 / (sqrt_in_range - sqrt_a)
+        liquidity = np.where(
+            sqrt_price <= sqrt_a,
+            liquidity0,
+            np.where(sqrt_price >= sqrt_b, liquidity1, np.minimum(liquidity0, liquidity1)),
+        )
+        liquidity = np.floor(np.nan_to_num(liquidity, nan=0.0, posinf=0.0))
+        used0 = liquidity * (sqrt_b - sqrt_in_range) / (sqrt_in_range * sqrt_b) / 10 ** self._decimal0[pool_ids]
+        used1 = liquidity * (sqrt_in_range - sqrt_a) / 10 ** self._decimal1[pool_ids]
+
+        self._lower_ticks[pool_ids, slots] = lower_tick
+        self._upper_ticks[pool_ids, slots] = upper_tick
+        self._liquidity[pool_ids, slots] += liquidity
+        base_used, quote_used = self.__to_base_quote(used0, used1, pool_ids)
+        UniLpBatchSimulator.__subtract_balance(self._base_balance, pool_ids, base_used, "base")
+        UniLpBatchSimulator.__subtract_balance(self._quote_balance, pool_ids, quote_used, "quote")
+        self._changed[pool_ids] = True
+
+    def remove_all_liquidity(self, pools: np.ndarray | List[int] | None = None):
+        """
+        Remove all positions in pools, tokens and fee will be collected to balance.
+
+        :param pools: pools to remove liquidity, a bool mask or pool ids, if None, remove from all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        amount0, amount1 = self.__get_amounts(pool_ids)
+        base_amount, quote_amount = self.__to_base_quote(amount0.sum(axis=1), amount1.sum(axis=1), pool_ids)
+        self.collect_fee(pool_ids)
+        self._base_balance[pool_ids] += base_amount
+        self._quote_balance[pool_ids] += quote_amount
+        self._liquidity[pool_ids] = 0
+        self._lower_ticks[pool_ids] = 0
+        self._upper_ticks[pool_ids] = 0
+
+    def collect_fee(self, pools: np.ndarray | List[int] | None = None):
+        """
+        Collect fee of all positions in pools to balance.
+
+        :param pools: pools to collect fee, a bool mask or pool ids, if None, collect all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        base_fee, quote_fee = self.__to_base_quote(
+            self._fee0[pool_ids].sum(axis=1), self._fee1[pool_ids].sum(axis=1), pool_ids
+        )
+        self._base_balance[pool_ids] += base_fee
+        self._quote_balance[pool_ids] += quote_fee
+        self._fee0[pool_ids] = 0
+        self._fee1[pool_ids] = 0
+        self._changed[pool_ids] = True
+
+    def buy(self, base_amount, pools: np.ndarray | List[int] | None = None):
+        """
+        Buy base token with quote token at pool price, pool fee is paid in quote token.
+
+        :param base_amount: amount of base token to buy, a scalar or an array for all pools
+        :type base_amount: float | np.ndarray
+        :param pools: pools to buy, a bool mask or pool ids, if None, buy in all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        base_amount = self.__broadcast(base_amount, pool_ids)
+        price = self._prices[self._row_id, pool_ids]
+        quote_amount = base_amount * price / (1 - self._fee_rate[pool_ids])
+        UniLpBatchSimulator.__subtract_balance(self._quote_balance, pool_ids, quote_amount, "quote")
+        self._base_balance[pool_ids] += base_amount
+
+    def sell(self, base_amount, pools: np.ndarray | List[int] | None = None):
+        """
+        Sell base token for quote token at pool price, pool fee is paid in base token.
+
+        :param base_amount: amount of base token to sell, a scalar or an array for all pools
+        :type base_amount: float | np.ndarray
+        :param pools: pools to sell, a bool mask or pool ids, if None, sell in all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        base_amount = self.__broadcast(base_amount, pool_ids)
+        price = self._prices[self._row_id, pool_ids]
+        UniLpBatchSimulator.__subtract_balance(self._base_balance, pool_ids, base_amount, "base")
+        self._quote_balance[pool_ids] += base_amount * (1 - self._fee_rate[pool_ids]) * price
+
+    def even_rebalance(self, pools: np.ndarray | List[int] | None = None):
+        """
+        Divide assets equally between two tokens in pools, like UniLpMarket.even_rebalance
+
+        :param pools: pools to rebalance, a bool mask or pool ids, if None, rebalance all pools
+        :type pools: np.ndarray | List[int]
+        """
+        pool_ids = self.__select(pools)
+        price = self._prices[self._row_id, pool_ids]
+        fee_rate = self._fee_rate[pool_ids]
+        base, quote = self._base_balance[pool_ids], self._quote_balance[pool_ids]
+        delta_base = (quote / price - base) / (2 + fee_rate)
+        delta_quote = (base - quote / price) / (2 - fee_rate)
+        self.buy(np.where(delta_base >= 0, delta_base, 0), pool_ids)
+        self.sell(np.where(delta_base < 0, delta_quote, 0), pool_ids)
+
+    def __update_fee(self, row: int):
+        """
+        Add fee of this bar to positions, the same as V3CoreLib.update_fee_batch but for all pools.
+        """
+        close_tick = self._close_ticks[row][:, None]
+        # if positions changed in this bar, last tick is tick of this bar, just like UniLpMarket
+        last_tick = np.where(self._changed, self._close_ticks[row], self._last_ticks[row])[:, None]
+        lower, upper = self._lower_ticks, self._upper_ticks
+        in_position = (upper >= close_tick) & (close_tick >= lower)
+        over_position = ((last_tick > upper) & (close_tick < lower)) | ((close_tick > upper) & (last_tick < lower))
+        in_to_out_position = ((upper >= last_tick) & (last_tick >= lower)) & ((close_tick > upper) | (close_tick < lower))
+        mask = (in_position | over_position | in_to_out_position) & (self._liquidity > 0)
+
+        current_liquidity = self._current_liquidity[row] + self._liquidity.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(mask, self._liquidity / current_liquidity[:, None], 0.0)
+        self._fee0 += self._in_amount0[row][:, None] * share
+        self._fee1 += self._in_amount1[row][:, None] * share
+
+    def __record_status(self, row: int):
+        pool_ids = np.arange(len(self.markets))
+        amount0, amount1 = self.__get_amounts(pool_ids)
+        base_in_position, quote_in_position = self.__to_base_quote(amount0.sum(axis=1), amount1.sum(axis=1), pool_ids)
+        base_fee, quote_fee = self.__to_base_quote(self._fee0.sum(axis=1), self._fee1.sum(axis=1), pool_ids)
+        price = self._prices[row]
+        market_value = (base_in_position + base_fee) * price + quote_in_position + quote_fee
+        status = self._status[row]
+        status[:, 0] = market_value + self._quote_balance + self._base_balance * price
+        status[:, 1] = self._base_balance
+        status[:, 2] = self._quote_balance
+        status[:, 3] = market_value
+        status[:, 4] = base_fee
+        status[:, 5] = quote_fee
+        status[:, 6] = base_in_position
+        status[:, 7] = quote_in_position
+        status[:, 8] = self.position_count
+        status[:, 9] = price
+
+    def __status_to_dataframe(self, pool_id: int) -> pd.DataFrame:
+        market = self.markets[pool_id]
+        base, quote = market.base_token.name.upper(), market.quote_token.name.upper()
+        name = market.market_info.name
+        columns = [
+            ("net_value", ""),
+            ("tokens", base),
+            ("tokens", quote),
+            (name, "net_value"),
+            (name, "base_uncollected"),
+            (name, "quote_uncollected"),
+            (name, "base_in_position"),
+            (name, "quote_in_position"),
+            (name, "position_count"),
+            ("price", base),
+        ]
+        df = pd.DataFrame(self._status[:, pool_id, :], index=self.index, columns=pd.MultiIndex.from_tuples(columns))
+        df[(name, "position_count")] = df[(name, "position_count")].astype(int)
+        df[("price", quote)] = 1.0
+        df.columns.names = ["l1", "l2"]
+        return df
+
+    def run(self):
+        """
+        | Run strategy on all pools, in every bar:
+        | run strategy.on_bar(), add fee of this bar, run strategy.after_bar(), record account status of all pools.
+        """
+        if self.strategy is None:
+            raise DemeterError("strategy is not set")
+        self.strategy.simulator = self
+        self._status = np.zeros((len(self.index), len(self.markets), 10))
+        self._account_status_df = None
+        self._row_id = 0
+        self.strategy.initialize()
+        with tqdm(total=len(self.index), ncols=150) as pbar:
+            for row in range(len(self.index)):
+                self._row_id = row
+                self._changed[:] = False
+                self.strategy.on_bar(row)
+                self.__update_fee(row)
+                self.strategy.after_bar(row)
+                self.__record_status(row)
+                pbar.update()
@@ -1,4 +1,8 @@
+from dataclasses import dataclass, field
 from decimal import Decimal
+from typing import Dict, Tuple
+
+import numpy as np
 
 from ._typing import UniV3Pool, Position, UniV3PoolStatus, PositionInfo
 from .helper import base_unit_price_to_tick, from_atomic_unit
@@ -144,3 +148,64 @@ class V3CoreLib(object):
 
         if condition_in_position or condition_over_position or condition_in_to_out_position:
             calc_amounts()
+
+    @staticmethod
+    def update_fee_batch(
+        pool: UniV3Pool,
+        pos: PositionInfo,
+        liquidity: int,
+        last_ticks: np.ndarray,
+        close_ticks: np.ndarray,
+        in_amount0: np.ndarray,
+        in_amount1: np.ndarray,
+        current_liquidity: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        | Vectorized version of update_fee, calculate fee of a position in a span of bars at once.
+        | Liquidity of position should not change in this span. Result is in float, so there will be a tiny error compared to update_fee
+
+        :param pool: operation on which pool
+        :param pos: position info
+        :param liquidity: liquidity of position
+        :param last_ticks: tick of previous bar, nan means no previous tick
+        :param close_ticks: close tick of every bar
+        :param in_amount0: swap in amount of token0 in every bar, in atomic unit
+        :param in_amount1: swap in amount of token1 in every bar, in atomic unit
+        :param current_liquidity: total liquidity of pool in every bar(user liquidity included)
+        :return: fee of token0 and token1 in every bar
+        """
+        in_position = (pos.upper_tick >= close_ticks) & (close_ticks >= pos.lower_tick)
+        # comparison with nan is always false, so bars without last tick will not cross position
+        over_position = ((last_ticks > pos.upper_tick) & (close_ticks < pos.lower_tick)) | (
+            (close_ticks > pos.upper_tick) & (last_ticks < pos.lower_tick)
+        )
+        in_to_out_position = ((pos.upper_tick >= last_ticks) & (last_ticks >= pos.lower_tick)) & (
+            (close_ticks > pos.upper_tick) | (close_ticks < pos.lower_tick)
+        )
+        mask = in_position | over_position | in_to_out_position
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(mask, float(liquidity) / current_liquidity, 0.0)
+        fee_rate = float(pool.fee_rate)
+        fee0 = np.trunc(in_amount0) / 10**pool.token0.decimal * share * fee_rate
+        fee1 = np.trunc(in_amount1) / 10**pool.token1.decimal * share * fee_rate
+        return fee0, fee1
+
+
+@dataclass
+class FeeBatch:
+    """
+    Fee of positions in a span of bars, calculated by V3CoreLib.update_fee_batch
+
+    :param key: positions and their liquidity when this batch is created, batch is invalid once positions changed
+    :param start: start row of this batch
+    :param end: end row of this batch, not included
+    :param last_ticks: tick of previous bar, used to check if batch is consistent with market status
+    :param fees: fee of token0 and token1 in every bar, key is position
+    """
+
+    key: Tuple
+    start: int
+    end: int
+    last_ticks: np.ndarray
+    fees: Dict[PositionInfo, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
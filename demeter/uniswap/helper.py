@@ -1,8 +1,11 @@
 import math
 from decimal import Decimal, getcontext
-from typing import Tuple, NamedTuple
+from typing import Callable, List, NamedTuple, Tuple
 
-from .liquitidy_math import get_sqrt_ratio_at_tick, get_liquidity, get_amounts
+import numpy as np
+import pandas as pd
+
+from .liquitidy_math import get_sqrt_ratio_at_tick, get_liquidity, get_amounts, MAX_TICK, MIN_TICK
 from .. import DemeterError
 
 Q96 = Decimal(2**96)
@@ -119,6 +122,42 @@ def tick_to_base_unit_price(tick: int, token_0_decimal: int, token_1_decimal: in
     return Decimal(1 / pool_price) if is_token0_quote else pool_price
 
 
+def ticks_to_base_unit_price(
+    ticks: np.ndarray | pd.Series,
+    token_0_decimal: int,
+    token_1_decimal: int,
+    is_token0_quote: bool,
+    high_precision: bool = True,
+) -> np.ndarray:
+    """
+    | Vectorized version of tick_to_base_unit_price, convert an array of ticks to quote price.
+    | In high precision mode, price is Decimal and the same as tick_to_base_unit_price, but it's only calculated once for each unique tick.
+    | Or price will be float64 calculated by numpy. relative error is about 1e-11
+
+    :param ticks: tick array, nan is allowed, and its price will be nan
+    :param token_0_decimal: token0 decimal
+    :param token_1_decimal: token1 decimal
+    :param is_token0_quote: quote on token0
+    :param high_precision: return Decimal price or float price
+    :return: quote price array, dtype is object in high precision mode, or float64
+    """
+    ticks = np.asarray(ticks, dtype=float)
+    if not high_precision:
+        exponent = -ticks if is_token0_quote else ticks
+        decimal_diff = token_1_decimal - token_0_decimal if is_token0_quote else token_0_decimal - token_1_decimal
+        return np.exp(exponent * math.log(1.0001)) * 10.0**decimal_diff
+
+    result = np.full(len(ticks), np.nan, dtype=object)
+    not_nan = ~np.isnan(ticks)
+    unique_ticks, inverse = np.unique(ticks[not_nan].astype(np.int64), return_inverse=True)
+    unique_prices = np.empty(len(unique_ticks), dtype=object)
+    unique_prices[:] = [
+        tick_to_base_unit_price(int(t), token_0_decimal, token_1_decimal, is_token0_quote) for t in unique_ticks
+    ]
+    result[not_nan] = unique_prices[inverse]
+    return result
+
+
 def base_unit_price_to_tick(price: Decimal, token_0_decimal: int, token_1_decimal: int, is_token0_quote: bool) -> int:
     """
     quote price to tick price
@@ -277,6 +316,131 @@ def get_delta_gamma_sqrt_x96(
     return delta, gamma
 
 
+def get_delta_gamma_array(
+    lower_price: float,
+    upper_price: float,
+    prices: np.ndarray | pd.Series,
+    liquidity: int,
+    decimal0: int,
+    decimal1: int,
+    is_token0_quote: bool,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    | Vectorized version of get_delta_gamma, get delta and gamma of a position on a price path or a price grid.
+    | Calculation is the same as get_delta_gamma, but it's done by numpy in float64.
+
+    :param lower_price: lower price
+    :type lower_price: float
+    :param upper_price: upper price
+    :type upper_price: float
+    :param prices: price array
+    :type prices: np.ndarray | pd.Series
+    :param liquidity: liquidity
+    :type liquidity: int
+    :param decimal0: decimal 0
+    :type decimal0: int
+    :param decimal1: decimal 1
+    :type decimal1: int
+    :param is_token0_quote: check if token 0 is quote
+    :type is_token0_quote: bool
+    :return: delta and gamma arrays, with the same length of prices
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    sqrt_a = base_unit_price_to_sqrt_price_x96(Decimal(lower_price), decimal0, decimal1, is_token0_quote)
+    sqrt_b = base_unit_price_to_sqrt_price_x96(Decimal(upper_price), decimal0, decimal1, is_token0_quote)
+    if sqrt_a > sqrt_b:
+        sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    return _delta_gamma_array(
+        float(lower_price),
+        sqrt_a,
+        float(upper_price),
+        sqrt_b,
+        np.asarray(prices, dtype=np.float64),
+        liquidity,
+        decimal0,
+        decimal1,
+        is_token0_quote,
+    )
+
+
+def get_delta_gamma_sqrt_x96_array(
+    lower_sqrt_price_x96: int,
+    upper_sqrt_price_x96: int,
+    sqrt_prices_x96: np.ndarray | pd.Series,
+    liquidity: int,
+    decimal0: int,
+    decimal1: int,
+    is_token0_quote: bool,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    | Get delta and gamma of a position on a sqrt x96 price path, such as sqrtPriceX96 of pool.
+    | Position bounds are in sqrt x96 price too, e.g. get_sqrt_ratio_at_tick(lower_tick).
+
+    :param lower_sqrt_price_x96: sqrt x96 price of a bound
+    :type lower_sqrt_price_x96: int
+    :param upper_sqrt_price_x96: sqrt x96 price of the other bound
+    :type upper_sqrt_price_x96: int
+    :param sqrt_prices_x96: sqrt x96 price array
+    :type sqrt_prices_x96: np.ndarray | pd.Series
+    :param liquidity: liquidity
+    :type liquidity: int
+    :param decimal0: decimal 0
+    :type decimal0: int
+    :param decimal1: decimal 1
+    :type decimal1: int
+    :param is_token0_quote: check if token 0 is quote
+    :type is_token0_quote: bool
+    :return: delta and gamma arrays, with the same length of prices
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    sqrt_a, sqrt_b = sorted([int(lower_sqrt_price_x96), int(upper_sqrt_price_x96)])
+
+    def to_price(sqrt_price_x96):
+        pool_price = (sqrt_price_x96 / 2.0**96) ** 2 * 10.0 ** (decimal0 - decimal1)
+        return 1 / pool_price if is_token0_quote else pool_price
+
+    # sqrt_a is the lower price if token1 is quote, or it's the upper price
+    lower_price, upper_price = sorted([to_price(sqrt_a), to_price(sqrt_b)])
+    prices = to_price(np.asarray(sqrt_prices_x96, dtype=np.float64))
+    return _delta_gamma_array(
+        lower_price, sqrt_a, upper_price, sqrt_b, prices, liquidity, decimal0, decimal1, is_token0_quote
+    )
+
+
+def _delta_gamma_array(
+    lower_price: float,
+    sqrtA: int,
+    upper_price: float,
+    sqrtB: int,
+    prices: np.ndarray,
+    liquidity: int,
+    d0: int,
+    d1: int,
+    is_token0_quote: bool,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The same formula as get_delta_gamma_sqrt_x96, prices is an array
+    """
+    k = 2**96
+    m = 10 ** (0.5 * (d0 - d1))
+    # liquidity may exceed int64, numpy will make an object array
+    liquidity = float(liquidity)
+    below = prices <= lower_price
+    in_range = (lower_price < prices) & (prices < upper_price)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sqrt_p = np.sqrt(prices)
+        if is_token0_quote:
+            delta_below = liquidity / 2**96 / 10**d1 * (sqrtB - sqrtA)
+            delta_in_range = liquidity * (0.5 * m / sqrt_p / 10**d0 + 0.5 / 10**d1 / m / sqrt_p - sqrtA / k / 10**d1)
+        else:
+            delta_below = liquidity / 10**d0 * (k / sqrtA - k / sqrtB)
+            delta_in_range = liquidity * (0.5 * m / sqrt_p / 10**d0 + 0.5 / 10**d1 / m / sqrt_p - k / sqrtB / 10**d0)
+        gamma_in_range = -0.25 * liquidity / prices**1.5 * (m / 10**d0 + 1 / 10**d1 / m)
+    delta = np.where(below, delta_below, np.where(in_range, delta_in_range, 0.0))
+    gamma = np.where(in_range, gamma_in_range, 0.0)
+    return delta, gamma
+
+
 def get_swap_value(swap_from_token_val, swap_to_token_val, fee_rate, final_ratio):
     # if needed value rate is K, calculate how many value to swap, need deduct swap fee
     # final_ratio = final_from_token_val / final_to_token_value
@@ -341,6 +505,50 @@ class TickResult(NamedTuple):
     lower_delta: int
 
 
+def _tick_range_rate(
+    sqrt_price: int,
+    price: Decimal,
+    center_tick: int,
+    upper_steps: int,
+    lower_steps: int,
+    tick_spacing: int,
+    decimal0: int,
+    decimal1: int,
+    is_0_quote: bool,
+) -> Tuple[Decimal, int, int]:
+    """
+    Value rate(value1/value0) of a position at center tick, whose range is [center - lower_steps * spacing, center + upper_steps * spacing]
+
+    :return: rate, upper tick, lower tick
+    """
+    upper = center_tick + upper_steps * tick_spacing
+    lower = center_tick - lower_steps * tick_spacing
+    if is_0_quote:
+        token0_amount, token1_amount = price, Decimal(1)
+    else:
+        token1_amount, token0_amount = price, Decimal(1)
+    liq = get_liquidity(sqrt_price, lower, upper, token0_amount, token1_amount, decimal0, decimal1)
+    amount0, amount1 = get_amounts(sqrt_price, lower, upper, liq, decimal0, decimal1)
+    if is_0_quote:
+        val0, val1 = amount0, amount1 * price
+    else:
+        val0, val1 = amount0 * price, amount1
+    return val1 / val0, upper, lower
+
+
+def _bisect_left(predicate: Callable[[int], bool], lo: int, hi: int) -> int:
+    """
+    Find the first value in [lo, hi] where predicate is true, predicate should be monotone, and true at hi.
+    """
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if predicate(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
 def find_tick_range_at_rate(
     price: Decimal,
     rate: Decimal,
@@ -349,9 +557,13 @@ def find_tick_range_at_rate(
     decimal1: int,
     is_0_quote: bool,
     error=Decimal("0.00001"),
-):
+) -> TickResult | None:
     """
-    Find iteratively, for a specific price, what tick range can make the quantities of two tokens exactly equal to a specific ratio.
+    | For a specific price, find what tick range can make the values of two tokens exactly equal to a specific ratio.
+    | Upper tick is moved from center tick by tick spacing, and the nearest lower tick which reaches the rate is found.
+    | Rate decreases when upper tick moves up, and increases when lower tick moves down,
+    | so the first upper tick and the lower tick are found by bisection instead of trying every tick.
+
     :param price: center price, it will be trimed according to tick space
     :param rate: the rate you want. amount1/amount0
     :param tick_spacing: tick spacing of the pool
@@ -363,41 +575,159 @@ def find_tick_range_at_rate(
     """
     center_tick = base_unit_price_to_tick(price, decimal0, decimal1, is_0_quote)
     center_tick = nearest_usable_tick(center_tick, tick_spacing)
-    idx = tick_spacing
-
     sqrt_price = tick_to_sqrt_price_x96(center_tick)
     price = sqrt_price_x96_to_base_unit_price(sqrt_price, decimal0, decimal1, is_0_quote)
-    if is_0_quote:
-        token0_amount, token1_amount = price, Decimal(1)
-    else:
-        token1_amount, token0_amount = price, Decimal(1)
-
     rate = rate.quantize(error)
 
-    while center_tick + idx <= 887272:
-        print("trying", center_tick + idx)
-        upper = center_tick + idx
-        lower_idx = idx
-        val1, val0 = 0, 1
-        while val1 / val0 <= rate:
-            lower_idx += tick_spacing
-            lower = center_tick - lower_idx
-            liq = get_liquidity(sqrt_price, lower, upper, token0_amount, token1_amount, decimal0, decimal1)
-            amount0, amount1 = get_amounts(sqrt_price, lower, upper, liq, decimal0, decimal1)
-            if is_0_quote:
-                val0, val1 = amount0, amount1 * price
-            else:
-                val0, val1 = amount0 * price, amount1
-
-            if (val1 / val0).quantize(error) == rate:
-                return TickResult(
+    def quantized_rate(upper_steps: int, lower_steps: int) -> Decimal:
+        return _tick_range_rate(
+            sqrt_price, price, center_tick, upper_steps, lower_steps, tick_spacing, decimal0, decimal1, is_0_quote
+        )[0].quantize(error)
+
+    max_upper_steps = (MAX_TICK - center_tick) // tick_spacing
+    max_lower_steps = (center_tick - MIN_TICK) // tick_spacing
+    if max_upper_steps < 1 or max_lower_steps < 2:
+        return None
+    # the narrowest range of an upper tick has the largest rate, skip upper ticks whose narrowest range exceed the rate
+    first_upper = _bisect_left(
+        lambda u: u + 1 > max_lower_steps or quantized_rate(u, u + 1) <= rate, 1, max_upper_steps + 1
+    )
+    for upper_steps in range(first_upper, max_upper_steps + 1):
+        if upper_steps + 1 > max_lower_steps or quantized_rate(upper_steps, max_lower_steps) < rate:
+            # the widest range can not reach the rate, and it will be smaller when upper tick moves up
+            return None
+        lower_steps = _bisect_left(lambda l: quantized_rate(upper_steps, l) >= rate, upper_steps + 1, max_lower_steps)
+        actual_rate, upper, lower = _tick_range_rate(
+            sqrt_price, price, center_tick, upper_steps, lower_steps, tick_spacing, decimal0, decimal1, is_0_quote
+        )
+        if actual_rate.quantize(error) == rate:
+            return TickResult(
+                final_price=tick_to_base_unit_price(center_tick, decimal0, decimal1, is_0_quote),
+                rate=actual_rate,
+                center_tick=center_tick,
+                upper=upper,
+                lower=lower,
+                upper_delta=upper - center_tick,
+                lower_delta=lower - center_tick,
+            )
+    return None
+
+
+def find_tick_ranges_at_rate(
+    prices: List[Decimal] | pd.Series,
+    rates: List[Decimal] | pd.Series,
+    tick_spacing: int,
+    decimal0: int,
+    decimal1: int,
+    is_0_quote: bool,
+    error=Decimal("0.00001"),
+    block_size: int = 4096,
+) -> pd.DataFrame:
+    """
+    | Vectorized version of find_tick_range_at_rate, solve many (price, rate) pairs at once, e.g. to precompute a rebalance schedule.
+    | Value rate of a range only depends on tick distances, rate = (1 - sqrt(1.0001)^-lower_distance) / (1 - sqrt(1.0001)^-upper_distance),
+    | so candidates of all pairs are found by numpy in float, upper ticks are tried in blocks.
+    | Every candidate is checked by the same Decimal calculation as find_tick_range_at_rate,
+    | if a candidate is not confirmed because of float error, this pair will be solved by find_tick_range_at_rate.
+
+    :param prices: center prices
+    :type prices: List[Decimal] | Series
+    :param rates: rates for each price, amount1/amount0
+    :type rates: List[Decimal] | Series
+    :param tick_spacing: tick spacing of the pool
+    :type tick_spacing: int
+    :param decimal0: decimal 0
+    :type decimal0: int
+    :param decimal1: decimal 1
+    :type decimal1: int
+    :param is_0_quote: token 0 is the quote token
+    :type is_0_quote: bool
+    :param error: error of rate
+    :type error: Decimal
+    :param block_size: count of upper ticks tried in a round
+    :type block_size: int
+    :return: a row for each pair, columns are fields of TickResult, if a pair can not be solved, its row is nan. If prices is a Series, its index is kept.
+    :rtype: DataFrame
+    """
+    if len(prices) != len(rates):
+        raise DemeterError("length of prices and rates should be the same")
+    index = prices.index if isinstance(prices, pd.Series) else pd.RangeIndex(len(prices))
+    prices = [Decimal(p) for p in prices]
+    rates = [Decimal(r).quantize(error) for r in rates]
+    count = len(prices)
+
+    center_ticks = np.array(
+        [nearest_usable_tick(base_unit_price_to_tick(p, decimal0, decimal1, is_0_quote), tick_spacing) for p in prices],
+        dtype=np.int64,
+    )
+    max_upper = (MAX_TICK - center_ticks) // tick_spacing
+    max_lower = (center_ticks - MIN_TICK) // tick_spacing
+    rate_low = np.array([float(r - error / 2) for r in rates])
+    rate_high = np.array([float(r + error / 2) for r in rates])
+    log_step = tick_spacing * math.log(math.sqrt(1.0001))
+
+    upper_found = np.zeros(count, dtype=np.int64)
+    lower_found = np.zeros(count, dtype=np.int64)
+    pending = np.flatnonzero((max_upper >= 1) & (max_lower >= 2))
+    start = 1
+    while len(pending) > 0:
+        upper_steps = start + np.arange(block_size)[None, :]
+        lower_limit = max_lower[pending][:, None]
+        in_range = (upper_steps <= max_upper[pending][:, None]) & (upper_steps + 1 <= lower_limit)
+        # 1 - y^-1, where y = sqrt(1.0001)^(upper_steps * spacing)
+        upper_part = -np.expm1(-upper_steps * log_step)
+        # the widest range has the largest rate, if it can't reach the rate, larger upper ticks can't either
+        widest_rate = -np.expm1(-lower_limit * log_step) / upper_part
+        reachable = in_range & (widest_rate >= rate_low[pending][:, None])
+        # smallest lower step whose rate >= rate_low
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lower_steps = np.ceil(-np.log1p(-rate_low[pending][:, None] * upper_part) / log_step)
+        lower_steps = np.maximum(np.nan_to_num(lower_steps, nan=0, posinf=0), upper_steps + 1)
+        lower_rate = -np.expm1(-lower_steps * log_step) / upper_part
+        hit = reachable & (lower_steps <= lower_limit) & (lower_rate < rate_high[pending][:, None])
+
+        has_hit = hit.any(axis=1)
+        first = hit.argmax(axis=1)
+        # no hit, and some upper ticks in this block is out of range or not reachable, so there will be no hit later
+        ended = ~has_hit & ~reachable[:, -1]
+        upper_found[pending[has_hit]] = upper_steps[0, first[has_hit]]
+        lower_found[pending[has_hit]] = lower_steps[has_hit, first[has_hit]]
+        pending = pending[~has_hit & ~ended]
+        start += block_size
+
+    results = []
+    for i in range(count):
+        result = None
+        if upper_found[i] > 0:
+            center_tick = int(center_ticks[i])
+            sqrt_price = tick_to_sqrt_price_x96(center_tick)
+            price = sqrt_price_x96_to_base_unit_price(sqrt_price, decimal0, decimal1, is_0_quote)
+            args = (sqrt_price, price, center_tick)
+            tail = (tick_spacing, decimal0, decimal1, is_0_quote)
+            u, l = int(upper_found[i]), int(lower_found[i])
+            actual_rate, upper, lower = _tick_range_rate(*args, u, l, *tail)
+            if actual_rate.quantize(error) == rates[i] and (
+                l == u + 1 or _tick_range_rate(*args, u, l - 1, *tail)[0].quantize(error) < rates[i]
+            ):
+                result = TickResult(
                     final_price=tick_to_base_unit_price(center_tick, decimal0, decimal1, is_0_quote),
-                    rate=val1 / val0,
+                    rate=actual_rate,
                     center_tick=center_tick,
                     upper=upper,
                     lower=lower,
                     upper_delta=upper - center_tick,
                     lower_delta=lower - center_tick,
                 )
-        idx += tick_spacing
-    return None
+        if result is None and upper_found[i] > 0:
+            # float error moves candidate across the boundary of rate
+            result = find_tick_range_at_rate(prices[i], rates[i], tick_spacing, decimal0, decimal1, is_0_quote, error)
+        results.append(result)
+
+    df = pd.DataFrame(
+        [r if r is not None else [np.nan] * len(TickResult._fields) for r in results],
+        columns=list(TickResult._fields),
+        index=index,
+    )
+    for field in ["center_tick", "upper", "lower", "upper_delta", "lower_delta"]:
+        df[field] = df[field].astype("Int64")
+    return df
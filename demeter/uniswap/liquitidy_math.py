@@ -1,5 +1,7 @@
 import math
 from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, NamedTuple
 
 # -*- coding: utf-8 -*-
 """
@@ -152,13 +154,102 @@ def get_liquidity(
         return liquidity1
 
 
+MAX_TICK = 887272
+MIN_TICK = -887272
+# ticks kept in lru cache of get_sqrt_ratio_at_tick
+SQRT_RATIO_CACHE_SIZE = 65536
+
+
+class SqrtRatioCacheInfo(NamedTuple):
+    """
+    Statistics of sqrt ratio cache, table hits are also counted in hits.
+    """
+
+    hits: int
+    misses: int
+    table_hits: int
+    cache_size: int
+    table_size: int
+
+
+# sqrt ratio of ticks in tick spacing grid, filled by precompute_sqrt_ratio
+_sqrt_ratio_table: Dict[int, int] = {}
+_table_hits = 0
+
+
 def get_sqrt_ratio_at_tick(tick: int) -> int:
     """
-    (sqrt(1.0001) ** tick) * (2**96)
+    | (sqrt(1.0001) ** tick) * (2**96)
+    | Position ticks are used in every bar, so result is looked up from precomputed table first,
+    | then from a lru cache, and calculated only when it's missed.
+    """
+    global _table_hits
+    tick = int(tick)
+    ratio = _sqrt_ratio_table.get(tick)
+    if ratio is not None:
+        _table_hits += 1
+        return ratio
+    return _cached_sqrt_ratio_at_tick(tick)
+
+
+def precompute_sqrt_ratio(tick_spacing: int, lower_tick: int = MIN_TICK, upper_tick: int = MAX_TICK):
+    """
+    | Precompute sqrt ratio of usable ticks of a tick spacing in [lower_tick, upper_tick], so they never miss.
+    | e.g. a strategy on a pool with tick spacing 10 only add liquidity on ticks like 200010, 200020.
+    | Keep the range narrow for small tick spacing, there are 1.7 million ticks for tick spacing 1.
+
+    :param tick_spacing: tick spacing of pool
+    :type tick_spacing: int
+    :param lower_tick: lowest tick to compute
+    :type lower_tick: int
+    :param upper_tick: highest tick to compute
+    :type upper_tick: int
+    """
+    start = max(-(-lower_tick // tick_spacing) * tick_spacing, MIN_TICK)
+    for tick in range(start, min(upper_tick, MAX_TICK) + 1, tick_spacing):
+        if tick not in _sqrt_ratio_table:
+            _sqrt_ratio_table[tick] = calc_sqrt_ratio_at_tick(tick)
+
+
+def get_sqrt_ratio_cache_info() -> SqrtRatioCacheInfo:
+    """
+    Get hit and miss count of sqrt ratio cache, to check if cache or precomputed table works.
+
+    :return: cache statistics
+    :rtype: SqrtRatioCacheInfo
+    """
+    info = _cached_sqrt_ratio_at_tick.cache_info()
+    return SqrtRatioCacheInfo(
+        hits=info.hits + _table_hits,
+        misses=info.misses,
+        table_hits=_table_hits,
+        cache_size=info.currsize,
+        table_size=len(_sqrt_ratio_table),
+    )
+
+
+def clear_sqrt_ratio_cache():
+    """
+    Clear cache, precomputed table and statistics
+    """
+    global _table_hits
+    _cached_sqrt_ratio_at_tick.cache_clear()
+    _sqrt_ratio_table.clear()
+    _table_hits = 0
+
+
+@lru_cache(maxsize=SQRT_RATIO_CACHE_SIZE)
+def _cached_sqrt_ratio_at_tick(tick: int) -> int:
+    return calc_sqrt_ratio_at_tick(tick)
+
+
+def calc_sqrt_ratio_at_tick(tick: int) -> int:
+    """
+    (sqrt(1.0001) ** tick) * (2**96), calculated like TickMath.getSqrtRatioAtTick without cache.
     """
     tick = int(tick)
     abs_tick = tick if tick >= 0 else -tick
-    assert abs_tick <= 887272
+    assert abs_tick <= MAX_TICK
 
     # Those magic number stands for 1/sqrt(1.0001)^1, 1/sqrt(1.0001)^2, 1/sqrt(1.0001)^4....
     ratio: int = 0xFFFCB933BD6FAD37AA2D162D1A594001 if abs_tick & 0x1 != 0 else 0x100000000000000000000000000000000
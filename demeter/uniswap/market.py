@@ -21,10 +21,11 @@ from ._typing import (
     UniswapMarketStatus,
     SwapAction,
 )
-from .core import V3CoreLib
+from .core import V3CoreLib, FeeBatch
 from .data import fillna, resample
 from .helper import (
     tick_to_base_unit_price,
+    ticks_to_base_unit_price,
     base_unit_price_to_tick,
     base_unit_price_to_sqrt_price_x96,
     tick_to_sqrt_price_x96,
@@ -32,6 +33,7 @@ from .helper import (
     MIN_ERROR,
     nearest_usable_tick,
     sqrt_price_x96_to_tick,
+    get_delta_gamma_array,
 )
 from .liquitidy_math import (
     get_sqrt_ratio_at_tick,
@@ -50,6 +52,7 @@ from ..utils import (
     to_decimal,
     require,
 )
+from ..utils.file_cache import read_files
 
 
 class UniLpMarket(Market):
@@ -90,6 +93,17 @@ class UniLpMarket(Market):
         # self.action_buffer = []
         # tick of last minute(previous minute), to compatible with old version, keep default as None
         self.last_tick: int = None
+        # calculate fee with numpy in batches, instead of decimal in every bar. result will have a tiny error,
+        # use batch_fee_tolerance to verify it.
+        self.batch_fee: bool = False
+        # how many rows are calculated in a fee batch
+        self.batch_fee_window: int = 1440
+        # if set, fee of every bar is also calculated in decimal, and DemeterError is raised
+        # if relative error of batch fee is larger than it. It's slow, only for verification.
+        self.batch_fee_tolerance: float | None = None
+        self._fee_batch: FeeBatch | None = None
+        self._row_ids: Dict[datetime, int] | None = None
+        self._row_ids_index: pd.Index | None = None
 
     # region properties
 
@@ -267,11 +281,111 @@ class UniLpMarket(Market):
 
         fee will be calculated by liquidity
         """
+        if self.batch_fee and self.__update_fee_by_batch():
+            return
         for position_info, position in self._positions.items():
             V3CoreLib.update_fee(
                 self.last_tick, self.pool_info, position_info, position, self.market_status.data
             )
 
+    def __get_row_id(self, timestamp) -> int | None:
+        if self._cursor is not None:
+            return self._cursor.position(timestamp)
+        if self._row_ids_index is not self._data.index:
+            self._row_ids = {t: i for i, t in enumerate(self._data.index)}
+            self._row_ids_index = self._data.index
+        return self._row_ids.get(timestamp)
+
+    def __new_fee_batch(self, row: int, key: Tuple) -> FeeBatch:
+        end = min(row + self.batch_fee_window, len(self._data.index))
+        span = self._data.iloc[row:end]
+        close_ticks = span["closeTick"].to_numpy(dtype=float)
+        last_ticks = self._data["closeTick"].iloc[max(row - 1, 0) : end - 1].to_numpy(dtype=float)
+        if row == 0:
+            last_ticks = np.concatenate([[np.nan], last_ticks])
+        # keep the same with update_fee, tick 0 is regarded as no last tick
+        last_ticks = np.where(last_ticks == 0, np.nan, last_ticks)
+        total_virtual_liq = sum([p.liquidity for p in self._positions.values()])
+        current_liquidity = span["currentLiquidity"].to_numpy(dtype=float) + float(total_virtual_liq)
+        in_amount0 = span["inAmount0"].to_numpy(dtype=float)
+        in_amount1 = span["inAmount1"].to_numpy(dtype=float)
+
+        batch = FeeBatch(key, row, end, last_ticks)
+        for position_info, position in self._positions.items():
+            batch.fees[position_info] = V3CoreLib.update_fee_batch(
+                self.pool_info,
+                position_info,
+                position.liquidity,
+                last_ticks,
+                close_ticks,
+                in_amount0,
+                in_amount1,
+                current_liquidity,
+            )
+        return batch
+
+    def __verify_batch_fee(self, position_info: PositionInfo, position: Position, fee0: float, fee1: float):
+        """
+        Calculate fee of this bar in decimal, and compare with batch fee. Position is not changed.
+        """
+        pending0, pending1 = position.pending_amount0, position.pending_amount1
+        V3CoreLib.update_fee(self.last_tick, self.pool_info, position_info, position, self.market_status.data)
+        expected0, expected1 = position.pending_amount0 - pending0, position.pending_amount1 - pending1
+        position.pending_amount0, position.pending_amount1 = pending0, pending1
+        for expected, actual in ((expected0, fee0), (expected1, fee1)):
+            if abs(float(expected) - actual) > self.batch_fee_tolerance * abs(float(expected)):
+                raise DemeterError(
+                    f"batch fee of {position_info} at {self._market_status.timestamp} is {actual}, "
+                    f"decimal fee is {expected}, error is larger than {self.batch_fee_tolerance}"
+                )
+
+    def __update_fee_by_batch(self) -> bool:
+        """
+        Add fee of this bar from fee batch. If positions has changed, a new batch will be calculated.
+
+        :return: False if this bar can not be calculated by batch, e.g. positions are changed in this bar.
+        :rtype: bool
+        """
+        row = self.__get_row_id(self._market_status.timestamp)
+        if row is None:
+            return False
+        key = (id(self._data),) + tuple((k, p.liquidity) for k, p in self._positions.items())
+        batch = self._fee_batch
+        if batch is None or batch.key != key or not batch.start <= row < batch.end:
+            batch = self._fee_batch = self.__new_fee_batch(row, key)
+        # if positions changed in this bar, last tick will be the tick of this bar, use decimal calculation instead
+        last_tick = np.nan if not self.last_tick else self.last_tick
+        batch_last_tick = batch.last_ticks[row - batch.start]
+        if not (last_tick == batch_last_tick or (np.isnan(last_tick) and np.isnan(batch_last_tick))):
+            return False
+        i = row - batch.start
+        for position_info, position in self._positions.items():
+            fee0, fee1 = batch.fees[position_info]
+            if self.batch_fee_tolerance is not None:
+                self.__verify_batch_fee(position_info, position, fee0[i], fee1[i])
+            if fee0[i] != 0:
+                position.pending_amount0 += Decimal(fee0[i])
+            if fee1[i] != 0:
+                position.pending_amount1 += Decimal(fee1[i])
+        return True
+
+    def _is_status_changed(self, data: UniswapMarketStatus, price: pd.Series) -> bool:
+        # balance only depends on pool price and fee, which are changed by swaps and ticks
+        return self._is_row_changed(data.timestamp)
+
+    def get_eventful_rows(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        In uniswap market, fee only changes when there are swaps, and position value only changes when tick changes.
+
+        :param index: timestamps of backtest
+        :type index: DatetimeIndex
+        :return: a bool array with the same length of index, true means there are swaps or tick has changed
+        :rtype: ndarray
+        """
+        close_tick = self._data["closeTick"]
+        changed = (self._data["inAmount0"] != 0) | (self._data["inAmount1"] != 0) | (close_tick != close_tick.shift())
+        return changed.reindex(index, fill_value=True).to_numpy(dtype=bool)
+
     def get_position_amount(self, position_info: PositionInfo) -> Tuple[Decimal, Decimal]:
         if position_info not in self.positions:
             return DECIMAL_0, DECIMAL_0
@@ -341,6 +455,42 @@ class UniLpMarket(Market):
         )
         return val
 
+    def get_delta_gamma(
+        self, prices: float | Decimal | np.ndarray | pd.Series | None = None
+    ) -> Tuple[float, float] | Tuple[np.ndarray, np.ndarray]:
+        """
+        | Get delta and gamma of all positions, positions transferred out are excluded.
+        | If prices is an array, such as a price path or a price grid, delta and gamma on each price are returned.
+
+        :param prices: price or price array, if None, current price will be used
+        :type prices: float | Decimal | np.ndarray | pd.Series
+        :return: delta and gamma, they are float if prices is a number, or they are arrays
+        :rtype: Tuple[float, float] | Tuple[np.ndarray, np.ndarray]
+        """
+        prices = self._market_status.data.price if prices is None else prices
+        is_scalar = np.ndim(prices) == 0
+        price_array = np.atleast_1d(np.asarray(prices, dtype=np.float64))
+        delta = np.zeros(len(price_array))
+        gamma = np.zeros(len(price_array))
+        for position_info, position in self._positions.items():
+            if position.transferred:
+                continue
+            lower_price, upper_price = sorted(
+                [self.tick_to_price(position_info.lower_tick), self.tick_to_price(position_info.upper_tick)]
+            )
+            position_delta, position_gamma = get_delta_gamma_array(
+                float(lower_price),
+                float(upper_price),
+                price_array,
+                position.liquidity,
+                self._pool.token0.decimal,
+                self._pool.token1.decimal,
+                self._is_token0_quote,
+            )
+            delta += position_delta
+            gamma += position_gamma
+        return (float(delta[0]), float(gamma[0])) if is_scalar else (delta, gamma)
+
     def transfer_position_out(self, position_info: PositionInfo):
         if position_info in self.positions and not self.positions[position_info].transferred:
             self.positions[position_info].transferred = True
@@ -1132,7 +1282,7 @@ class UniLpMarket(Market):
         for position_key in keys:
             self.remove_liquidity(position_key)
 
-    def add_statistic_column(self, df: pd.DataFrame):
+    def add_statistic_column(self, df: pd.DataFrame, high_precision: bool = True):
         """
         add statistic column to data, new columns including:
 
@@ -1145,26 +1295,50 @@ class UniLpMarket(Market):
 
         :param df: original data
         :type df: pd.DataFrame
+        :param high_precision: if true, new columns are Decimal, which is required by market operations. or they will be float, it's much faster and good for analysis.
+        :type high_precision: bool
 
         """
+
+        def ticks_to_price(ticks: pd.Series):
+            return ticks_to_base_unit_price(
+                ticks.to_numpy(),
+                self._pool.token0.decimal,
+                self._pool.token1.decimal,
+                self._is_token0_quote,
+                high_precision,
+            )
+
+        def to_volume(amounts: pd.Series, decimal: int):
+            if not high_precision:
+                return amounts.to_numpy(dtype=float) / 10**decimal
+            if amounts.dtype == object:
+                return amounts / Decimal(10**decimal)
+            return amounts.map(lambda x: Decimal(x) / 10**decimal)
+
         # add statistic column
-        df["open"] = df["openTick"].map(lambda x: self.tick_to_price(x))
-        df["price"] = df["closeTick"].map(lambda x: self.tick_to_price(x))
+        df["open"] = ticks_to_price(df["openTick"])
+        df["price"] = ticks_to_price(df["closeTick"])
         high_name, low_name = (
             ("lowestTick", "highestTick")
             if self.pool_info.is_token0_quote
             else ("highestTick", "lowestTick")
         )
-        df["low"] = df[high_name].map(lambda x: self.tick_to_price(x))
-        df["high"] = df[low_name].map(lambda x: self.tick_to_price(x))
-        df["volume0"] = df["inAmount0"].map(
-            lambda x: Decimal(x) / 10**self.pool_info.token0.decimal
-        )
-        df["volume1"] = df["inAmount1"].map(
-            lambda x: Decimal(x) / 10**self.pool_info.token1.decimal
-        )
+        df["low"] = ticks_to_price(df[high_name])
+        df["high"] = ticks_to_price(df[low_name])
+        df["volume0"] = to_volume(df["inAmount0"], self.pool_info.token0.decimal)
+        df["volume1"] = to_volume(df["inAmount1"], self.pool_info.token1.decimal)
 
-    def load_data(self, chain: str, contract_addr: str, start_date: date, end_date: date):
+    def load_data(
+        self,
+        chain: str,
+        contract_addr: str,
+        start_date: date,
+        end_date: date,
+        processes: int = 1,
+        cache_path: str | None = None,
+        high_precision: bool = True,
+    ):
         """
 
         load data, and preprocess. preprocess actions including:
@@ -1181,9 +1355,15 @@ class UniLpMarket(Market):
         :type start_date: date
         :param end_date: end test date
         :type end_date: date
+        :param processes: how many processes are used to parse csv files, default is 1
+        :type processes: int
+        :param cache_path: folder to keep parsed files, csv parsing will be skipped if cache exists. default is None(no cache)
+        :type cache_path: str
+        :param high_precision: if true, statistic columns such as price and volume are Decimal, which is required by backtest. or they will be float, it's much faster and good for analysis. default is True
+        :type high_precision: bool
         """
         self.logger.info(f"start load files from {start_date} to {end_date}...")
-        df = pd.DataFrame()
+        paths = []
         day = start_date
         if start_date > end_date:
             raise DemeterError(f"start date {start_date} should earlier than end date {end_date}")
@@ -1204,19 +1384,10 @@ class UniLpMarket(Market):
                 raise IOError(
                     f"resource file {new_type_path} not found, please download with demeter-fetch: https://github.com/zelos-alpha/demeter-fetch"
                 )
-            day_df = pd.read_csv(
-                path,
-                converters={
-                    "inAmount0": to_decimal,
-                    "inAmount1": to_decimal,
-                    "netAmount0": to_decimal,
-                    "netAmount1": to_decimal,
-                    "currentLiquidity": to_decimal,
-                },
-            )
-            if len(day_df.index) > 0:
-                df = pd.concat([df, day_df])
+            paths.append(path)
             day = day + timedelta(days=1)
+        day_dfs = [x for x in read_files(paths, _read_uni_csv, cache_path, processes) if len(x.index) > 0]
+        df = pd.concat(day_dfs) if len(day_dfs) > 0 else pd.DataFrame()
         self.logger.info("load file complete, preparing...")
 
         df["timestamp"] = pd.to_datetime(df["timestamp"])
@@ -1237,7 +1408,7 @@ class UniLpMarket(Market):
         if pd.isna(df.iloc[0]["closeTick"]):
             df = df.bfill()
 
-        self.add_statistic_column(df)
+        self.add_statistic_column(df, high_precision)
         self.data = df
         self.logger.info("data has been prepared")
 
@@ -1272,3 +1443,29 @@ class UniLpMarket(Market):
 
     def _resample(self, freq: str):
         self._data = resample(self.data, freq)
+
+    def _get_columnar_metadata(self) -> Dict:
+        # statistic columns such as price depend on token decimals and quote token
+        return {
+            **super()._get_columnar_metadata(),
+            "token0": [self.pool_info.token0.name, self.pool_info.token0.decimal],
+            "token1": [self.pool_info.token1.name, self.pool_info.token1.decimal],
+            "fee": str(self.pool_info.fee),
+            "quote_token": self.pool_info.quote_token.name,
+        }
+
+
+def _read_uni_csv(path: str) -> pd.DataFrame:
+    """
+    Read a daily csv file of uniswap pool. Keep it in module level, so it can be used in other processes.
+    """
+    return pd.read_csv(
+        path,
+        converters={
+            "inAmount0": to_decimal,
+            "inAmount1": to_decimal,
+            "netAmount0": to_decimal,
+            "netAmount1": to_decimal,
+            "currentLiquidity": to_decimal,
+        },
+    )
@@ -19,3 +19,4 @@ from .console_text import (
     get_formatted_predefined,
     get_formatted_from_dict,
 )
+from .columnar import ColumnEncoding, ColumnarFile, save_columnar
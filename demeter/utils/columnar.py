@@ -0,0 +1,286 @@
+import json
+import os
+import shutil
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .._typing import DemeterError
+
+COLUMNAR_VERSION = 1
+META_FILE = "meta.json"
+
+_INT64_LIMIT = 2**63
+_INT128_LIMIT = 2**127
+_LOW_MASK = 2**64 - 1
+
+
+class ColumnEncoding(Enum):
+    """
+    How a column is kept in file
+
+    * native: numeric, bool or datetime numpy array, it's mapped to memory directly
+    * decimal64: Decimal or int values, kept in int64 mantissa and int8 exponent
+    * decimal128: Decimal or int values which don't fit int64, mantissa is kept in two int64(high and low)
+    * decimal_text: Decimal values which can not be kept in numbers, such as NaN, kept in fixed width ascii.
+      Missing values(None or float nan) are kept as empty text, and they are loaded as None.
+    * text: string values, kept in fixed width unicode
+    """
+
+    native = "native"
+    decimal64 = "decimal64"
+    decimal128 = "decimal128"
+    decimal_text = "decimal_text"
+    text = "text"
+
+
+def split_decimal(value) -> Tuple[int, int] | None:
+    """
+    Split a Decimal or int into mantissa and exponent, return None if it's not a finite number
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value), 0
+    if not isinstance(value, Decimal) or not value.is_finite():
+        return None
+    sign, digits, exponent = value.as_tuple()
+    mantissa = int("".join(map(str, digits))) if len(digits) > 0 else 0
+    return -mantissa if sign else mantissa, exponent
+
+
+def join_decimal(mantissa: int, exponent: int) -> Decimal:
+    """
+    Build a Decimal from mantissa and exponent, it's the reverse of split_decimal
+    """
+    return Decimal(f"{mantissa}E{exponent}")
+
+
+def _encode_column(values: np.ndarray) -> Tuple[ColumnEncoding, Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Choose encoding of a column, and convert it to fixed width arrays.
+
+    :return: encoding, arrays to save(keyed by file suffix), extra info to keep in meta
+    """
+    if values.dtype != object:
+        return ColumnEncoding.native, {"": values}, {}
+    if len(values) > 0 and all(isinstance(v, str) for v in values):
+        return ColumnEncoding.text, {"": values.astype(str)}, {}
+    if len(values) > 0 and all(isinstance(v, (float, np.floating)) for v in values):
+        return ColumnEncoding.native, {"": values.astype(np.float64)}, {"object": True}
+
+    split = [split_decimal(v) for v in values]
+    is_int = all(isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_)) for v in values)
+    if all(s is not None for s in split):
+        exponents = np.array([s[1] for s in split], dtype=np.int64)
+        if len(split) == 0 or (exponents.min() >= -128 and exponents.max() <= 127):
+            max_mantissa = max([abs(s[0]) for s in split], default=0)
+            extra = {"int": is_int}
+            if max_mantissa < _INT64_LIMIT:
+                mantissa = np.array([s[0] for s in split], dtype=np.int64)
+                return ColumnEncoding.decimal64, {"": mantissa, ".exp": exponents.astype(np.int8)}, extra
+            if max_mantissa < _INT128_LIMIT:
+                mantissa = np.empty((len(split), 2), dtype=np.int64)
+                mantissa[:, 0] = [s[0] >> 64 for s in split]
+                mantissa[:, 1] = np.array([s[0] & _LOW_MASK for s in split], dtype=np.uint64).view(np.int64)
+                return ColumnEncoding.decimal128, {"": mantissa, ".exp": exponents.astype(np.int8)}, extra
+
+    if all(v is None or isinstance(v, Decimal) or (isinstance(v, float) and np.isnan(v)) for v in values):
+        text = ["" if v is None or isinstance(v, float) else str(v) for v in values]
+        return ColumnEncoding.decimal_text, {"": np.array(text, dtype=bytes)}, {}
+    raise DemeterError(f"type {type(values[0]).__name__} is not supported by columnar file")
+
+
+def save_columnar(df: pd.DataFrame, path: str, metadata: Dict[str, Any] | None = None):
+    """
+    | Save a dataframe to a folder in columnar format. Every column and index level is kept in a npy file,
+    | so they can be mapped to memory when loading. Decimal columns are converted to fixed width numbers without precision loss.
+    | Metadata such as token decimals can be saved together.
+
+    :param df: dataframe to save
+    :type df: DataFrame
+    :param path: folder to save
+    :type path: str
+    :param metadata: json serializable information of this data
+    :type metadata: Dict[str, Any]
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(tmp_path, exist_ok=True)
+    meta = {
+        "version": COLUMNAR_VERSION,
+        "rows": len(df.index),
+        "column_names": list(df.columns.names),
+        "columns": [],
+        "index": [],
+        "metadata": {} if metadata is None else metadata,
+    }
+    index_levels = (
+        [df.index.get_level_values(i) for i in range(df.index.nlevels)]
+        if isinstance(df.index, pd.MultiIndex)
+        else [df.index]
+    )
+    items = [("index", i, level.name, level.to_numpy()) for i, level in enumerate(index_levels)]
+    items += [("column", i, df.columns[i], df.iloc[:, i].to_numpy()) for i in range(len(df.columns))]
+    for kind, i, name, values in items:
+        encoding, arrays, extra = _encode_column(values)
+        file_name = f"{kind}_{i}"
+        for suffix, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{file_name}{suffix}.npy"), array)
+        meta[kind if kind == "index" else "columns"].append(
+            {
+                "name": list(name) if isinstance(name, tuple) else name,
+                "file": file_name,
+                "encoding": encoding.value,
+                **extra,
+            }
+        )
+    with open(os.path.join(tmp_path, META_FILE), "w") as f:
+        json.dump(meta, f)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+
+
+class ColumnarFile(object):
+    """
+    | Market data saved by save_columnar. Arrays are mapped to memory instead of being read,
+    | so processes which open the same file share page cache, and only the pages used are loaded.
+    | Note: values of Decimal and text columns are decoded to python objects when rows are read,
+    | decoded rows are private memory of the process, so read rows by range if memory matters.
+    | Arrays are mapped in copy-on-write mode, change in a process will not be written back or seen by other process.
+
+    :param path: folder of columnar file
+    :type path: str
+    """
+
+    def __init__(self, path: str):
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            raise DemeterError(f"{path} is not a columnar file")
+        with open(meta_path) as f:
+            self._meta = json.load(f)
+        if self._meta["version"] != COLUMNAR_VERSION:
+            raise DemeterError(f"version of columnar file {path} is not supported")
+        self._path = path
+        self._columns: List[Dict[str, Any]] = self._meta["columns"]
+        self._arrays: List[Dict[str, np.ndarray]] = [self.__map(c) for c in self._columns]
+        self._index_arrays: List[Dict[str, np.ndarray]] = [self.__map(c) for c in self._meta["index"]]
+        self._index: pd.Index | None = None
+
+    def __len__(self):
+        return self._meta["rows"]
+
+    def __map(self, column: Dict[str, Any]) -> Dict[str, np.ndarray]:
+        arrays = {"": np.load(os.path.join(self._path, f"{column['file']}.npy"), mmap_mode="c")}
+        if column["encoding"] in (ColumnEncoding.decimal64.value, ColumnEncoding.decimal128.value):
+            arrays[".exp"] = np.load(os.path.join(self._path, f"{column['file']}.exp.npy"), mmap_mode="c")
+        return arrays
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """
+        Metadata saved with data, such as token decimals
+        """
+        return self._meta["metadata"]
+
+    @property
+    def columns(self) -> pd.Index:
+        """
+        Column names
+        """
+        names = [tuple(c["name"]) if isinstance(c["name"], list) else c["name"] for c in self._columns]
+        if len(self._meta["column_names"]) > 1:
+            return pd.MultiIndex.from_tuples(names, names=self._meta["column_names"])
+        return pd.Index(names, name=self._meta["column_names"][0])
+
+    @property
+    def index(self) -> pd.Index:
+        """
+        Index of data, it's loaded when first used
+        """
+        if self._index is None:
+            self._index = self.__build_index(0, len(self))
+        return self._index
+
+    def __build_index(self, start: int, end: int) -> pd.Index:
+        levels = [self.index_level(i, start, end) for i in range(len(self._index_arrays))]
+        names = [c["name"] for c in self._meta["index"]]
+        if len(levels) > 1:
+            return pd.MultiIndex.from_arrays(levels, names=names)
+        return pd.Index(levels[0], name=names[0])
+
+    def index_level(self, level: int, start: int = 0, end: int | None = None) -> np.ndarray:
+        """
+        Get values of an index level without building the whole index, e.g. timestamps of a multi index.
+
+        :param level: index level
+        :type level: int
+        :param start: first row
+        :type start: int
+        :param end: end row(exclusive), if None, read to the end
+        :type end: int
+        :return: values of index level
+        :rtype: ndarray
+        """
+        column = self._meta["index"][level]
+        return ColumnarFile.__decode(self._index_arrays[level], column, start, len(self) if end is None else end)
+
+    @staticmethod
+    def __decode(arrays: Dict[str, np.ndarray], column: Dict[str, Any], start: int, end: int) -> np.ndarray:
+        encoding = ColumnEncoding(column["encoding"])
+        values = arrays[""][start:end]
+        if encoding == ColumnEncoding.native:
+            return values.astype(object) if column.get("object", False) else values
+        elif encoding == ColumnEncoding.text:
+            return values.astype(object)
+        elif encoding == ColumnEncoding.decimal_text:
+            return np.array([Decimal(v.decode()) if v != b"" else None for v in values], dtype=object)
+        elif encoding == ColumnEncoding.decimal64:
+            mantissas = values.tolist()
+        else:
+            lows = np.ascontiguousarray(values[:, 1]).view(np.uint64).tolist()
+            mantissas = [(h << 64) | low for h, low in zip(values[:, 0].tolist(), lows)]
+        result = np.empty(len(mantissas), dtype=object)
+        if column.get("int", False):
+            result[:] = mantissas
+        else:
+            exponents = arrays[".exp"][start:end].tolist()
+            result[:] = [join_decimal(m, e) for m, e in zip(mantissas, exponents)]
+        return result
+
+    def column(self, i: int, start: int = 0, end: int | None = None) -> np.ndarray:
+        """
+        Get values of a column, native columns are views of mapped memory, others are decoded.
+
+        :param i: column position
+        :type i: int
+        :param start: first row
+        :type start: int
+        :param end: end row(exclusive), if None, read to the end
+        :type end: int
+        :return: column values
+        :rtype: ndarray
+        """
+        return ColumnarFile.__decode(self._arrays[i], self._columns[i], start, len(self) if end is None else end)
+
+    def to_dataframe(self, start: int = 0, end: int | None = None) -> pd.DataFrame:
+        """
+        Get rows in [start, end) as a dataframe, native columns are not copied.
+
+        :param start: first row
+        :type start: int
+        :param end: end row(exclusive), if None, read to the end
+        :type end: int
+        :return: market data
+        :rtype: DataFrame
+        """
+        end = len(self) if end is None else end
+        data = {i: self.column(i, start, end) for i in range(len(self._columns))}
+        # only decode index of these rows if whole index is not loaded
+        index = self.__build_index(start, end) if self._index is None else self._index[start:end]
+        df = pd.DataFrame(data, index=index, copy=False)
+        df.columns = self.columns
+        return df
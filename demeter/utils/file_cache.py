@@ -0,0 +1,146 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List
+
+import pandas as pd
+
+CACHE_SUFFIX = ".pkl"
+
+
+def _get_file_key(path: str) -> str:
+    """
+    Key of a data file, it's made of absolute path, modify time and size
+    """
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}.{stat.st_mtime_ns}.{stat.st_size}"
+
+
+def get_cache_file(path: str, cache_path: str) -> str:
+    """
+    Get cache file of a data file. Cache file is keyed by absolute path, modify time and size,
+    so if data file has changed, the old cache will not be used,
+    and files with the same name in different folders will not share a cache file.
+
+    :param path: path of data file
+    :type path: str
+    :param cache_path: folder to keep cache files
+    :type cache_path: str
+    :return: path of cache file
+    :rtype: str
+    """
+    digest = hashlib.sha1(_get_file_key(path).encode()).hexdigest()[:16]
+    return os.path.join(cache_path, f"{os.path.basename(path)}.{digest}{CACHE_SUFFIX}")
+
+
+def read_with_cache(path: str, reader: Callable[[str], pd.DataFrame], cache_path: str | None = None) -> pd.DataFrame:
+    """
+    Read a data file, if cache_path is set, a binary cache will be saved after parsing,
+    and will be used in the next time.
+
+    :param path: path of data file
+    :type path: str
+    :param reader: function to parse data file
+    :type reader: Callable[[str], pd.DataFrame]
+    :param cache_path: folder to keep cache files, if None, cache is disabled
+    :type cache_path: str
+    :return: parsed dataframe
+    :rtype: DataFrame
+    """
+    if cache_path is None:
+        return reader(path)
+    cache_file = get_cache_file(path, cache_path)
+    if os.path.exists(cache_file):
+        return pd.read_pickle(cache_file)
+    df = reader(path)
+    os.makedirs(cache_path, exist_ok=True)
+    # write to a temp file first, so other process will not read a half written file
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_file)
+    os.replace(tmp_file, cache_file)
+    return df
+
+
+def _read_with_cache_args(args) -> pd.DataFrame:
+    return read_with_cache(*args)
+
+
+def read_files(
+    paths: List[str],
+    reader: Callable[[str], pd.DataFrame],
+    cache_path: str | None = None,
+    processes: int = 1,
+) -> List[pd.DataFrame]:
+    """
+    Read data files, files can be parsed in a process pool.
+
+    :param paths: path of data files
+    :type paths: List[str]
+    :param reader: function to parse data file, it should be a module level function, so it can be sent to other process
+    :type reader: Callable[[str], pd.DataFrame]
+    :param cache_path: folder to keep cache files, if None, cache is disabled
+    :type cache_path: str
+    :param processes: process count, if it's 1, files will be read in current process
+    :type processes: int
+    :return: dataframes in the same order with paths
+    :rtype: List[DataFrame]
+    """
+    if processes <= 1 or len(paths) <= 1:
+        return [read_with_cache(p, reader, cache_path) for p in paths]
+    with ProcessPoolExecutor(max_workers=min(processes, len(paths))) as executor:
+        return list(executor.map(_read_with_cache_args, [(p, reader, cache_path) for p in paths]))
+
+
+def get_combined_cache_file(paths: List[str], cache_path: str, key: str) -> str:
+    """
+    Get cache file of data combined from many data files. Cache file is keyed by key, e.g. chain, tokens and date range,
+    and absolute path, modify time and size of every data file, so if any data file has changed,
+    the old cache will not be used.
+
+    :param paths: path of data files
+    :type paths: List[str]
+    :param cache_path: folder to keep cache files
+    :type cache_path: str
+    :param key: readable key of combined data
+    :type key: str
+    :return: path of cache file
+    :rtype: str
+    """
+    digest = hashlib.sha1(key.encode())
+    for path in paths:
+        digest.update(_get_file_key(path).encode())
+    return os.path.join(cache_path, f"{key}.{digest.hexdigest()[:16]}{CACHE_SUFFIX}")
+
+
+def read_combined_with_cache(
+    paths: List[str],
+    builder: Callable[[], pd.DataFrame],
+    key: str,
+    cache_path: str | None = None,
+) -> pd.DataFrame:
+    """
+    Build a dataframe from many data files, if cache_path is set, the result will be saved as one binary cache,
+    and will be used in the next time, so neither files are read nor dataframes are joined.
+
+    :param paths: path of data files used by builder
+    :type paths: List[str]
+    :param builder: function to read files and build dataframe
+    :type builder: Callable[[], DataFrame]
+    :param key: readable key of combined data, e.g. chain, tokens and date range
+    :type key: str
+    :param cache_path: folder to keep cache files, if None, cache is disabled
+    :type cache_path: str
+    :return: built dataframe
+    :rtype: DataFrame
+    """
+    if cache_path is None:
+        return builder()
+    cache_file = get_combined_cache_file(paths, cache_path, key)
+    if os.path.exists(cache_file):
+        return pd.read_pickle(cache_file)
+    df = builder()
+    os.makedirs(cache_path, exist_ok=True)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_file)
+    os.replace(tmp_file, cache_file)
+    return df
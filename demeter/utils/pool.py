@@ -0,0 +1,52 @@
+import multiprocessing
+from typing import Any, Callable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# context of a pool, only set in worker processes by initializer
+_worker_context: Any = None
+
+
+def _init_worker(func: Callable[[Any, Any], Any], context: Any):
+    global _worker_context
+    _worker_context = (func, context)
+
+
+def _run_in_worker(item: Any) -> Any:
+    func, context = _worker_context
+    return func(context, item)
+
+
+def map_with_context(
+    func: Callable[[Any, T], R],
+    context: Any,
+    items: List[T],
+    processes: int = 1,
+    start_method: str | None = None,
+) -> List[R]:
+    """
+    | Call func(context, item) for every item, and return results in the order of items.
+    | If processes is larger than 1, items are processed in a process pool, and context is sent to each worker once
+    | by pool initializer. With fork start method, workers share context with parent process by copy on write,
+    | with spawn or forkserver, context is pickled, and func should be a module level function.
+    | If processes is 1, func is called in current process with context, no global state is kept.
+
+    :param func: function to call, context and an item will be passed to it
+    :type func: Callable[[Any, T], R]
+    :param context: data used by all items, such as market data
+    :type context: Any
+    :param items: items to process
+    :type items: List[T]
+    :param processes: count of processes, if it's 1, items will be processed in current process
+    :type processes: int
+    :param start_method: start method of process, fork, spawn or forkserver, if None, platform default will be used
+    :type start_method: str
+    :return: results of items
+    :rtype: List[R]
+    """
+    if processes <= 1 or len(items) <= 1:
+        return [func(context, item) for item in items]
+    mp_context = multiprocessing.get_context(start_method)
+    with mp_context.Pool(min(processes, len(items)), initializer=_init_worker, initargs=(func, context)) as pool:
+        return pool.map(_run_in_worker, items)
@@ -1,3 +1,5 @@
+import os
+import shutil
 import unittest
 from _decimal import Decimal
 from datetime import datetime, timedelta, date, timezone
@@ -15,6 +17,11 @@ from demeter.aave import (
     BorrowKey,
     AaveV3CoreLib,
     AaveV3Market,
+    get_health_factor_series,
+    get_first_liquidation_time,
+    shock_price,
+    stress_test,
+    stress_result_to_dataframe,
 )
 from tests.common import assert_equal_with_error
 
@@ -184,6 +191,67 @@ class UniLpDataTest(unittest.TestCase):
 
         # net_apy=Decimal('0.01683792283834931728886791969'))
 
+    def test_valuation_after_status_change(self):
+        market = AaveV3Market(MarketInfo("aave_test", MarketTypeEnum.aave_v3), "./aave_risk_parameters/polygon.csv", tokens=[usdt, weth])
+        index = pd.MultiIndex.from_product(
+            [
+                [usdt.name, weth.name],
+                ["liquidity_rate", "stable_borrow_rate", "variable_borrow_rate", "liquidity_index", "variable_borrow_index"],
+            ]
+        )
+
+        def set_status(hour: int, weth_price: str, weth_index: str):
+            status = MarketStatus(datetime(2023, 9, 12, hour))
+            status.data = pd.Series(
+                index=index,
+                data=[Decimal("0.1"), Decimal("0.1"), Decimal("0.1"), Decimal("1"), Decimal("1")]
+                + [Decimal("0.2"), Decimal("0.2"), Decimal("0.2"), Decimal(weth_index), Decimal(weth_index)],
+            )
+            market.set_market_status(data=status, price=pd.Series({"USDT": Decimal(1), "WETH": Decimal(weth_price)}))
+
+        def assert_same_as_core():
+            rp = market.risk_parameters
+            self.assertEqual(market.health_factor, AaveV3CoreLib.health_factor(market.collateral_value, market.borrows_value, rp))
+            self.assertEqual(market.current_ltv, AaveV3CoreLib.current_ltv(market.collateral_value, rp))
+            self.assertEqual(market.liquidation_threshold, AaveV3CoreLib.total_liquidation_threshold(market.collateral_value, rp))
+            self.assertEqual(market.total_supply_value, Decimal(sum(market.supplies_value.values())))
+
+        s_weth = SupplyKey(weth)
+        s_usdt = SupplyKey(usdt)
+        b_usdt = BorrowKey(usdt, InterestRateMode.variable)
+        set_status(15, "1000", "1.1")
+        market._supplies[s_weth] = SupplyInfo(Decimal(1), True)
+        market._supplies[s_usdt] = SupplyInfo(Decimal(100), False)
+        market._borrows[b_usdt] = BorrowInfo(Decimal(600))
+        self.assertEqual(market.health_factor, Decimal("1.5125"))
+        assert_same_as_core()
+
+        supplies = market.supplies
+        borrows = market.borrows
+
+        # only weth price changed, details of usdt positions are kept
+        set_status(16, "800", "1.1")
+        self.assertEqual(market.supplies_value[s_weth], Decimal("880"))
+        self.assertEqual(market.supplies_value[s_usdt], Decimal("100"))
+        self.assertEqual(market.health_factor, Decimal("1.21"))
+        assert_same_as_core()
+        self.assertIs(market.supplies[s_usdt], supplies[s_usdt])
+        self.assertIs(market.borrows[b_usdt], borrows[b_usdt])
+        self.assertEqual(market.supplies[s_weth].value, Decimal("880"))
+
+        # only weth index changed
+        set_status(17, "800", "1.2")
+        self.assertEqual(market.supplies_value[s_weth], Decimal("960"))
+        self.assertEqual(market.get_supply(s_weth).amount, Decimal("1.2"))
+        assert_same_as_core()
+
+        # collateral changed
+        market.change_collateral(True, supply_key=s_usdt)
+        self.assertEqual(market.total_collateral_value, Decimal("1060"))
+        self.assertTrue(market.supplies[s_usdt].collateral)
+        self.assertIs(market.borrows[b_usdt], borrows[b_usdt])
+        assert_same_as_core()
+
     def test_data(self):
         market = AaveV3Market(MarketInfo("aave_test", MarketTypeEnum.aave_v3), "./aave_risk_parameters/polygon.csv")
         start = datetime(2023, 10, 1, 0, 0)
@@ -207,6 +275,50 @@ class UniLpDataTest(unittest.TestCase):
         self.assertEqual(market.data[usdt.name]["liquidity_rate"].iloc[0], 0)
         pass
 
+    def test_health_factor_series(self):
+        market = AaveV3Market(MarketInfo("aave_test", MarketTypeEnum.aave_v3), "./aave_risk_parameters/polygon.csv", tokens=[usdt, weth])
+        start = datetime(2023, 10, 1, 0, 0)
+        data_size = 10
+        df_index = pd.date_range(start, start + timedelta(minutes=data_size - 1), freq="1min")
+        token_df = pd.DataFrame(
+            index=df_index,
+            data={
+                "liquidity_rate": np.zeros(shape=data_size),
+                "stable_borrow_rate": np.zeros(shape=data_size),
+                "variable_borrow_rate": np.zeros(shape=data_size),
+                "liquidity_index": np.ones(shape=data_size),
+                "variable_borrow_index": np.ones(shape=data_size),
+            },
+        )
+        market.set_token_data(usdt, token_df)
+        market.set_token_data(weth, token_df)
+        price = pd.DataFrame(
+            index=df_index,
+            data={"USDT": [Decimal(1)] * data_size, "WETH": [Decimal(1000 - 100 * i) for i in range(data_size)]},
+        )
+        market._supplies[SupplyKey(weth)] = SupplyInfo(Decimal(1), True)
+        market._borrows[BorrowKey(usdt, InterestRateMode.variable)] = BorrowInfo(Decimal(600))
+
+        hf = market.get_health_factor_series(price)
+        self.assertEqual(len(hf.index), data_size)
+        for i in [0, 3]:
+            market.set_market_status(MarketStatus(df_index[i]), price.iloc[i])
+            assert_equal_with_error(Decimal(hf.iloc[i]), market.health_factor, 0.000001)
+        self.assertEqual(get_first_liquidation_time(hf), df_index[3])
+
+        # screen configurations, the second one will never be liquidated
+        hfs = get_health_factor_series(
+            market.data,
+            price,
+            market.risk_parameters,
+            {SupplyKey(weth): SupplyInfo(np.array([1, 10]), True)},
+            {BorrowKey(usdt, InterestRateMode.variable): BorrowInfo(np.array([600, 600]))},
+        )
+        self.assertEqual(hfs.shape, (data_size, 2))
+        first_time = get_first_liquidation_time(hfs)
+        self.assertEqual(first_time[0], df_index[3])
+        self.assertTrue(pd.isna(first_time[1]))
+
     def test_load_data(self):
         market_key = MarketInfo("aave_test", MarketTypeEnum.aave_v3)
         market = AaveV3Market(market_key, "./aave_risk_parameters/polygon.csv")
@@ -219,6 +331,26 @@ class UniLpDataTest(unittest.TestCase):
         self.assertTrue(1 < market.data.iloc[0][weth.name]["liquidity_index"] < 1.1)
         pass
 
+    def test_load_data_parallel_with_cache(self):
+        cache_path = "./result/aave_cache"
+        if os.path.exists(cache_path):
+            shutil.rmtree(cache_path)
+
+        def load(processes=1, cache_path=None) -> pd.DataFrame:
+            market = AaveV3Market(MarketInfo("aave_test", MarketTypeEnum.aave_v3), "./aave_risk_parameters/polygon.csv")
+            market.data_path = "data"
+            market.load_data(ChainType.polygon, [weth], date(2023, 8, 14), date(2023, 8, 15), processes, cache_path)
+            return market.data
+
+        expected = load()
+        parallel = load(processes=2, cache_path=cache_path)
+        self.assertTrue(expected.equals(parallel))
+        # two daily files and the joined dataframe
+        self.assertEqual(len(os.listdir(cache_path)), 3)
+        cached = load(cache_path=cache_path)
+        self.assertTrue(expected.equals(cached))
+        self.assertEqual(type(cached[weth.name]["liquidity_index"].iloc[0]), Decimal)
+
     def get_test_market(self):
         market_key = MarketInfo("aave_test", MarketTypeEnum.aave_v3)
         market = AaveV3Market(market_key, "./aave_risk_parameters/polygon.csv", tokens=[weth])
@@ -253,6 +385,16 @@ class UniLpDataTest(unittest.TestCase):
         market.broker = broker
         return market_key, market, broker, price_series
 
+    def test_token_status(self):
+        market_key, market, broker, price_series = self.get_test_market()
+        self.assertEqual(set(market.token_status.keys()), {weth.name, dai.name})
+        self.assertEqual(
+            market.token_status[dai.name],
+            AaveTokenStatus(Decimal("0.08"), Decimal("0.12"), Decimal("0.1"), Decimal("1.6"), Decimal("1.6")),
+        )
+        for field in AaveV3Market.REQUIRED_DATA_COLUMN:
+            self.assertEqual(getattr(market.token_status[weth.name], field), market.market_status.data[weth.name][field])
+
     def test_supply(self):
         market_key, market, broker, price_series = self.get_test_market()
         amount = broker.get_token_balance(weth)
@@ -520,6 +662,37 @@ class UniLpDataTest(unittest.TestCase):
 
         pass
 
+    def test_stress_test(self):
+        market_key, market, broker, price_series = self.get_test_market()
+        supply_key = market.supply(weth, Decimal("4.2"), True)
+        borrow_key = market.borrow(dai, 3300, InterestRateMode.variable)
+        scenarios = shock_price(price_series, weth.name, [0, -0.08, -0.1])
+        self.assertEqual(scenarios[-0.08][weth.name], Decimal(920))
+
+        results = stress_test(market, scenarios)
+        self.assertEqual(len(results[0].liquidations), 0)
+        self.assertEqual(results[0].health_factor_after, Decimal("1.05"))
+        # the same as test_liquidate_half
+        self.assertEqual(results[-0.08].health_factor_before, Decimal("0.966"))
+        self.assertEqual(results[-0.08].health_factor_after.quantize(Decimal("0.000000001")), Decimal("1.06575"))
+        self.assertEqual(results[-0.08].supplies[supply_key].value.quantize(Decimal("0.000000001")), Decimal("2131.5"))
+        self.assertEqual(results[-0.08].borrows[borrow_key].value, Decimal("1650"))
+        self.assertEqual(results[-0.08].liquidations[0].debt_token, dai.name)
+        # the same as test_liquidate_all
+        self.assertEqual(results[-0.1].health_factor_after, Decimal("inf"))
+        self.assertEqual(results[-0.1].supplies[supply_key].value, Decimal("315"))
+        self.assertEqual(len(results[-0.1].borrows), 0)
+        # market is not changed
+        self.assertEqual(market.health_factor, Decimal("1.05"))
+        self.assertEqual(market.borrows[borrow_key].value, Decimal("3300"))
+
+        df = stress_result_to_dataframe(results)
+        parallel_df = stress_result_to_dataframe(stress_test(market, scenarios, processes=2))
+        self.assertTrue(df.equals(parallel_df))
+        spawned_df = stress_result_to_dataframe(stress_test(market, scenarios, processes=2, start_method="spawn"))
+        self.assertTrue(df.equals(spawned_df))
+        self.assertEqual(list(df["liquidation_count"]), [0, 1, 1])
+
     def test_liquidate_all(self):
         market_key, market, broker, price_series = self.get_test_market()
         market: AaveV3Market = market
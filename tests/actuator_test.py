@@ -1,14 +1,32 @@
+import copy
 import os
 import pickle
 import json
 import unittest
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
 import pandas as pd
 
 import demeter.indicator
-from demeter import TokenInfo, Actuator, Strategy, MarketInfo, RowData, MarketDict, ChainType, BackTestDescription
+from demeter import (
+    TokenInfo,
+    Actuator,
+    Strategy,
+    MarketInfo,
+    RowData,
+    MarketDict,
+    ChainType,
+    BackTestDescription,
+    AccountStatus,
+    DemeterError,
+)
+from demeter.broker import AccountStatusRecorder, DataFrameDataSource
+from demeter.broker.recorder import DECIMAL_DTYPE
+from demeter.strategy import AtTimeTrigger, PeriodTrigger
 from demeter.uniswap import PositionInfo, UniV3Pool, UniLpMarket
+from tests.common import assert_equal_with_error
 
 pd.options.display.max_columns = None
 # pd.options.display.max_rows = None
@@ -39,6 +57,56 @@ class AddLiquidity(Strategy):
             pass
 
 
+class Rebalance(Strategy):
+    def on_bar(self, row_data: RowData):
+        if row_data.row_id in (2, 700):
+            market: UniLpMarket = self.broker.markets[test_market]
+            market.remove_all_liquidity()
+            price = row_data.market_status[test_market].price
+            market.add_liquidity(price * Decimal("0.99"), price * Decimal("1.01"))
+
+
+class RebalanceByTrigger(Strategy):
+    def __init__(self):
+        super().__init__()
+        self.sparse_compatible = True
+
+    def initialize(self):
+        self.triggers.append(AtTimeTrigger(datetime(2023, 8, 14, 0, 2), self.rebalance))
+        self.triggers.append(AtTimeTrigger(datetime(2023, 8, 14, 11, 40), self.rebalance))
+
+    def rebalance(self, row_data: RowData):
+        market: UniLpMarket = self.broker.markets[test_market]
+        market.remove_all_liquidity()
+        price = row_data.market_status[test_market].price
+        market.add_liquidity(price * Decimal("0.99"), price * Decimal("1.01"))
+
+
+class AddTriggerInCallback(RebalanceByTrigger):
+    def __init__(self, later: datetime):
+        super().__init__()
+        self.later = later
+
+    def initialize(self):
+        self.triggers.append(AtTimeTrigger(datetime(2023, 8, 14, 0, 2), self.add_trigger))
+
+    def add_trigger(self, row_data: RowData):
+        self.rebalance(row_data)
+        self.triggers.append(AtTimeTrigger(self.later, self.rebalance))
+
+
+class AddPeriodTriggerInCallback(RebalanceByTrigger):
+    def __init__(self):
+        super().__init__()
+        self.fired = []
+
+    def initialize(self):
+        self.triggers.append(AtTimeTrigger(datetime(2023, 8, 14, 0, 7), self.add_trigger))
+
+    def add_trigger(self, row_data: RowData):
+        self.triggers.append(PeriodTrigger(timedelta(minutes=37), lambda r: self.fired.append(r.timestamp)))
+
+
 class WithSMA(Strategy):
     def initialize(self):
         self.add_column(self.market1, "ma5", demeter.indicator.simple_moving_average(self.market1.data.closeTick))
@@ -47,6 +115,25 @@ class WithSMA(Strategy):
         pass
 
 
+class RebalanceWithWindowSMA(Strategy):
+    def initialize(self):
+        self.add_window_column(
+            test_market,
+            "ma5",
+            lambda df: demeter.indicator.simple_moving_average(df.closeTick, timedelta(minutes=5)),
+            lookback=5,
+        )
+        self.ma5 = []
+
+    def on_bar(self, row_data: RowData):
+        self.ma5.append(row_data.market_status[test_market].ma5)
+        if row_data.row_id in (2, 1500):
+            market: UniLpMarket = self.broker.markets[test_market]
+            market.remove_all_liquidity()
+            price = row_data.market_status[test_market].price
+            market.add_liquidity(price * Decimal("0.99"), price * Decimal("1.01"))
+
+
 class TestActuator(unittest.TestCase):
     def __init__(self, *args, **kwargs):
         super(TestActuator, self).__init__(*args, **kwargs)
@@ -116,6 +203,262 @@ class TestActuator(unittest.TestCase):
         actuator.run()
         self.assertTrue("ma5" in actuator.broker.markets.default.data.columns)
 
+    def test_run_with_fast_cursor(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = BuyOnSecond()
+        actuator.run(print_result=False)
+        expected = actuator.account_status_df
+
+        fast_actuator = TestActuator.get_actuator_with_uni_market()
+        fast_actuator.fast_cursor = True
+        fast_actuator.strategy = BuyOnSecond()
+        fast_actuator.run(print_result=False)
+        self.assertEqual(len(fast_actuator.actions), 1)
+        self.assertTrue(expected.equals(fast_actuator.account_status_df))
+        self.assertIsNone(fast_actuator.broker.markets.default.cursor)
+
+    def test_run_with_batch_fee(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = Rebalance()
+        actuator.run(print_result=False)
+        expected = actuator.account_status_df
+
+        batch_actuator = TestActuator.get_actuator_with_uni_market()
+        batch_actuator.broker.markets.default.batch_fee = True
+        batch_actuator.strategy = Rebalance()
+        batch_actuator.run(print_result=False)
+        actual = batch_actuator.account_status_df
+
+        self.assertEqual(len(batch_actuator.actions), len(actuator.actions))
+        for column in [("market1", "base_uncollected"), ("market1", "quote_uncollected"), ("net_value", "")]:
+            for a, b in zip(expected[column], actual[column]):
+                assert_equal_with_error(Decimal(a), Decimal(b), 1e-9)
+        self.assertGreater(expected[("market1", "quote_uncollected")].iloc[-1], 0)
+
+        # verify every bar with decimal fee, result is the same as without verification
+        verify_actuator = TestActuator.get_actuator_with_uni_market()
+        verify_actuator.broker.markets.default.batch_fee = True
+        verify_actuator.broker.markets.default.batch_fee_tolerance = 1e-9
+        verify_actuator.strategy = Rebalance()
+        verify_actuator.run(print_result=False)
+        self.assertTrue(actual.equals(verify_actuator.account_status_df))
+
+        strict_actuator = TestActuator.get_actuator_with_uni_market()
+        strict_actuator.broker.markets.default.batch_fee = True
+        strict_actuator.broker.markets.default.batch_fee_tolerance = 1e-30
+        strict_actuator.strategy = Rebalance()
+        with self.assertRaises(DemeterError):
+            strict_actuator.run(print_result=False)
+        # result is saved when backtest stops with error
+        for file_name in ("backtest-with-error.pkl", "backtest-with-error.account.csv"):
+            os.remove(file_name)
+
+    def test_run_with_status_recorder(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = Rebalance()
+        actuator.run(print_result=False)
+
+        recorder_actuator = TestActuator.get_actuator_with_uni_market()
+        recorder_actuator.status_recorder = True
+        recorder_actuator.strategy = Rebalance()
+        recorder_actuator.run(print_result=False)
+        self.assertTrue(isinstance(recorder_actuator.account_status, AccountStatusRecorder))
+        self.assertTrue(actuator.account_status_df.equals(recorder_actuator.account_status_df))
+        self.assertEqual(recorder_actuator.final_status.net_value, actuator.final_status.net_value)
+        self.assertTrue(Actuator(status_recorder=True, status_spill_path="result").status_recorder)
+
+        # spill every 100 rows
+        spill_recorder = AccountStatusRecorder(len(actuator.account_status), "result/status_spill", 100)
+        for status in actuator.account_status:
+            spill_recorder.append(status)
+        self.assertTrue(
+            AccountStatus.to_dataframe(actuator.account_status).equals(spill_recorder.to_dataframe())
+        )
+        for recorder in (recorder_actuator.account_status, spill_recorder):
+            self.assertEqual(len(recorder), len(actuator.account_status))
+            for i in (0, 701, -1):
+                self.assertEqual(recorder[i].timestamp, actuator.account_status[i].timestamp)
+                self.assertEqual(recorder[i].net_value, actuator.account_status[i].net_value)
+                self.assertEqual(
+                    recorder[i].market_status[test_market].base_in_position,
+                    actuator.account_status[i].market_status[test_market].base_in_position,
+                )
+        # spilled chunk is read once for rows in it
+        with patch.object(pd, "read_pickle", wraps=pd.read_pickle) as read_pickle:
+            for i in range(200, 300):
+                self.assertEqual(spill_recorder[i].net_value, actuator.account_status[i].net_value)
+            self.assertEqual(read_pickle.call_count, 1)
+        spill_recorder.merge_spilled()
+        self.assertEqual(os.listdir("result/status_spill"), [])
+        self.assertTrue(AccountStatus.to_dataframe(actuator.account_status).equals(spill_recorder.to_dataframe()))
+        self.assertEqual(spill_recorder[701].net_value, actuator.account_status[701].net_value)
+        self.assertIn(DECIMAL_DTYPE, [b.dtype for b in spill_recorder._buffers])
+
+    def test_status_recorder_decimal(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = Rebalance()
+        actuator.run(print_result=False)
+        statuses = actuator.account_status[:10]
+        recorder = AccountStatusRecorder(len(statuses))
+        for status in statuses[:5]:
+            recorder.append(status)
+        # net value is kept in typed buffer
+        self.assertEqual(recorder._buffers[0].dtype, DECIMAL_DTYPE)
+        self.assertEqual(recorder[3].net_value, statuses[3].net_value)
+
+        # NaN can not be kept in mantissa and exponent, column falls back to object
+        nan_status = copy.copy(statuses[5])
+        nan_status.net_value = Decimal("NaN")
+        recorder.append(nan_status)
+        for status in statuses[6:]:
+            recorder.append(status)
+        self.assertEqual(recorder._buffers[0].dtype, object)
+        self.assertTrue(recorder[5].net_value.is_nan())
+        expected = AccountStatus.to_dataframe(statuses[:5] + [nan_status] + statuses[6:])
+        df = recorder.to_dataframe()
+        self.assertEqual(list(df["net_value"])[:5], list(expected["net_value"])[:5])
+        self.assertTrue(df.iloc[:, 1:].equals(expected.iloc[:, 1:]))
+
+    def test_run_sparse(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = RebalanceByTrigger()
+        actuator.run(print_result=False)
+
+        sparse_actuator = TestActuator.get_actuator_with_uni_market()
+        sparse_actuator.sparse = True
+        sparse_actuator.strategy = RebalanceByTrigger()
+        sparse_actuator.run(print_result=False)
+        self.assertEqual(len(sparse_actuator.actions), len(actuator.actions))
+        self.assertEqual(len(sparse_actuator.account_status), len(actuator.account_status))
+        self.assertTrue(actuator.account_status_df.equals(sparse_actuator.account_status_df))
+
+        market: UniLpMarket = actuator.broker.markets[test_market]
+        eventful_rows = market.get_eventful_rows(market.data.index)
+        self.assertTrue(eventful_rows[0])
+        self.assertLess(eventful_rows.sum(), len(market.data.index))
+
+        # strategy should allow sparse mode
+        empty_actuator = TestActuator.get_actuator_with_uni_market()
+        empty_actuator.sparse = True
+        with self.assertRaises(DemeterError):
+            empty_actuator.run(print_result=False)
+
+        # trigger added during backtest, at a row which is not eventful when backtest starts
+        later = market.data.index[(~eventful_rows).nonzero()[0][10]].to_pydatetime()
+        results = []
+        for sparse in (False, True):
+            trigger_actuator = TestActuator.get_actuator_with_uni_market()
+            trigger_actuator.sparse = sparse
+            trigger_actuator.strategy = AddTriggerInCallback(later)
+            trigger_actuator.run(print_result=False)
+            results.append(trigger_actuator)
+        self.assertEqual(len(results[1].actions), len(results[0].actions))
+        self.assertEqual(results[1].actions[-1].timestamp, later)
+        self.assertTrue(results[0].account_status_df.equals(results[1].account_status_df))
+
+        # period of a trigger added during backtest starts when it's added
+        fired = []
+        for sparse in (False, True):
+            period_actuator = TestActuator.get_actuator_with_uni_market()
+            period_actuator.sparse = sparse
+            period_actuator.strategy = AddPeriodTriggerInCallback()
+            period_actuator.run(print_result=False)
+            fired.append(period_actuator.strategy.fired)
+        self.assertEqual(fired[0][0], datetime(2023, 8, 14, 0, 44))
+        self.assertEqual(len(fired[0]), 38)
+        self.assertEqual(fired[1], fired[0])
+
+    def test_run_streamed(self):
+        def get_actuator():
+            actuator = TestActuator.get_actuator_with_uni_market()
+            market: UniLpMarket = actuator.broker.markets[test_market]
+            market.load_data(
+                ChainType.polygon.name, "0x45dda9cb7c25131df268515131f647d726f50608", date(2023, 8, 13), date(2023, 8, 14)
+            )
+            actuator.strategy = RebalanceWithWindowSMA()
+            return actuator
+
+        actuator = get_actuator()
+        actuator.run(print_result=False)
+
+        streamed_actuator = get_actuator()
+        market: UniLpMarket = streamed_actuator.broker.markets[test_market]
+        streamed_actuator.set_price(market.get_price_from_data())
+        market.set_data_source(DataFrameDataSource(market.data), chunk_size="12h", lookback=5)
+        streamed_actuator.run(print_result=False)
+
+        self.assertEqual(len(streamed_actuator.actions), len(actuator.actions))
+        self.assertTrue(actuator.account_status_df.equals(streamed_actuator.account_status_df))
+        self.assertTrue(pd.Series(streamed_actuator.strategy.ma5).equals(pd.Series(actuator.strategy.ma5)))
+        # only the last chunk and its lookback are kept
+        self.assertEqual(len(market.data.index), 720 + 5)
+
+    def test_market_balance_reused(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.strategy = RebalanceByTrigger()
+        actuator.run(print_result=False)
+        balances = [s.market_status[test_market] for s in actuator.account_status]
+        # not reused by default
+        self.assertEqual(len(set(id(b) for b in balances)), len(balances))
+
+        expected = actuator.account_status_df
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.broker.reuse_market_balance = True
+        actuator.strategy = RebalanceByTrigger()
+        actuator.run(print_result=False)
+        balances = [s.market_status[test_market] for s in actuator.account_status]
+        # balance object is reused in bars without swap or tick change
+        self.assertLess(len(set(id(b) for b in balances)), len(balances))
+        self.assertTrue(expected.equals(actuator.account_status_df))
+
+        broker = actuator.broker
+        market: UniLpMarket = broker.markets[test_market]
+        prices = actuator.token_prices.iloc[-1]
+        status1 = broker.get_account_status(prices, actuator.account_status[-1].timestamp)
+        status2 = broker.get_account_status(prices, actuator.account_status[-1].timestamp)
+        self.assertIs(status1.market_status[test_market], status2.market_status[test_market])
+
+        version = market.version
+        market.remove_all_liquidity()
+        self.assertNotEqual(version, market.version)
+        status3 = broker.get_account_status(prices, actuator.account_status[-1].timestamp)
+        self.assertIsNot(status1.market_status[test_market], status3.market_status[test_market])
+        self.assertEqual(status3.market_status[test_market].base_uncollected, 0)
+
+        version = market.version
+        market.mark_dirty()
+        self.assertNotEqual(version, market.version)
+
+        # new data invalidates balance of last bar
+        status4 = broker.get_account_status(prices, actuator.account_status[-1].timestamp)
+        version = market.version
+        market.data = market.data.copy()
+        self.assertNotEqual(version, market.version)
+        status5 = broker.get_account_status(prices, actuator.account_status[-1].timestamp)
+        self.assertIsNot(status4.market_status[test_market], status5.market_status[test_market])
+
+    def test_run_with_profile(self):
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.profile = True
+        actuator.strategy = Rebalance()
+        actuator.run(print_result=False)
+        df = actuator.profile_result
+        self.assertEqual(list(df.columns), ["phase", "market", "calls", "seconds", "mean_seconds", "ratio"])
+        on_bar = df[df["phase"] == "on_bar"].iloc[0]
+        self.assertEqual(on_bar["calls"], 1440)
+        update = df[df["phase"] == "update"].iloc[0]
+        self.assertEqual(update["market"], test_market.name)
+        self.assertEqual(update["calls"], 1440)
+        self.assertLessEqual(df["ratio"].sum(), 1.01)
+
+        files = actuator.save_result("result", "profile_test")
+        self.assertIn(os.path.join("result", "profile_test.profile.csv"), files)
+        self.assertTrue(pd.read_csv(os.path.join("result", "profile_test.profile.csv")).shape == df.shape)
+
+        actuator = TestActuator.get_actuator_with_uni_market()
+        actuator.run(print_result=False)
+        self.assertIsNone(actuator.profile_result)
+
     def test_uniswap_load_missing_data(self):
         pool = UniV3Pool(usdc, eth, 0.05, usdc)
         market = UniLpMarket(test_market, pool)
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from demeter import DemeterError, TokenInfo, MarketInfo, ChainType, MarketTypeEnum
+from demeter.aave import AaveV3Market
+from demeter.broker import ColumnarDataSource
+from demeter.uniswap import UniLpMarket, UniV3Pool
+from demeter.utils import ColumnarFile, save_columnar
+
+usdc = TokenInfo(name="usdc", decimal=6)
+eth = TokenInfo(name="eth", decimal=18)
+weth = TokenInfo(name="weth", decimal=18, address="0x7ceb23fd6bc0add59e62ac25578270cff1b9f619")
+
+
+class ColumnarTest(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_save_and_load(self):
+        index = pd.date_range("2023-8-14 0:0:0", periods=4, freq="1min", name="timestamp")
+        df = pd.DataFrame(
+            index=index,
+            data={
+                "tick": [200000, 200001, 200002, 200003],
+                "price": [Decimal("1800.1"), Decimal("-0.000001"), Decimal("1.5E+3"), Decimal(0)],
+                "liquidity": [2**100, 1, -(2**90), 0],
+                "rate": [Decimal("1.1"), Decimal("NaN"), None, Decimal("2")],
+                "name": ["a", "b", "c", "d"],
+            },
+        )
+        file_path = os.path.join(self.path, "data")
+        save_columnar(df, file_path, {"token": "eth"})
+
+        columnar = ColumnarFile(file_path)
+        self.assertEqual(columnar.metadata, {"token": "eth"})
+        self.assertEqual(len(columnar), 4)
+        loaded = columnar.to_dataframe()
+        self.assertTrue(loaded.index.equals(df.index))
+        self.assertEqual(list(loaded.columns), list(df.columns))
+        for column in ["tick", "price", "liquidity", "name"]:
+            self.assertEqual(loaded[column].tolist(), df[column].tolist())
+        self.assertIsInstance(loaded["liquidity"].iloc[0], int)
+        self.assertEqual(loaded["rate"].iloc[0], Decimal("1.1"))
+        self.assertTrue(loaded["rate"].iloc[1].is_nan())
+        self.assertIsNone(loaded["rate"].iloc[2])
+
+        part = columnar.to_dataframe(1, 3)
+        self.assertTrue(part.index.equals(df.index[1:3]))
+        self.assertEqual(part["price"].tolist(), df["price"].iloc[1:3].tolist())
+
+    def test_uni_market(self):
+        market = UniLpMarket(MarketInfo("uni"), UniV3Pool(usdc, eth, 0.05, usdc), data_path="data")
+        market.load_data(
+            ChainType.polygon.name, "0x45dda9cb7c25131df268515131f647d726f50608", date(2023, 8, 13), date(2023, 8, 13)
+        )
+        file_path = os.path.join(self.path, "uni")
+        market.save_columnar(file_path)
+
+        loaded = UniLpMarket(MarketInfo("uni"), UniV3Pool(usdc, eth, 0.05, usdc))
+        loaded.load_columnar(file_path)
+        self.assertTrue(loaded.data.equals(market.data))
+
+        with self.assertRaises(DemeterError):
+            UniLpMarket(MarketInfo("uni"), UniV3Pool(usdc, eth, 0.05, eth)).load_columnar(file_path)
+
+        streamed = UniLpMarket(MarketInfo("uni"), UniV3Pool(usdc, eth, 0.05, usdc))
+        streamed.load_columnar(file_path, chunk_size="12h")
+        self.assertIsNotNone(streamed.data_source)
+        streamed.start_stream()
+        self.assertTrue(streamed.data.equals(market.data.iloc[:720]))
+        streamed.stop_stream()
+
+    def test_aave_market(self):
+        market_key = MarketInfo("aave", MarketTypeEnum.aave_v3)
+        market = AaveV3Market(market_key, "aave_risk_parameters/polygon.csv", tokens=[weth])
+        market.data_path = "data"
+        market.load_data(ChainType.polygon, [weth], date(2023, 8, 14), date(2023, 8, 14))
+        file_path = os.path.join(self.path, "aave")
+        market.save_columnar(file_path)
+
+        loaded = AaveV3Market(market_key, "aave_risk_parameters/polygon.csv", tokens=[weth])
+        loaded.load_columnar(file_path)
+        self.assertTrue(loaded.data.equals(market.data))
+        self.assertEqual(list(loaded.data.columns), list(market.data.columns))
+
+    def test_data_source_chunks(self):
+        times = pd.date_range("2024-1-1 0:0:0", periods=72, freq="1h")
+        index = pd.MultiIndex.from_product([times, ["call", "put"]], names=["time", "instrument_name"])
+        df = pd.DataFrame(index=index, data={"price": [Decimal(i) / 10 for i in range(len(index))]})
+        file_path = os.path.join(self.path, "hourly")
+        save_columnar(df, file_path)
+
+        source = ColumnarDataSource(file_path)
+        self.assertTrue(source.timestamps.equals(pd.DatetimeIndex(times)))
+        for prefetch in (True, False):
+            chunks = list(source.iter_chunks("1D", lookback=2, prefetch=prefetch))
+            self.assertEqual(len(chunks), 3)
+            self.assertEqual(chunks[0].start, times[0])
+            self.assertEqual(chunks[1].start, times[24])
+            self.assertEqual(chunks[1].end, times[47])
+            # two instruments in each hour, with 2 hours before the chunk
+            self.assertEqual(len(chunks[0].data.index), 48)
+            self.assertTrue(chunks[1].data.equals(df.iloc[44:96]))
@@ -0,0 +1,53 @@
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+
+from demeter import DemeterError
+from demeter.broker import ColumnarCursor
+
+
+class CursorTest(unittest.TestCase):
+    @staticmethod
+    def get_data() -> pd.DataFrame:
+        index = pd.date_range("2023-8-14 0:0:0", periods=3, freq="1min")
+        return pd.DataFrame(
+            index=index,
+            data={
+                "closeTick": [200000, 200001, 200002],
+                "price": [Decimal("1800.1"), Decimal("1800.2"), Decimal("1800.3")],
+            },
+        )
+
+    def test_row_equals_loc(self):
+        data = CursorTest.get_data()
+        cursor = ColumnarCursor(data)
+        for t in data.index:
+            row = cursor.row_at(t)
+            series = data.loc[t]
+            self.assertEqual(row.closeTick, series.closeTick)
+            self.assertEqual(row["price"], series["price"])
+            self.assertEqual(row.loc["price"], series.loc["price"])
+            self.assertEqual(row.name, series.name)
+            self.assertTrue(row.to_series().equals(series.astype(object)))
+        self.assertTrue("closeTick" in cursor.row(0).index)
+        self.assertIsNone(cursor.row_at(datetime(2023, 8, 15)))
+        self.assertEqual(cursor.position(datetime(2023, 8, 14, 0, 2)), 2)
+
+    def test_assign_value(self):
+        cursor = ColumnarCursor(CursorTest.get_data())
+        row = cursor.row(1)
+        row_copy = row.copy()
+        row.price = row.price + 1
+        self.assertEqual(row.price, Decimal("1801.2"))
+        self.assertEqual(row_copy.price, Decimal("1800.2"))
+        self.assertEqual(cursor.row(1).price, Decimal("1800.2"))
+        with self.assertRaises(AttributeError):
+            _ = row.not_exist
+
+    def test_multi_index_not_supported(self):
+        data = CursorTest.get_data()
+        data.columns = pd.MultiIndex.from_tuples([("a", "closeTick"), ("a", "price")])
+        with self.assertRaises(DemeterError):
+            ColumnarCursor(data)
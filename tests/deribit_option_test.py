@@ -1,3 +1,4 @@
+import os
 import unittest
 from datetime import datetime, date
 from decimal import Decimal
@@ -12,6 +13,7 @@ from demeter.deribit import (
     OptionKind,
     round_decimal,
     OptionMarketBalance,
+    OrderBookStore,
 )
 from io import StringIO
 
@@ -32,7 +34,7 @@ class DeribitOptionTest(unittest.TestCase):
         self.assertEqual(Decimal("1.2"), round_decimal("1.23456789", -1))
         self.assertEqual(Decimal("1.2346"), round_decimal("1.23456789", -4))
 
-    def get_broker(self):
+    def get_broker(self, order_book_store=False):
         broker = Broker()
         market = DeribitOptionMarket(dp_market, DeribitOptionMarket.ETH)
         broker.add_market(market)
@@ -49,6 +51,10 @@ ETH-22SEP23-1700-C,2023-09-01 06:00:00,2023-09-01 06:00:38.755,open,CALL,1700,21
             converters={"asks": order_converter, "bids": order_converter},
         )
         # data.set_index("instrument_name", inplace=True)
+        if order_book_store:
+            raw = pd.read_csv(StringIO(data_csv), parse_dates=["time"], index_col=["time", "instrument_name"])
+            market.order_book = OrderBookStore.from_dataframe(raw)
+            data = data.drop(columns=["asks", "bids"])
         market.set_market_status(
             DeribitMarketStatus(timestamp=pd.Timestamp("2023-9-1 6:0:0"), data=data),
             price=pd.Series([1651.94], index=["eth"]),
@@ -167,6 +173,47 @@ ETH-22SEP23-1700-C,2023-09-01 06:00:00,2023-09-01 06:00:38.755,open,CALL,1700,21
         self.assertEqual(op.sell_amount, Decimal(0))
         pass
 
+    def test_buy_with_order_book_store(self):
+        broker = self.get_broker(order_book_store=True)
+        broker.add_to_balance(DeribitOptionMarket.ETH, 20)
+        market: DeribitOptionMarket = broker.markets.default
+        market.deposit(20)
+        self.assertEqual(market.order_book.get_row(pd.Timestamp("2023-9-1 6:0:0"), "ETH-22SEP23-ERROR-C"), -1)
+        self.assertEqual(market.order_book.get_row(pd.Timestamp("2023-9-1 7:0:0"), "ETH-22SEP23-1650-C"), -1)
+        self.check_buy(market, "insufficient order to buy", "ETH-22SEP23-1600-C", 100000)
+        self.check_buy(market, "doesn't have a order in price", "ETH-22SEP23-1600-C", 1, 0.06)
+
+        self.assertEqual(market.estimate_cost("ETH-22SEP23-1650-C", Decimal("700")), Decimal("20.5525"))
+        orders, fee = market.buy("ETH-22SEP23-1650-C", Decimal("700"))
+        # [[0.0285, 5], [0.029, 605], [0.0295, 197], [0.03, 40], [0.0305, 18]]
+        self.assertEqual(len(orders), 3)
+        self.assertEqual(market.balance, Decimal("0.4475"))
+        op = market.positions["ETH-22SEP23-1650-C"]
+        self.assertEqual(op.avg_buy_price, Decimal("0.029060714285714285714285714285714286"))
+        prices, amounts = market.get_orders("ETH-22SEP23-1650-C", True)
+        self.assertEqual(list(amounts), [0, 0, 107, 40, 18])
+
+        orders, fee = market.sell("ETH-22SEP23-1650-C", Decimal("100"), Decimal("0.0275"))
+        self.assertEqual(orders[0].price, Decimal("0.0275"))
+        self.assertEqual(list(market.get_orders("ETH-22SEP23-1650-C", False)[1]), [51, 485, 248, 24])
+
+        path = os.path.join("result", "order_book_test.npz")
+        market.order_book.save(path)
+        loaded = OrderBookStore.load(path)
+        self.assertEqual(loaded.instruments, market.order_book.instruments)
+        row = loaded.get_row(pd.Timestamp("2023-9-1 6:0:0"), "ETH-22SEP23-1650-C")
+        self.assertEqual(list(loaded.get_orders(row, True)[1]), [0, 0, 107, 40, 18])
+        with self.assertRaises(DemeterError):
+            OrderBookStore.concat([market.order_book, loaded])
+        index = pd.MultiIndex.from_tuples(
+            [(pd.Timestamp("2023-9-1 6:0:0"), "A"), (pd.Timestamp("2023-9-1 7:0:0"), "A")],
+            names=["time", "instrument_name"],
+        )
+        df = pd.DataFrame(index=index, data={"asks": ["[[0.05, 1]]", "[]"], "bids": ["[]", "[[0.04, 2], [0.03, 3]]"]})
+        joined = OrderBookStore.concat([OrderBookStore.from_dataframe(df.iloc[i : i + 1]) for i in range(2)])
+        self.assertEqual(len(joined), 2)
+        self.assertEqual(list(joined.get_orders(joined.get_row(index[1][0], "A"), False)[1]), [2, 3])
+
     def test_buy_twice(self):
         broker = self.get_broker()
         broker.add_to_balance(DeribitOptionMarket.ETH, 20)
@@ -0,0 +1,55 @@
+import unittest
+from decimal import Decimal
+
+import numpy as np
+
+from demeter import Actuator, NumericEnum, DemeterError
+from tests import actuator_test
+
+
+class NumericTest(unittest.TestCase):
+    """
+    Compare float64 backend with decimal backend on sample data.
+
+    Relative drift of every column should be below 1e-12, as documented in NumericEnum.float64.
+    Market settings, such as batch_fee, are not changed by numeric mode.
+    """
+
+    ALLOWED_DRIFT = 1e-12
+
+    @staticmethod
+    def run_backtest(strategy, numeric):
+        actuator = actuator_test.TestActuator.get_actuator_with_uni_market()
+        actuator.numeric = numeric
+        actuator.strategy = strategy
+        actuator.run(print_result=False)
+        return actuator
+
+    def compare(self, strategy_class):
+        decimal_actuator = NumericTest.run_backtest(strategy_class(), NumericEnum.decimal)
+        float_actuator = NumericTest.run_backtest(strategy_class(), "float64")
+        expected = decimal_actuator.account_status_df
+        actual = float_actuator.account_status_df
+        self.assertEqual(len(decimal_actuator.actions), len(float_actuator.actions))
+        self.assertTrue(isinstance(actual["net_value"].iloc[-1], float))
+        self.assertTrue(isinstance(expected["net_value"].iloc[-1], Decimal))
+        self.assertFalse(float_actuator.broker.markets.default.batch_fee)
+
+        drifts = {}
+        for column in expected.columns:
+            a = expected[column].astype(float).to_numpy()
+            b = actual[column].astype(float).to_numpy()
+            base = np.where(a == 0, 1, np.abs(a))
+            drifts[column] = float(np.max(np.abs(a - b) / base))
+        for column, drift in drifts.items():
+            self.assertLess(drift, NumericTest.ALLOWED_DRIFT, column)
+
+    def test_float64_drift_with_swap(self):
+        self.compare(actuator_test.BuyOnSecond)
+
+    def test_float64_drift_with_liquidity(self):
+        self.compare(actuator_test.Rebalance)
+
+    def test_invalid_numeric(self):
+        with self.assertRaises(ValueError):
+            Actuator(numeric="float32")
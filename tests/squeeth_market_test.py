@@ -5,7 +5,7 @@ from unittest import TestCase
 import pandas as pd
 
 from demeter import MarketStatus, TokenInfo, Broker, MarketInfo, MarketTypeEnum
-from demeter.squeeth import SqueethBalance, VaultKey
+from demeter.squeeth import SqueethBalance, VaultKey, calc_twap_price
 from demeter.squeeth.market import SqueethMarket
 from demeter.uniswap import UniLpMarket, UniV3Pool, UniswapMarketStatus, UniLpBalance
 
@@ -62,6 +62,31 @@ class TestSqueethMarket(TestCase):
         price = market.get_twap_price(TokenInfo("eth", 18))
         self.assertEqual(price, 1000.49987506246)
 
+    def test_get_twap_price_windows(self):
+        t = pd.date_range(datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 29), freq="min")
+        data = pd.DataFrame(
+            index=t,
+            data={
+                "norm_factor": [0] * 30,
+                "ETH": [1000 + (i * 7) % 11 for i in range(30)],
+                "OSQTH": [100 + i for i in range(30)],
+            },
+        )
+        market = SqueethMarket(squeeth_key, None, data)
+        eth = TokenInfo("eth", 18)
+        for i in range(30):
+            market.set_market_status(MarketStatus(t[i]), None)
+            expected = calc_twap_price(data["ETH"].iloc[max(0, i - 6) : i + 1])
+            self.assertEqual(market.get_twap_price(eth), expected)
+            # memorized in the same timestamp
+            self.assertIs(market.get_twap_price(eth), market.get_twap_price(eth))
+        self.assertEqual(market.get_twap_price(eth, t[10]), calc_twap_price(data["ETH"].iloc[4:11]))
+
+        # timestamps are not continuous
+        market.data = data.drop(index=t[12:16])
+        market.set_market_status(MarketStatus(t[17]), None)
+        self.assertEqual(market.get_twap_price(eth), calc_twap_price(data["ETH"].iloc[[11, 16, 17]]))
+
     def test_load_data(self):
         market = SqueethMarket(squeeth_key, None)
         market.load_data(date(2023, 8, 14), date(2023, 8, 17))
@@ -4,6 +4,8 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 from demeter import TokenInfo, PriceTrigger, MarketDict, MarketInfo, AtTimeTrigger, PeriodTrigger, MarketStatus, RowData
+from demeter import Strategy, AtTimesTrigger, PeriodsTrigger, TimeRangeTrigger, TimeRangesTrigger, TimeRange
+from demeter.strategy import TriggerScheduler
 
 eth = TokenInfo(name="weth", decimal=18, address="0x7ceb23fd6bc0add59e62ac25578270cff1b9f619")
 usdc = TokenInfo(name="usdc", decimal=6)
@@ -120,3 +122,130 @@ class UniLpCoreTest(unittest.TestCase):
         self.__run(price_df, pt)
         self.assertEqual(param_container[0], 3)
         self.assertEqual(price_df.index[1440 - 1], datetime(2023, 5, 1, 23, 59, 0))
+
+    def test_eventful_rows(self):
+        matched_time = []
+        price_df = UniLpCoreTest.__get_price_df()
+        pt = PeriodTrigger(
+            time_delta=timedelta(hours=1),
+            do=lambda row_data: matched_time.append(row_data.timestamp),
+            pending=timedelta(minutes=5),
+        )
+        eventful_rows = pt.get_eventful_rows(price_df.index)
+        self.__run(price_df.iloc[:600], pt)
+        # rows after a checked trigger start from its next match
+        rest_rows = pt.get_eventful_rows(price_df.index[600:])
+        self.__run(price_df.iloc[600:], pt)
+        self.assertEqual(eventful_rows.sum(), 24)
+        self.assertTrue(eventful_rows[0])
+        self.assertTrue(all(price_df.index[eventful_rows].isin(matched_time)[1:]))
+        self.assertEqual(list(price_df.index[600:][rest_rows]), [t for t in matched_time if t >= price_df.index[600]])
+        # all matches are in the past
+        self.assertFalse(pt.get_eventful_rows(price_df.index).any())
+
+        at = AtTimeTrigger(time=datetime(2023, 5, 1, 23, 59, 0), do=lambda row_data: row_data)
+        self.assertEqual(list(price_df.index[at.get_eventful_rows(price_df.index)]), [datetime(2023, 5, 1, 23, 59, 0)])
+        self.assertFalse(PriceTrigger(lambda p: True, do=lambda row_data: row_data).get_eventful_rows(price_df.index).any())
+
+    @staticmethod
+    def __get_triggers(events: list):
+        def record(name):
+            return lambda row_data: events.append((row_data.timestamp, name))
+
+        day = datetime(2023, 5, 1)
+        triggers = [AtTimeTrigger(day + timedelta(minutes=m), record(f"at{m}")) for m in range(0, 1440, 7)]
+        triggers += [
+            AtTimesTrigger([day + timedelta(hours=h) for h in (5, 2, 2)], record("at")),
+            PeriodTrigger(timedelta(minutes=90), record("period"), pending=timedelta(minutes=3)),
+            PeriodsTrigger([timedelta(hours=2), timedelta(minutes=50)], record("periods"), trigger_immediately=True),
+            TimeRangeTrigger(TimeRange(day + timedelta(hours=3), day + timedelta(hours=3, minutes=5)), record("range")),
+            TimeRangesTrigger(
+                [
+                    TimeRange(day + timedelta(hours=6), day + timedelta(hours=6, minutes=3)),
+                    TimeRange(day + timedelta(hours=1), day + timedelta(hours=1, minutes=2)),
+                    TimeRange(day + timedelta(hours=6, minutes=2), day + timedelta(hours=6, minutes=4)),
+                ],
+                record("ranges"),
+            ),
+            PriceTrigger(lambda p: p["eth"] > 1714.35, record("price")),
+        ]
+        return triggers
+
+    def test_trigger_scheduler(self):
+        price_df = UniLpCoreTest.__get_price_df()
+        # check every trigger in every row, just like actuator did before
+        expected = []
+        strategy = Strategy()
+        strategy.triggers = UniLpCoreTest.__get_triggers(expected)
+        remains = []
+        for time_index, price_row in price_df.iterrows():
+            row_data = UniLpCoreTest.__get_moke_row_data(time_index, price_row)
+            for trigger in strategy.triggers:
+                if trigger.when(row_data):
+                    trigger.do(row_data)
+            strategy.triggers = [x for x in strategy.triggers if not x.is_out_date(time_index)]
+            remains.append(len(strategy.triggers))
+
+        events = []
+        strategy = Strategy()
+        strategy.triggers = UniLpCoreTest.__get_triggers(events)
+        checked = []
+        for trigger in strategy.triggers:
+            trigger.when = lambda row_data, when=trigger.when: checked.append(row_data.timestamp) or when(row_data)
+        scheduler = TriggerScheduler(strategy, price_df.index)
+        for row_id, (time_index, price_row) in enumerate(price_df.iterrows()):
+            scheduler.run(UniLpCoreTest.__get_moke_row_data(time_index, price_row), row_id)
+            self.assertEqual(len(strategy.triggers), remains[row_id])
+        self.assertEqual(events, expected)
+        # price trigger is checked in every row, at time triggers are only checked once
+        self.assertLess(len(checked), 1440 * 3)
+        self.assertIn((datetime(2023, 5, 1, 2), "at"), events)
+        self.assertEqual(len([e for e in events if e[1] == "ranges"]), 6)
+
+    @staticmethod
+    def __get_changing_triggers(strategy: Strategy, events: list):
+        day = datetime(2023, 5, 1)
+
+        def record(name):
+            return lambda row_data: events.append((row_data.timestamp, name))
+
+        def add_period(row_data):
+            strategy.triggers.append(PeriodTrigger(timedelta(minutes=37), record("period")))
+
+        first = PeriodTrigger(timedelta(minutes=30), record("first"))
+
+        def replace_first(row_data):
+            # in place replacement, the old trigger should not be checked any more
+            strategy.triggers[strategy.triggers.index(first)] = PeriodTrigger(
+                timedelta(minutes=50), record("replaced")
+            )
+
+        return [
+            AtTimeTrigger(day + timedelta(minutes=7), add_period),
+            AtTimeTrigger(day + timedelta(hours=3), replace_first),
+            first,
+        ]
+
+    def test_trigger_scheduler_with_changes(self):
+        price_df = UniLpCoreTest.__get_price_df()
+        expected = []
+        strategy = Strategy()
+        strategy.triggers = UniLpCoreTest.__get_changing_triggers(strategy, expected)
+        for time_index, price_row in price_df.iterrows():
+            row_data = UniLpCoreTest.__get_moke_row_data(time_index, price_row)
+            for trigger in strategy.triggers:
+                if trigger.when(row_data):
+                    trigger.do(row_data)
+            strategy.triggers = [x for x in strategy.triggers if not x.is_out_date(time_index)]
+
+        events = []
+        strategy = Strategy()
+        strategy.triggers = UniLpCoreTest.__get_changing_triggers(strategy, events)
+        scheduler = TriggerScheduler(strategy, price_df.index)
+        for row_id, (time_index, price_row) in enumerate(price_df.iterrows()):
+            scheduler.run(UniLpCoreTest.__get_moke_row_data(time_index, price_row), row_id)
+        self.assertEqual(events, expected)
+        # trigger added at 0:07 is checked in the same row, so its period starts at 0:07
+        self.assertIn((datetime(2023, 5, 1, 0, 44), "period"), events)
+        self.assertNotIn((datetime(2023, 5, 1, 3, 30), "first"), events)
+        self.assertIn((datetime(2023, 5, 1, 3, 50), "replaced"), events)
@@ -0,0 +1,77 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from demeter import TokenInfo, Actuator, Strategy, MarketInfo, RowData, ChainType, sweep
+from demeter.core.sweep import expand_param_grid
+from demeter.uniswap import UniV3Pool, UniLpMarket
+
+eth = TokenInfo(name="eth", decimal=18)
+usdc = TokenInfo(name="usdc", decimal=6)
+test_market = MarketInfo("market1")
+pool = UniV3Pool(usdc, eth, 0.05, usdc)
+
+
+class ConstantInterval(Strategy):
+    def __init__(self, width=Decimal("0.01")):
+        super().__init__()
+        self.width = Decimal(width)
+
+    def on_bar(self, row_data: RowData):
+        if row_data.row_id == 2:
+            price = row_data.market_status[test_market].price
+            self.markets[test_market].add_liquidity(price * (1 - self.width), price * (1 + self.width))
+
+
+def load_data():
+    market = UniLpMarket(test_market, pool)
+    market.data_path = "data"
+    market.load_data(
+        ChainType.polygon.name, "0x45dda9cb7c25131df268515131f647d726f50608", date(2023, 8, 14), date(2023, 8, 14)
+    )
+    return {"market1": market.data, "price": Actuator.prepare_price(market.get_price_from_data())}
+
+
+def build_actuator(shared_data) -> Actuator:
+    actuator = Actuator()
+    market = UniLpMarket(test_market, pool)
+    market.data = shared_data["market1"]
+    actuator.broker.add_market(market)
+    actuator.broker.set_balance(usdc, 1000)
+    actuator.broker.set_balance(eth, 1)
+    actuator.set_price(shared_data["price"], prepared=True)
+    # backtests get their own copy of dataframes, a new column should not be seen by others
+    if "added" in shared_data["market1"].columns:
+        raise AssertionError("shared dataframe is changed by another backtest")
+    shared_data["market1"]["added"] = 1
+    return actuator
+
+
+class SweepTest(unittest.TestCase):
+    def test_expand_param_grid(self):
+        params = expand_param_grid({"a": [1, 2], "b": ["x", "y", "z"]})
+        self.assertEqual(len(params), 6)
+        self.assertEqual(params[0], {"a": 1, "b": "x"})
+        self.assertEqual(expand_param_grid([{"a": 1}]), [{"a": 1}])
+
+    def test_sweep(self):
+        shared_data = load_data()
+        grid = {"width": ["0.01", "0.05"]}
+        serial = sweep(ConstantInterval, grid, build_actuator, shared_data)
+        parallel = sweep(ConstantInterval, grid, build_actuator, shared_data, processes=2)
+        self.assertEqual(len(parallel.index), 2)
+        self.assertEqual(list(parallel["width"]), ["0.01", "0.05"])
+        self.assertTrue("Rate of Return" in parallel.columns)
+        self.assertEqual(list(serial["Return"]), list(parallel["Return"]))
+        self.assertNotEqual(parallel["Return"].iloc[0], parallel["Return"].iloc[1])
+        self.assertFalse("added" in shared_data["market1"].columns)
+
+        spawned = sweep(ConstantInterval, grid, build_actuator, shared_data, processes=2, start_method="spawn")
+        self.assertEqual(list(serial["Return"]), list(spawned["Return"]))
+
+    def test_prepared_price(self):
+        price = load_data()["price"]
+        actuator = Actuator()
+        actuator.set_price(price, prepared=True)
+        self.assertIs(actuator.token_prices, price[0])
+        self.assertEqual(actuator.broker.quote_token, usdc)
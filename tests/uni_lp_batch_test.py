@@ -0,0 +1,108 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+
+from demeter import TokenInfo, Actuator, Strategy, MarketInfo, RowData, ChainType, DemeterError
+from demeter.uniswap import UniV3Pool, UniLpMarket, UniLpBatchSimulator, UniLpBatchStrategy
+
+eth = TokenInfo(name="eth", decimal=18)
+usdc = TokenInfo(name="usdc", decimal=6)
+weth = TokenInfo(name="weth", decimal=18)
+osqth = TokenInfo(name="osqth", decimal=18)
+
+eth_market = MarketInfo("eth_pool")
+osqth_market = MarketInfo("osqth_pool")
+
+
+class Rebalance(Strategy):
+    def on_bar(self, row_data: RowData):
+        if row_data.row_id in (2, 700):
+            market: UniLpMarket = self.markets.default
+            market.remove_all_liquidity()
+            price = row_data.market_status.default.price
+            market.add_liquidity(price * Decimal("0.99"), price * Decimal("1.01"))
+
+
+class BatchRebalance(UniLpBatchStrategy):
+    def on_bar(self, row_id: int):
+        if row_id in (2, 700):
+            self.simulator.remove_all_liquidity()
+            price = self.simulator.price
+            self.simulator.add_liquidity(price * 0.99, price * 1.01)
+
+
+def get_market(market_info: MarketInfo) -> UniLpMarket:
+    if market_info == eth_market:
+        market = UniLpMarket(market_info, UniV3Pool(usdc, eth, 0.05, usdc), data_path="data")
+        market.load_data(ChainType.polygon.name, "0x45dda9cb7c25131df268515131f647d726f50608", date(2023, 8, 14), date(2023, 8, 14))
+    else:
+        market = UniLpMarket(market_info, UniV3Pool(weth, osqth, 0.3, weth), data_path="data")
+        market.load_data(ChainType.ethereum.name, "0x82c427adfdf2d245ec51d8046b41c4ee87f0d29c", date(2023, 8, 14), date(2023, 8, 14))
+    return market
+
+
+class UniLpBatchTest(unittest.TestCase):
+    def test_same_as_actuator(self):
+        balances = {eth_market: (1, 1067), osqth_market: (20, 2)}
+        markets = [get_market(eth_market), get_market(osqth_market)]
+        simulator = UniLpBatchSimulator(markets)
+        simulator.set_balance([b[0] for b in balances.values()], [b[1] for b in balances.values()])
+        simulator.strategy = BatchRebalance()
+        simulator.run()
+
+        for market in markets:
+            actuator = Actuator()
+            actuator.broker.add_market(get_market(market.market_info))
+            actuator.broker.set_balance(market.base_token, balances[market.market_info][0])
+            actuator.broker.set_balance(market.quote_token, balances[market.market_info][1])
+            actuator.broker.quote_token = market.quote_token
+            actuator.strategy = Rebalance()
+            actuator.run(print_result=False)
+
+            expected = actuator.account_status_df
+            actual = simulator.account_status_df[market.market_info]
+            self.assertEqual(list(expected.columns), list(actual.columns))
+            self.assertTrue(expected.index.equals(actual.index))
+            for column in expected.columns:
+                np.testing.assert_allclose(actual[column], expected[column].astype(float), rtol=1e-8, atol=1e-12)
+            self.assertEqual(actual.iloc[-1][(market.market_info.name, "position_count")], 1)
+
+    def test_max_positions(self):
+        simulator = UniLpBatchSimulator([get_market(eth_market)])
+        simulator.set_balance(1, 1067)
+        price = simulator.price
+        simulator.add_liquidity(price * 0.99, price * 1.01, 0.1, 100)
+        # liquidity is added to the same position
+        simulator.add_liquidity(price * 0.99, price * 1.01, 0.1, 100)
+        self.assertEqual(simulator.position_count[0], 1)
+        with self.assertRaises(DemeterError):
+            simulator.add_liquidity(price * 0.98, price * 1.02)
+
+    def test_insufficient_balance(self):
+        simulator = UniLpBatchSimulator([get_market(eth_market)])
+        simulator.set_balance(0.01, 10)
+        price = simulator.price
+        with self.assertRaises(DemeterError):
+            simulator.add_liquidity(price * 0.99, price * 1.01, 5, 5000)
+        with self.assertRaises(DemeterError):
+            simulator.buy(100)
+        with self.assertRaises(DemeterError):
+            simulator.sell(1)
+        # nothing changed after failed operations
+        self.assertEqual(simulator.position_count[0], 0)
+        self.assertEqual(simulator.base_balance[0], 0.01)
+        self.assertEqual(simulator.quote_balance[0], 10)
+        # use all the balance
+        simulator.add_liquidity(price * 0.99, price * 1.01)
+        simulator.remove_all_liquidity()
+        self.assertLessEqual(simulator.base_balance[0], 0.01 * (1 + 1e-9))
+        self.assertLessEqual(simulator.quote_balance[0], 10 * (1 + 1e-9))
+
+    def test_different_index(self):
+        market = get_market(eth_market)
+        other = UniLpMarket(osqth_market, UniV3Pool(usdc, eth, 0.05, usdc))
+        other.data = market.data.iloc[1:]
+        with self.assertRaises(DemeterError):
+            UniLpBatchSimulator([market, other])
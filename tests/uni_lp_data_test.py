@@ -1,8 +1,17 @@
+import os
+import shutil
 import unittest
-
+from datetime import date
+from decimal import Decimal
+import numpy as np
 import pandas as pd
 
-from demeter.uniswap import LineTypeEnum, data
+from demeter import TokenInfo, MarketInfo
+from demeter.uniswap import LineTypeEnum, data, UniLpMarket, UniV3Pool
+from demeter.utils.file_cache import get_cache_file, get_combined_cache_file, read_files
+
+eth = TokenInfo(name="eth", decimal=18)
+usdc = TokenInfo(name="usdc", decimal=6)
 
 
 class UniLpDataTest(unittest.TestCase):
@@ -73,3 +82,58 @@ class UniLpDataTest(unittest.TestCase):
         self.assertEqual(new_df.iloc[2, 2], 0)
         self.assertEqual(new_df.iloc[2, 3], 0)
         self.assertEqual(new_df.iloc[2, 4], 8)
+
+    # ===========load data=========================
+    @staticmethod
+    def load_market(processes=1, cache_path=None, high_precision=True) -> UniLpMarket:
+        market = UniLpMarket(MarketInfo("market1"), UniV3Pool(usdc, eth, 0.05, usdc))
+        market.data_path = "data"
+        market.load_data(
+            "polygon",
+            "0x45dda9cb7c25131df268515131f647d726f50608",
+            date(2023, 8, 13),
+            date(2023, 8, 14),
+            processes=processes,
+            cache_path=cache_path,
+            high_precision=high_precision,
+        )
+        return market
+
+    def test_load_data_low_precision(self):
+        expected = UniLpDataTest.load_market().data
+        data = UniLpDataTest.load_market(high_precision=False).data
+        for column in ("open", "price", "low", "high", "volume0", "volume1"):
+            self.assertEqual(data[column].dtype, float)
+            self.assertTrue(np.allclose(data[column], expected[column].astype(float)))
+        self.assertEqual(type(expected["price"].iloc[0]), Decimal)
+
+    def test_load_data_parallel_with_cache(self):
+        cache_path = "./result/uni_cache"
+        if os.path.exists(cache_path):
+            shutil.rmtree(cache_path)
+        expected = UniLpDataTest.load_market().data
+        parallel = UniLpDataTest.load_market(processes=2, cache_path=cache_path).data
+        self.assertTrue(expected.equals(parallel))
+        self.assertEqual(len(os.listdir(cache_path)), 2)
+        cached = UniLpDataTest.load_market(cache_path=cache_path).data
+        self.assertTrue(expected.equals(cached))
+        self.assertEqual(type(cached["currentLiquidity"].iloc[0]), type(expected["currentLiquidity"].iloc[0]))
+
+    def test_cache_of_same_file_name(self):
+        cache_path = "./result/same_name_cache"
+        if os.path.exists(cache_path):
+            shutil.rmtree(cache_path)
+        paths = []
+        # same name, size and modify time, but in different folders
+        for folder, value in (("a", 1), ("b", 2)):
+            os.makedirs(os.path.join(cache_path, folder), exist_ok=True)
+            path = os.path.join(cache_path, folder, "data.csv")
+            pd.DataFrame({"value": [value]}).to_csv(path, index=False)
+            os.utime(path, ns=(1700000000000000000, 1700000000000000000))
+            paths.append(path)
+        self.assertNotEqual(get_cache_file(paths[0], cache_path), get_cache_file(paths[1], cache_path))
+        for _ in range(2):
+            dfs = read_files(paths, pd.read_csv, cache_path)
+            self.assertEqual([df["value"].iloc[0] for df in dfs], [1, 2])
+        combined_files = [get_combined_cache_file([p], cache_path, "data") for p in paths]
+        self.assertNotEqual(combined_files[0], combined_files[1])
@@ -1,6 +1,8 @@
 import unittest
 from decimal import Decimal
 
+import numpy as np
+
 from demeter.uniswap import helper, liquitidy_math
 from tests.common import assert_equal_with_error
 
@@ -136,6 +138,23 @@ class UniLpDataTest(unittest.TestCase):
         tick = helper.base_unit_price_to_tick(base_unit_price, 6, 18, True)
         self.assertEqual(tick, 196147)
 
+    def test_ticks_to_base_unit_price(self):
+        ticks = np.array([196147, 196147, np.nan, 200311, -10])
+        prices = helper.ticks_to_base_unit_price(ticks, 6, 18, True)
+        self.assertEqual(prices[0], Decimal("3032.9826448067293827922140338613115"))
+        self.assertEqual(prices[1], prices[0])
+        self.assertTrue(np.isnan(prices[2]))
+        self.assertEqual(prices[3], helper.tick_to_base_unit_price(200311, 6, 18, True))
+
+        for is_token0_quote in (True, False):
+            float_prices = helper.ticks_to_base_unit_price(ticks, 6, 18, is_token0_quote, high_precision=False)
+            for tick, price in zip(ticks, float_prices):
+                if np.isnan(tick):
+                    self.assertTrue(np.isnan(price))
+                else:
+                    expected = helper.tick_to_base_unit_price(int(tick), 6, 18, is_token0_quote)
+                    self.assertTrue(assert_equal_with_error(Decimal(price), expected, allowed_error=1e-9))
+
     def test_base_unit_price_and_sqrt(self):
         base_unit_price = helper.sqrt_price_x96_to_base_unit_price(1438615122195042638686831659635746, 6, 18, True)
         self.assertEqual(base_unit_price, Decimal("3032.9826448067293827922140338613115"))
@@ -149,3 +168,65 @@ class UniLpDataTest(unittest.TestCase):
         tick = helper.sqrt_price_x96_to_tick(sqrt_price_x96)
         print(tick)
         self.assertEqual(tick, 196147)
+
+    def test_sqrt_ratio_cache(self):
+        liquitidy_math.clear_sqrt_ratio_cache()
+        for tick in (-887272, -201010, -1, 0, 1, 201010, 887272):
+            self.assertEqual(liquitidy_math.get_sqrt_ratio_at_tick(tick), liquitidy_math.calc_sqrt_ratio_at_tick(tick))
+        liquitidy_math.get_sqrt_ratio_at_tick(201010)
+        info = liquitidy_math.get_sqrt_ratio_cache_info()
+        self.assertEqual(info.misses, 7)
+        self.assertEqual(info.hits, 1)
+
+        liquitidy_math.precompute_sqrt_ratio(10, 200005, 200100)
+        self.assertEqual(liquitidy_math.get_sqrt_ratio_cache_info().table_size, 10)
+        self.assertEqual(liquitidy_math.get_sqrt_ratio_at_tick(200010), liquitidy_math.calc_sqrt_ratio_at_tick(200010))
+        self.assertEqual(liquitidy_math.get_sqrt_ratio_cache_info().table_hits, 1)
+        liquitidy_math.clear_sqrt_ratio_cache()
+        self.assertEqual(liquitidy_math.get_sqrt_ratio_cache_info(), (0, 0, 0, 0, 0))
+
+    def test_find_tick_range_at_rate(self):
+        result = helper.find_tick_range_at_rate(Decimal(1800), Decimal("1.5"), 10, 6, 18, True)
+        self.assertEqual(result.center_tick, 201360)
+        self.assertEqual(result.upper, 205130)
+        self.assertEqual(result.lower, 195400)
+        self.assertEqual(result.rate.quantize(Decimal("0.00001")), Decimal("1.5"))
+
+        result = helper.find_tick_range_at_rate(Decimal("0.1"), Decimal(2), 60, 18, 18, False)
+        self.assertEqual((result.center_tick, result.upper, result.lower), (-23040, -12420, -57780))
+        self.assertIsNone(helper.find_tick_range_at_rate(Decimal(1800), Decimal("0.5"), 60, 6, 18, True))
+
+    def test_find_tick_ranges_at_rate(self):
+        prices = [Decimal(1800), Decimal(1800), Decimal(2100), Decimal(1800)]
+        rates = [Decimal("1.5"), Decimal(1), Decimal(3), Decimal("0.5")]
+        df = helper.find_tick_ranges_at_rate(prices, rates, 10, 6, 18, True)
+        for i in range(len(prices)):
+            expected = helper.find_tick_range_at_rate(prices[i], rates[i], 10, 6, 18, True)
+            if expected is None:
+                self.assertTrue(df.iloc[i].isna().all())
+            else:
+                self.assertEqual(tuple(df.iloc[i]), tuple(expected))
+
+    def test_delta_gamma_array(self):
+        price = Decimal(1000)
+        for is_0_quote, d0, d1 in ((True, 6, 18), (False, 18, 6)):
+            sqrt = helper.base_unit_price_to_sqrt_price_x96(price, d0, d1, is_0_quote)
+            ticks = sorted(helper.base_unit_price_to_tick(p, d0, d1, is_0_quote) for p in (price - 100, price + 100))
+            liquidity = liquitidy_math.get_liquidity(sqrt, ticks[0], ticks[1], Decimal(1000), Decimal(1), d0, d1)
+            prices = np.array([1, 800, 900, 950, 1000, 1050, 1100, 2000], dtype=float)
+            delta, gamma = helper.get_delta_gamma_array(900.0, 1100.0, prices, liquidity, d0, d1, is_0_quote)
+            for i, p in enumerate(prices):
+                expected_delta, expected_gamma = helper.get_delta_gamma(900.0, 1100.0, p, liquidity, d0, d1, is_0_quote)
+                self.assertAlmostEqual(delta[i], expected_delta, places=12)
+                self.assertAlmostEqual(gamma[i], expected_gamma, places=12)
+
+            sqrt_prices = [
+                float(helper.base_unit_price_to_sqrt_price_x96(Decimal(p), d0, d1, is_0_quote)) for p in prices
+            ]
+            lower_sqrt = helper.base_unit_price_to_sqrt_price_x96(Decimal(900), d0, d1, is_0_quote)
+            upper_sqrt = helper.base_unit_price_to_sqrt_price_x96(Decimal(1100), d0, d1, is_0_quote)
+            delta_sqrt, gamma_sqrt = helper.get_delta_gamma_sqrt_x96_array(
+                lower_sqrt, upper_sqrt, np.array(sqrt_prices), liquidity, d0, d1, is_0_quote
+            )
+            np.testing.assert_allclose(delta_sqrt[1:-1], delta[1:-1], rtol=1e-9)
+            np.testing.assert_allclose(gamma_sqrt[1:-1], gamma[1:-1], rtol=1e-9)
@@ -6,7 +6,7 @@ import pandas as pd
 
 import demeter
 from demeter import TokenInfo, Broker, MarketInfo, ChainType, MarketStatus
-from demeter.uniswap import UniLpMarket, UniV3Pool, UniV3PoolStatus, UniswapMarketStatus
+from demeter.uniswap import UniLpMarket, UniV3Pool, UniV3PoolStatus, UniswapMarketStatus, helper
 
 test_market = MarketInfo("market1")
 
@@ -89,6 +89,32 @@ class TestUniLpMarket(unittest.TestCase):
         self.assertEqual(liquidity, 1839802140646141)
         TestUniLpMarket.print_broker(broker)
 
+    def test_get_delta_gamma(self):
+        broker = self.get_broker()
+        market: UniLpMarket = broker.markets[test_market]
+        price = market.market_status.data.price
+        market.add_liquidity(price - 100, price + 100, Decimal(500), Decimal("0.3"))
+        market.add_liquidity(price - 300, price + 50, Decimal(300), Decimal("0.2"))
+
+        expected_delta, expected_gamma = 0, 0
+        for position_info, position in market.positions.items():
+            lower_price, upper_price = sorted(
+                [market.tick_to_price(position_info.lower_tick), market.tick_to_price(position_info.upper_tick)]
+            )
+            delta, gamma = helper.get_delta_gamma(
+                float(lower_price), float(upper_price), float(price), position.liquidity, 6, 18, True
+            )
+            expected_delta += delta
+            expected_gamma += gamma
+        delta, gamma = market.get_delta_gamma()
+        self.assertAlmostEqual(delta, expected_delta, places=12)
+        self.assertAlmostEqual(gamma, expected_gamma, places=12)
+
+        deltas, gammas = market.get_delta_gamma(pd.Series([float(price), float(price) * 2]))
+        self.assertAlmostEqual(deltas[0], expected_delta, places=12)
+        self.assertEqual(deltas[1], 0)
+        self.assertEqual(gammas[1], 0)
+
     def test_add_Liquidity_default_param(self):
         """
         verify market will use all balance if amount param is null